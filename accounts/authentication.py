@@ -0,0 +1,108 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULTS = {
+    "MAX_SIZE": 10000,
+    "TTL": 60,
+    "CACHE_ALIAS": None,
+}
+
+
+def token_cache_setting(name):
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class TokenCache:
+    """
+    Token key -> user lookups kept in a bounded, TTL-expiring in-process LRU,
+    optionally backed by a shared Django cache so every worker benefits
+    from a lookup done by any other.
+
+    Logging out, deleting a user and deactivating one evict the keys from
+    this process and from the shared cache, but not from the LRU of other
+    worker processes. Tokens deleted any other way, as in the admin, are
+    not evicted at all. There a deleted token or a deactivated user is still let in
+    for up to TTL seconds, so keep TTL short when running several workers.
+    """
+
+    key_prefix = "accounts:token:"
+
+    def __init__(self, max_size, ttl, cache_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = caches[cache_alias] if cache_alias else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, user = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return copy.copy(user)
+                del self._entries[key]
+
+        if self.shared is None:
+            return None
+
+        user = self.shared.get(self.key_prefix + key)
+        if user is not None:
+            self._store(key, user, now)
+            return copy.copy(user)
+        return None
+
+    def set(self, key, user):
+        self._store(key, user, time.monotonic())
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, user, self.ttl)
+
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self.key_prefix + key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, user, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+@lru_cache(maxsize=None)
+def get_token_cache():
+    return TokenCache(
+        token_cache_setting("MAX_SIZE"),
+        token_cache_setting("TTL"),
+        token_cache_setting("CACHE_ALIAS"),
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        user = token_cache.get(key)
+
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+
+        token = self.get_model()(key=key, user=user)
+        token._state.adding = False
+        return user, token
@@ -0,0 +1,122 @@
+"""
+Avatar rendition pipeline.
+
+Uploaded avatars are stored untouched; a process pool then decodes each one
+once and writes a content-hashed rendition per configured size. Rendition
+names never change for a given image, so they can be served with long-lived
+cache headers. The metadata ends up on ``Profile.avatar_renditions``.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = "avatar/renditions"
+
+DEFAULTS = {
+    "SIZES": (200, 100, 40),
+    "WORKERS": 2,
+    "ASYNC": True,
+}
+
+
+def avatar_setting(name):
+    return getattr(settings, "AVATAR_PROCESSING", {}).get(name, DEFAULTS[name])
+
+
+def render_renditions(source_path, media_root, sizes):
+    """
+    Runs in a worker process, so it only deals in plain paths and PIL.
+    Returns a mapping of size to rendition metadata.
+    """
+    if features.check("webp"):
+        image_format, ext = "WEBP", "webp"
+    else:
+        image_format, ext = "JPEG", "jpg"
+
+    img = Image.open(source_path)
+    img.load()
+    if image_format == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    os.makedirs(os.path.join(media_root, RENDITIONS_DIR), exist_ok=True)
+
+    renditions = {}
+    for size in sizes:
+        thumb = img.copy()
+        thumb.thumbnail((size, size))
+
+        buffer = BytesIO()
+        thumb.save(buffer, image_format)
+        data = buffer.getvalue()
+
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        name = f"{RENDITIONS_DIR}/{digest}_{size}.{ext}"
+        path = os.path.join(media_root, name)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+
+        renditions[str(size)] = {
+            "name": name,
+            "width": thumb.width,
+            "height": thumb.height,
+        }
+
+    return renditions
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ProcessPoolExecutor(max_workers=avatar_setting("WORKERS"))
+
+
+def record_renditions(profile_id, avatar_name, renditions):
+    from accounts.models import Profile
+
+    # Filtering on the avatar name drops the result when a newer upload
+    # replaced the avatar while this one was rendering.
+    Profile.objects.filter(id=profile_id, avatar=avatar_name).update(
+        avatar_renditions=renditions
+    )
+
+
+def _on_rendered(profile_id, avatar_name, future):
+    try:
+        record_renditions(profile_id, avatar_name, future.result())
+    except Exception:
+        logger.exception("Failed to render avatar %s.", avatar_name)
+    finally:
+        close_old_connections()
+
+
+def process_avatar(profile):
+    """
+    Render the profile's current avatar once the surrounding transaction
+    has committed, in the process pool unless AVATAR_PROCESSING["ASYNC"]
+    is off.
+    """
+    profile_id = profile.id
+    avatar_name = profile.avatar.name
+    args = (profile.avatar.path, settings.MEDIA_ROOT, avatar_setting("SIZES"))
+
+    def schedule():
+        if not avatar_setting("ASYNC"):
+            record_renditions(profile_id, avatar_name, render_renditions(*args))
+            return
+
+        future = get_executor().submit(render_renditions, *args)
+        future.add_done_callback(
+            lambda f: _on_rendered(profile_id, avatar_name, f)
+        )
+
+    transaction.on_commit(schedule)
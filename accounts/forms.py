@@ -1,9 +1,13 @@
 from django import forms
-from django.contrib.auth import get_user_model, authenticate
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.template import loader
 from django.utils.translation import gettext_lazy as _
 
+from accounts.exceptions import CredentialsError
 from accounts.models import Profile
+from accounts.services import verify_credentials
+from mailer.dispatch import enqueue_mail
 from utils.validate import validate_password, validate_username
 
 User = get_user_model()
@@ -76,20 +80,8 @@ class RegisterForm(UserCreationForm):
         password1 = self.cleaned_data.get("password1")
         password2 = self.cleaned_data.get("password2")
 
-        try:
-            user_email = User.objects.get(email=email)
-        except User.DoesNotExist:
-            user_email = None
-
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            user = None
-
-        if user_email:
-            raise forms.ValidationError(_("Email ID already belongs to an account."))
-        if user:
-            raise forms.ValidationError(_("User with given username already exists."))
+        # Taken emails and usernames are reported by register_user(), from
+        # the unique constraints.
         if not validate_username(username):
             raise forms.ValidationError(_("Not a valid username."))
         if not password1 or not password2:
@@ -108,6 +100,15 @@ class RegisterForm(UserCreationForm):
 
         return self.cleaned_data
 
+    def clean_username(self):
+        # Django's case-insensitive lookup is left out too. Usernames are
+        # unique under MySQL's case-insensitive collation already.
+        return self.cleaned_data.get("username")
+
+    def validate_unique(self):
+        # Left to the unique constraints, see register_user().
+        pass
+
     class Meta:
         model = User
         fields = ["email", "username", "password1", "password2"]
@@ -156,22 +157,9 @@ class LoginForm(forms.Form):
         password = self.cleaned_data.get("password")
 
         try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            user = None
-
-        if not user:
-            raise forms.ValidationError(
-                _("Account with email does not exists."),
-            )
-        if not user.check_password(password):
-            raise forms.ValidationError(
-                _("Password is incorrect."),
-            )
-        if not user.is_active:
-            raise forms.ValidationError(_("User is not active."))
-
-        self.user_cache = authenticate(self.request, email=email, password=password)
+            self.user_cache = verify_credentials(email, password, self.request)
+        except CredentialsError as e:
+            raise forms.ValidationError(e.message)
 
         return self.cleaned_data
 
@@ -212,3 +200,23 @@ class UpdateProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
         fields = ["avatar", "bio"]
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ):
+        subject = loader.render_to_string(subject_template_name, context)
+        subject = "".join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(html_email_template_name, context)
+
+        enqueue_mail(subject, body, from_email, [to_email], html_message=html_body)
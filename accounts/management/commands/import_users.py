@@ -0,0 +1,91 @@
+import csv
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users and profiles from a CSV or JSON Lines file with"
+        " email, username and password columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes, one per CPU by default.",
+        )
+        parser.add_argument(
+            "--inactive",
+            action="store_true",
+            help="Create the users with is_active=False.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"]
+        if input_format is None:
+            input_format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        is_active = not options["inactive"]
+
+        with open(path, newline="", encoding="utf-8") as f:
+            if input_format == "csv":
+                records = csv.DictReader(f)
+            else:
+                records = (json.loads(line) for line in f if line.strip())
+
+            rows = (self._row(record, is_active) for record in records)
+
+            started = time.perf_counter()
+            totals = {"created": 0, "skipped": 0}
+
+            def progress(created, skipped):
+                totals["created"] += created
+                totals["skipped"] += len(skipped)
+                if options["verbosity"] > 1:
+                    for row in skipped:
+                        self.stdout.write(
+                            f"Skipped {row['email']} ({row['username']}): email or username taken."
+                        )
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{totals['created']} created, {totals['skipped']} skipped"
+                    f" ({totals['created'] / elapsed:.0f} users/s)"
+                )
+
+            created, skipped = User.objects.bulk_provision(
+                rows,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                progress=progress,
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} user(s), skipped {skipped} taken or repeated,"
+            f" in {elapsed:.1f}s ({created / elapsed if elapsed else 0:.0f} users/s)."
+        ))
+
+    def _row(self, record, is_active):
+        try:
+            return {
+                "email": record["email"],
+                "username": record["username"],
+                "password": record["password"],
+                "is_active": is_active,
+            }
+        except KeyError as e:
+            raise CommandError(f"Missing column {e} in row {record!r}.")
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_friend_count(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    Friend = apps.get_model("friendship", "Friend")
+    counts = (
+        Friend.objects.filter(to_user=OuterRef("user"))
+        .order_by()
+        .values("to_user")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Profile.objects.update(friend_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_avatar_renditions'),
+        ('friendship', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='friend_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='friend count'),
+        ),
+        migrations.RunPython(backfill_friend_count, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,19 @@
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
-from PIL import Image
+
+from accounts.avatars import process_avatar
+
+DEFAULT_AVATAR = "avatar/default_avatar.png"
 
 
 def user_avatar_path(instance, filename):
@@ -35,6 +43,91 @@ class CustomUserManager(BaseUserManager):
             raise ValueError(_("Superuser must have is_superuser=True."))
         return self.create_user(email, password, **extra_fields)
 
+    def search(self, prefix):
+        """
+        Active users whose username starts with ``prefix``, ignoring case.
+        Matching lower(username) against the lowered prefix keeps the LIKE
+        anchored on the indexed expression, so it is answered from
+        user_username_lower_idx, unlike ILIKE on the column itself.
+        """
+        return self.annotate(username_lower=Lower("username")).filter(
+            username_lower__startswith=prefix.lower(),
+            is_active=True,
+        )
+
+    def bulk_provision(self, rows, batch_size=1000, workers=None, progress=None):
+        """
+        Create users and their profiles from an iterable of dicts holding
+        ``email``, ``username`` and ``password`` plus any extra user fields.
+
+        Passwords are hashed in a process pool and each batch is written with
+        one bulk INSERT per table inside a transaction. Signals are not sent,
+        which is why profiles are created here. A row is skipped when its
+        email or username, ignoring case, already exists or appeared earlier
+        in the input, so an interrupted import can be re-run. ``progress`` is
+        called after every batch with the number of users created and the
+        list of skipped rows, without their passwords.
+        """
+        created_total = skipped_total = 0
+        rows = iter(rows)
+        workers = workers or os.cpu_count() or 1
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+
+                for row in batch:
+                    row["email"] = self.normalize_email(row["email"])
+                taken = (
+                    self.annotate(email_lower=Lower("email"), username_lower=Lower("username"))
+                    .filter(
+                        Q(email_lower__in={row["email"].lower() for row in batch})
+                        | Q(username_lower__in={row["username"].lower() for row in batch})
+                    )
+                    .values_list("email_lower", "username_lower")
+                )
+                taken_emails, taken_usernames = set(), set()
+                for email, username in taken:
+                    taken_emails.add(email)
+                    taken_usernames.add(username)
+
+                new, skipped = [], []
+                for row in batch:
+                    email, username = row["email"].lower(), row["username"].lower()
+                    if email in taken_emails or username in taken_usernames:
+                        row.pop("password", None)
+                        skipped.append(row)
+                        continue
+                    taken_emails.add(email)
+                    taken_usernames.add(username)
+                    new.append(row)
+
+                chunksize = max(1, len(new) // (workers * 4))
+                hashed = executor.map(
+                    make_password,
+                    [row.pop("password") for row in new],
+                    chunksize=chunksize,
+                )
+                users = [
+                    self.model(password=password, **row)
+                    for row, password in zip(new, hashed)
+                ]
+
+                with transaction.atomic(using=self.db):
+                    self.bulk_create(users)
+                    Profile.objects.using(self.db).bulk_create(
+                        [Profile(user=user) for user in users]
+                    )
+
+                created_total += len(users)
+                skipped_total += len(skipped)
+                if progress is not None:
+                    progress(len(users), skipped)
+
+        return created_total, skipped_total
+
 
 class CustomUser(AbstractUser):
     id = models.UUIDField(_("id"), primary_key=True, default=uuid.uuid4, editable=False)
@@ -49,19 +142,38 @@ class CustomUser(AbstractUser):
         verbose_name = _("user")
         verbose_name_plural = _("user")
         ordering = ["-id"]
+        indexes = [
+            models.Index(Lower("username"), name="user_username_lower_idx"),
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_active = instance.__dict__.get("is_active")
+        return instance
+
+    def is_active_changed(self):
+        return getattr(self, "_loaded_is_active", None) != self.is_active
+
 
 class Profile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name="user_profile")
     avatar = models.ImageField(
         _("avatar"),
         upload_to=user_avatar_path,
-        default="avatar/default_avatar.png",
+        default=DEFAULT_AVATAR,
     )
+    avatar_renditions = models.JSONField(_("avatar renditions"), default=dict, blank=True)
     bio = models.TextField(_("bio"))
+    friend_count = models.PositiveIntegerField(_("friend count"), default=0)
+
+    # Written with queryset updates outside of save(), so a stale in-memory
+    # copy must never write them back.
+    maintained_fields = ("avatar_renditions", "friend_count")
 
     class Meta:
         verbose_name = _("profile")
@@ -71,12 +183,65 @@ class Profile(models.Model):
     def __str__(self):
         return self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def _tracked_values(self):
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__:
+                value = self.__dict__[field.attname]
+                values[field.attname] = getattr(value, "name", value)
+        return values
+
+    def is_dirty(self):
+        if self._state.adding:
+            return True
+        return self._tracked_values() != getattr(self, "_loaded_values", None)
+
+    def avatar_changed(self):
+        if not self.avatar._committed:
+            return True
+        loaded = getattr(self, "_loaded_values", {}).get("avatar")
+        return self.avatar.name != loaded and self.avatar.name != DEFAULT_AVATAR
+
+    def avatar_url(self, size=100):
+        """
+        URL of the smallest rendition at least ``size`` pixels wide, falling
+        back to the largest one, or the original until renditions exist.
+        """
+        renditions = sorted(
+            (int(key), rendition["name"])
+            for key, rendition in self.avatar_renditions.items()
+        )
+        if not renditions:
+            return self.avatar.url
+
+        name = next((n for s, n in renditions if s >= size), renditions[-1][1])
+        return self.avatar.storage.url(name)
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        avatar_changed = self.avatar_changed()
+        update_fields = kwargs.get("update_fields")
+
+        if update_fields is None and not self._state.adding:
+            update_fields = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.maintained_fields
+            ]
+        if avatar_changed:
+            self.avatar_renditions = {}
+            if update_fields is not None:
+                update_fields = {*update_fields, "avatar", "avatar_renditions"}
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
 
-        img = Image.open(self.avatar.path)
+        super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
 
-        if img.height > 100 or img.width > 100:
-            new_img = (100, 100)
-            img.thumbnail(new_img)
-            img.save(self.avatar.path)
+        if avatar_changed:
+            process_avatar(self)
@@ -1,11 +1,10 @@
-from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
-from rest_framework import serializers, status
+from rest_framework import serializers
 
+from accounts.exceptions import CredentialsError
+from accounts.services import verify_credentials
 from utils.validate import validate_username, validate_password
 
-User = get_user_model()
-
 
 class RegisterSerializer(serializers.Serializer):
     email = serializers.EmailField(
@@ -46,24 +45,8 @@ class RegisterSerializer(serializers.Serializer):
         password = attrs.get("password")
         confirm_password = attrs.get("confirm_password")
 
-        try:
-            user_email = User.objects.get(email=email)
-        except User.DoesNotExist:
-            user_email = None
-
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            user = None
-
-        if user_email:
-            raise serializers.ValidationError(
-                _("Email ID already belongs to an account.")
-            )
-        if user:
-            raise serializers.ValidationError(
-                _("User with given username already exists.")
-            )
+        # Taken emails and usernames are reported by register_user(), from
+        # the unique constraints.
         if not validate_username(username):
             raise serializers.ValidationError(_("Not a valid username."))
         if not password or not confirm_password:
@@ -105,21 +88,8 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get("password")
 
         try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            user = None
-
-        if not user:
-            raise serializers.ValidationError(
-                _("Account with email does not exists."),
-                code=status.HTTP_404_NOT_FOUND,
-            )
-        if not user.check_password(password):
-            raise serializers.ValidationError(
-                _("Password is incorrect."),
-                code=status.HTTP_401_UNAUTHORIZED,
-            )
-        if not user.is_active:
-            raise serializers.ValidationError(_("User is not active."))
+            attrs["user"] = verify_credentials(email, password, self.context.get("request"))
+        except CredentialsError as e:
+            raise serializers.ValidationError(e.message, code=e.code)
 
         return attrs
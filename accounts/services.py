@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+
+from accounts.exceptions import CredentialsError, RegistrationError
+
+User = get_user_model()
+
+
+def verify_credentials(email, password, request=None):
+    """
+    Shared by LoginForm and LoginSerializer: the user and its profile are
+    fetched in a single query and the password hasher runs exactly once.
+    Like authenticate(), a wrong email or password sends user_login_failed.
+    """
+    try:
+        user = User.objects.select_related("user_profile").get(email=email)
+    except User.DoesNotExist:
+        user_login_failed.send(__name__, credentials={"email": email}, request=request)
+        raise CredentialsError(
+            _("Account with email does not exists."),
+            code=status.HTTP_404_NOT_FOUND,
+        )
+
+    if not user.check_password(password):
+        user_login_failed.send(__name__, credentials={"email": email}, request=request)
+        raise CredentialsError(
+            _("Password is incorrect."),
+            code=status.HTTP_401_UNAUTHORIZED,
+        )
+    if not user.is_active:
+        raise CredentialsError(_("User is not active."))
+
+    return user
+
+
+def register_user(email, username, password, send_activation):
+    """
+    Shared by RegisterForm and RegisterSerializer: create an inactive user,
+    its profile and, through ``send_activation(user)``, its activation email
+    in one transaction with one INSERT per row. The password is hashed
+    before the transaction starts.
+
+    Taken emails and usernames are caught by the unique constraints instead
+    of being looked up first, which also closes the race between two
+    signups for the same name. They raise RegistrationError.
+    """
+    user = User(email=email, username=username, is_active=False)
+    user.set_password(password)
+
+    try:
+        with transaction.atomic():
+            user.save(force_insert=True)
+            send_activation(user)
+    except IntegrityError:
+        # Error messages differ between backends and may quote the values,
+        # so ask which one is taken. This only runs for failed signups.
+        if User.objects.filter(email__iexact=email).exists():
+            raise RegistrationError(_("Email ID already belongs to an account."), "email")
+        if User.objects.filter(username__iexact=username).exists():
+            raise RegistrationError(_("User with given username already exists."), "username")
+        raise
+
+    return user
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
+from accounts.authentication import get_token_cache
 from accounts.models import Profile
 
 User = get_user_model()
@@ -15,4 +18,33 @@ def create_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, **kwargs):
-    instance.user_profile.save()
+    if not User.user_profile.is_cached(instance):
+        return
+
+    profile = instance.user_profile
+    if profile.is_dirty():
+        profile.save()
+
+
+@receiver(post_save, sender=User)
+def evict_cached_tokens(sender, instance, created, **kwargs):
+    if not created and instance.is_active_changed():
+        token_cache = get_token_cache()
+        for key in Token.objects.filter(user=instance).values_list("key", flat=True):
+            token_cache.evict(key)
+
+    instance._loaded_is_active = instance.is_active
+
+
+# Tokens themselves have no delete receiver, which would cost every
+# logout a SELECT and a transaction; LogoutAPIView evicts its own.
+@receiver(pre_delete, sender=User)
+def evict_deleted_user_tokens(sender, instance, **kwargs):
+    keys = list(Token.objects.filter(user=instance).values_list("key", flat=True))
+
+    def evict():
+        token_cache = get_token_cache()
+        for key in keys:
+            token_cache.evict(key)
+
+    transaction.on_commit(evict)
@@ -1,3 +1,318 @@
-from django.test import TestCase
+import os
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from accounts.authentication import get_token_cache
+from accounts.avatars import render_renditions
+from accounts.models import Profile
+from mailer.models import QueuedEmail
+
+User = get_user_model()
+
+
+class RegistrationTests(TestCase):
+    def signup(self, email="alice@example.com", username="alice"):
+        return self.client.post(
+            "/api/accounts/signup/",
+            {
+                "email": email,
+                "username": username,
+                "password": "Passw0rd1",
+                "confirm_password": "Passw0rd1",
+            },
+            content_type="application/json",
+        )
+
+    def test_one_insert_per_row(self):
+        # User, profile and activation email, plus the savepoint pair that
+        # stands in for the transaction inside TestCase.
+        with self.assertNumQueries(5):
+            response = self.signup()
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email="alice@example.com")
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password("Passw0rd1"))
+        self.assertTrue(Profile.objects.filter(user=user).exists())
+        self.assertEqual(QueuedEmail.objects.get().to, ["alice@example.com"])
+
+    def test_taken_email_and_username(self):
+        self.signup()
+
+        response = self.signup(username="other")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Email ID already belongs to an account.")
+
+        response = self.signup(email="other@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "User with given username already exists.")
+
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(Profile.objects.count(), 1)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+    def test_taken_username_found_in_constraint_names(self):
+        # Names that occur inside "email" or "username" must not confuse
+        # the lookup of which field is taken.
+        for username in ("ame", "user", "mail"):
+            self.signup(email=f"{username}@example.com", username=username)
+            response = self.signup(email=f"{username}2@example.com", username=username)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                response.json()["message"], "User with given username already exists."
+            )
+
+
+class LoginTests(TestCase):
+    url = "/api/accounts/login/"
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        # An existing token keeps get_or_create to one SELECT.
+        Token.objects.create(user=self.user)
+
+    def login(self, email="alice@example.com", password="Passw0rd1"):
+        return self.client.post(
+            self.url, {"email": email, "password": password}, content_type="application/json"
+        )
+
+    def test_password_hashed_once(self):
+        with mock.patch.object(
+            User, "check_password", autospec=True, side_effect=User.check_password
+        ) as check_password:
+            self.assertEqual(self.login().status_code, 200)
+        check_password.assert_called_once_with(self.user, "Passw0rd1")
+
+    def test_queries(self):
+        # The user with its profile, then the token.
+        with self.assertNumQueries(2):
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["id"], str(self.user.pk))
+
+        with self.assertNumQueries(1):
+            response = self.login(password="wrong")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Password is incorrect.")
+
+        with self.assertNumQueries(1):
+            response = self.login(email="bob@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Account with email does not exists.")
+
+    def test_failures_send_user_login_failed(self):
+        handler = mock.Mock()
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+        self.login(password="wrong")
+        self.client.post("/login/", {"email": "bob@example.com", "password": "Passw0rd1"})
+        self.login()
+
+        self.assertEqual(
+            [call.kwargs["credentials"] for call in handler.call_args_list],
+            [{"email": "alice@example.com"}, {"email": "bob@example.com"}],
+        )
+        self.assertTrue(all(call.kwargs["request"] for call in handler.call_args_list))
+
+
+class BulkProvisionTests(TestCase):
+    def row(self, email, username):
+        return {"email": email, "username": username, "password": "Passw0rd1"}
+
+    def test_skips_taken_and_repeated_rows(self):
+        User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        rows = [
+            self.row("bob@example.com", "bob"),
+            self.row("Alice@example.com", "alice2"),  # Taken email, other case.
+            self.row("carol@example.com", "ALICE"),  # Taken username, other case.
+            self.row("BOB@example.com", "bob2"),  # Repeats an email of this batch.
+            self.row("dave@example.com", "Bob"),  # Repeats a username of this batch.
+            self.row("erin@example.com", "erin"),
+        ]
+        reported = []
+
+        created, skipped = User.objects.bulk_provision(
+            rows, batch_size=4, workers=1, progress=lambda *args: reported.append(args)
+        )
+
+        self.assertEqual((created, skipped), (2, 4))
+        self.assertEqual(
+            sorted(User.objects.values_list("username", flat=True)), ["alice", "bob", "erin"]
+        )
+        self.assertEqual(Profile.objects.count(), 3)
+        self.assertTrue(User.objects.get(username="erin").check_password("Passw0rd1"))
+        self.assertEqual(
+            [(count, [row["username"] for row in rows]) for count, rows in reported],
+            [(1, ["alice2", "ALICE", "bob2"]), (1, ["Bob"])],
+        )
+        self.assertTrue(all("password" not in row for _count, rows in reported for row in rows))
+
+
+class ImportUsersCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.csv")
+        with open(self.path, "w", newline="") as f:
+            f.write("email,username,password\n")
+            for i in range(5):
+                f.write(f"user{i}@example.com,user{i},Passw0rd1\n")
+
+    def import_users(self, *args):
+        out = StringIO()
+        call_command("import_users", self.path, "--workers=1", "--batch-size=2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_and_rerun(self):
+        output = self.import_users("--inactive")
+        self.assertIn("Imported 5 user(s), skipped 0", output)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 5)
+        self.assertEqual(Profile.objects.count(), 5)
+
+        output = self.import_users("--verbosity=2")
+        self.assertIn("Imported 0 user(s), skipped 5", output)
+        self.assertIn("Skipped user3@example.com (user3): email or username taken.", output)
+        self.assertEqual(User.objects.count(), 5)
+
+
+class TokenCacheTests(TestCase):
+    url = "/api/friendship/friend-list/"
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.addCleanup(get_token_cache().clear)
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.token = Token.objects.create(user=self.user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Token {self.token.key}"
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_hit_skips_the_token_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse([query for query in queries if "authtoken_token" in query["sql"]])
+
+    def test_logout_evicts(self):
+        # One DELETE: the token comes from the cache and has no receivers.
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            self.assertEqual(self.client.post("/api/accounts/logout/").status_code, 202)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_session_logout_evicts(self):
+        session = self.client_class()
+        session.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(session.post("/api/accounts/logout/").status_code, 202)
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivation_evicts(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deleting_the_user_evicts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+def make_image(color="red", size=(400, 300)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return SimpleUploadedFile("avatar.png", buffer.getvalue(), content_type="image/png")
+
+
+class AvatarTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        media = override_settings(
+            MEDIA_ROOT=directory.name,
+            AVATAR_PROCESSING={"SIZES": (100, 40), "ASYNC": True},
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.profile = Profile.objects.get(user=self.user)
+
+    def fake_executor(self):
+        """An executor whose submitted jobs wait for the test to finish them."""
+        jobs = []
+
+        def submit(func, *args):
+            future = Future()
+            jobs.append((future, func, args))
+            return future
+
+        return mock.Mock(submit=mock.Mock(side_effect=submit)), jobs
+
+    def test_only_processed_when_the_file_changes(self):
+        with mock.patch("accounts.models.process_avatar") as process:
+            self.profile.bio = "Hello"
+            self.profile.save()
+            process.assert_not_called()
+
+            self.profile.avatar = make_image()
+            self.profile.save()
+            self.assertEqual(process.call_count, 1)
+
+            self.profile.save()
+            profile = Profile.objects.get(id=self.profile.id)
+            profile.bio = "Hello again"
+            profile.save()
+            self.assertEqual(process.call_count, 1)
+
+    def test_renditions_are_rendered_off_the_request(self):
+        executor, jobs = self.fake_executor()
+        with mock.patch("accounts.avatars.get_executor", return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.profile.avatar = make_image()
+                self.profile.save()
+                # Nothing goes to the pool before the save commits.
+                executor.submit.assert_not_called()
+
+        # The save has returned, and no rendition exists until the pool is done.
+        self.assertEqual(Profile.objects.get(id=self.profile.id).avatar_renditions, {})
+        [(future, func, args)] = jobs
+        self.assertIs(func, render_renditions)
+
+        future.set_result(render_renditions(*args))
+        renditions = Profile.objects.get(id=self.profile.id).avatar_renditions
+        self.assertEqual(sorted(renditions), ["100", "40"])
+        self.assertEqual((renditions["100"]["width"], renditions["100"]["height"]), (100, 75))
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, renditions["40"]["name"])))
+        self.assertEqual(
+            Profile.objects.get(id=self.profile.id).avatar_url(60),
+            "/media/" + renditions["100"]["name"],
+        )
+
+    def test_result_for_a_replaced_avatar_is_dropped(self):
+        executor, jobs = self.fake_executor()
+        with mock.patch("accounts.avatars.get_executor", return_value=executor):
+            for color in ("red", "blue"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.profile.avatar = make_image(color)
+                    self.profile.save()
+
+        (first, _func, first_args), (second, _func, second_args) = jobs
+        latest = render_renditions(*second_args)
+        second.set_result(latest)
+        # The first upload finishes last, and must not overwrite the second.
+        first.set_result(render_renditions(*first_args))
+
+        self.assertEqual(Profile.objects.get(id=self.profile.id).avatar_renditions, latest)
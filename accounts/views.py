@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.views import PasswordResetView, PasswordChangeView, LoginView
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail, EmailMessage
+from django.db import transaction
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
@@ -17,10 +17,20 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.forms import LoginForm, RegisterForm, UpdateUserForm, UpdateProfileForm
+from accounts.authentication import get_token_cache
+from accounts.exceptions import RegistrationError
+from accounts.forms import (
+    LoginForm,
+    RegisterForm,
+    UpdateUserForm,
+    UpdateProfileForm,
+    QueuedPasswordResetForm,
+)
 from accounts.serializers import RegisterSerializer, LoginSerializer
+from accounts.services import register_user
 from accounts.tokens import generate_token
 from backbone import settings
+from mailer.dispatch import enqueue_mail
 from utils.handle_error_message import get_first_error
 
 User = get_user_model()
@@ -30,36 +40,23 @@ class RegisterViewMixin:
     def create_and_send_activation_email(
         self, email, username, password, protocol, domain
     ):
-        user = User.objects.create(
-            email=email,
-            username=username,
-        )
-        user.set_password(password)
-        user.is_active = False
-        user.save()
-
-        # Email Address Confirmation Email
-        subject = "[Backbone] Confirm your Email"
-        message = render_to_string(
-            "activate_email.html",
-            {
-                "protocol": protocol,
-                "domain": domain,
-                "uid": urlsafe_base64_encode(force_bytes(user.id)),
-                "token": generate_token.make_token(user),
-            },
-        )
-        email = EmailMessage(
-            subject,
-            message,
-            settings.EMAIL_HOST_USER,
-            [user.email],
-        )
-        from_email = settings.EMAIL_HOST_USER
-        to_list = [user.email]
-        send_mail(subject, message, from_email, to_list, fail_silently=True)
+        """Raises RegistrationError if the email or username is taken."""
+
+        def send_activation(user):
+            # Email Address Confirmation Email
+            subject = "[Backbone] Confirm your Email"
+            message = render_to_string(
+                "activate_email.html",
+                {
+                    "protocol": protocol,
+                    "domain": domain,
+                    "uid": urlsafe_base64_encode(force_bytes(user.id)),
+                    "token": generate_token.make_token(user),
+                },
+            )
+            enqueue_mail(subject, message, settings.EMAIL_HOST_USER, [user.email])
 
-        return user
+        return register_user(email, username, password, send_activation)
 
 
 class ExceptionHandlerMixin:
@@ -83,13 +80,20 @@ class RegisterAPIView(RegisterViewMixin, APIView):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
-            self.create_and_send_activation_email(
-                serializer.validated_data.get("email"),
-                serializer.validated_data.get("username"),
-                serializer.validated_data.get("password"),
-                request.scheme,
-                get_current_site(request).domain,
-            )
+            try:
+                self.create_and_send_activation_email(
+                    serializer.validated_data.get("email"),
+                    serializer.validated_data.get("username"),
+                    serializer.validated_data.get("password"),
+                    request.scheme,
+                    get_current_site(request).domain,
+                )
+            except RegistrationError as e:
+                response_content = {
+                    "status": False,
+                    "message": e.message,
+                }
+                return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
 
             response_content = {
                 "status": True,
@@ -112,18 +116,17 @@ class LoginAPIView(APIView):
     serializer_class = LoginSerializer
 
     def post(self, request):
-        serializer = self.serializer_class(data=request.data)
+        serializer = self.serializer_class(data=request.data, context={"request": request})
 
         if serializer.is_valid():
-            email = serializer.validated_data.get("email")
-            user = User.objects.get(email=email)
+            user = serializer.validated_data.get("user")
             token, created = Token.objects.get_or_create(user=user)
             content = {
                 "token": token.key,
                 "id": user.id,
                 "email": user.email,
                 "username": user.username,
-                "avatar": request.build_absolute_uri(user.user_profile.avatar.url),
+                "avatar": request.build_absolute_uri(user.user_profile.avatar_url()),
             }
 
             response_content = {
@@ -144,9 +147,16 @@ class LogoutAPIView(APIView, ExceptionHandlerMixin):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request):
-        user = request.user
-        token = Token.objects.get(user=user)
-        token.delete()
+        # Deleting the one instance is a single DELETE; a queryset delete
+        # adds a transaction around it.
+        if isinstance(request.auth, Token):
+            token = request.auth
+        else:
+            token = Token.objects.filter(user=request.user).first()
+        if token is not None:
+            key = token.key
+            token.delete()
+            transaction.on_commit(lambda: get_token_cache().evict(key))
 
         response_content = {
             "status": True,
@@ -179,13 +189,17 @@ class RegisterView(RegisterViewMixin, View):
         form = self.form_class(request.POST)
 
         if form.is_valid():
-            self.create_and_send_activation_email(
-                form.cleaned_data.get("email"),
-                form.cleaned_data.get("username"),
-                form.cleaned_data.get("password1"),
-                request.scheme,
-                get_current_site(request).domain,
-            )
+            try:
+                self.create_and_send_activation_email(
+                    form.cleaned_data.get("email"),
+                    form.cleaned_data.get("username"),
+                    form.cleaned_data.get("password1"),
+                    request.scheme,
+                    get_current_site(request).domain,
+                )
+            except RegistrationError as e:
+                form.add_error(None, e.message)
+                return render(request, self.template_name, {"form": form})
 
             messages.success(
                 request,
@@ -233,6 +247,7 @@ class CustomLoginView(LoginView):
 
 
 class ResetPasswordView(SuccessMessageMixin, PasswordResetView):
+    form_class = QueuedPasswordResetForm
     template_name = "password_reset.html"
     from_email = settings.EMAIL_HOST_USER
     email_template_name = "password_reset_email.html"
@@ -9,8 +9,52 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
+from utils.db import fill_pools
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backbone.settings")
+# Connections kept per thread are not reused under ASGI, see utils.db, so
+# pool them unless DB_POOL_SIZE says otherwise.
+os.environ.setdefault("DB_POOL_SIZE", "8")
+
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready.
+from chat.consumers import chat_websocket  # noqa: E402
+
+websocket_routes = {
+    "/ws/chat/": chat_websocket,
+}
+
+
+async def lifespan(scope, receive, send):
+    """
+    Fill the connection pools at startup. Servers send this once the worker
+    process runs, so no connection is shared across a fork. DB_WARM_UP=0
+    turns it off.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if os.environ.get("DB_WARM_UP", "1") == "1":
+                await sync_to_async(fill_pools, thread_sensitive=False)()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
 
-application = get_asgi_application()
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(scope, receive, send)
+    elif scope["type"] == "websocket":
+        handler = websocket_routes.get(scope["path"])
+        if handler is None:
+            await receive()
+            await send({"type": "websocket.close"})
+            return
+        await handler(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
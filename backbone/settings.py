@@ -46,9 +46,14 @@ INSTALLED_APPS = [
     "chat",
     "note",
     "todo",
+    "mailer",
+    "sync",
 ]
 
 MIDDLEWARE = [
+    # Removes itself unless PROFILING["ENABLED"] is on.
+    "utils.profiling.ProfilingMiddleware",
+    "utils.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -78,23 +83,51 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "backbone.wsgi.application"
+ASGI_APPLICATION = "backbone.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are reused for DB_CONN_MAX_AGE seconds (0 opens one per
+# request) and pinged before reuse. Under ASGI they are pooled as well,
+# DB_POOL_SIZE per process, 8 unless set: see utils.db for why per-thread
+# reuse does not work there.
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "utils.db.mysql",
         "NAME": os.environ["DBNAME"],
         "USER": os.environ["DBUSER"],
         "PASSWORD": os.environ["DBPASSWORD"],
         "HOST": os.environ["DBHOST"],
         "PORT": os.environ["DBPORT"],
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        "POOL_SIZE": int(os.environ.get("DB_POOL_SIZE", 0)),
     }
 }
 
 
+# Cache
+# Shared by every worker when REDIS_URL is set. The friendship graph cache
+# needs that to invalidate across processes; without it each process keeps
+# graphs for a few seconds only.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -136,6 +169,18 @@ STATIC_URL = "/static/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
+# Uploads always stream to a temporary file, which storage then moves into
+# place instead of copying it through memory.
+FILE_UPLOAD_HANDLERS = [
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+AVATAR_PROCESSING = {
+    "SIZES": (200, 100, 40),
+    "WORKERS": 2,
+    "ASYNC": True,
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -156,6 +201,15 @@ EMAIL_HOST_PASSWORD = os.environ["EMPASSWORD"]
 EMAIL_PORT = os.environ["EMPORT"]
 EMAIL_USE_TLS = True
 
+MAILER = {
+    "DISPATCHER": os.environ.get("MAILER_DISPATCHER", "mailer.dispatch.ThreadPoolDispatcher"),
+    "BATCH_SIZE": 50,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 60,
+    "LEASE_SECONDS": 300,
+    "THREAD_POOL_WORKERS": 1,
+}
+
 
 # CORS
 
@@ -170,9 +224,100 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
+    # orjson-backed when it is installed, see utils.renderers.
+    "DEFAULT_RENDERER_CLASSES": [
+        "utils.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "utils.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+# Other workers keep a revoked token working for up to TTL seconds, see
+# accounts.authentication.TokenCache.
+TOKEN_AUTH_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 60,
+    "CACHE_ALIAS": os.environ.get("TOKEN_AUTH_CACHE_ALIAS"),
+}
+
+
+# Friendship
+
+FRIENDSHIP_GRAPH_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 3600,
+    # Used instead of TIMEOUT while the cache is local to each process.
+    "LOCAL_TIMEOUT": 5,
+}
+
+
+# Chat
+
+CHAT = {
+    "PUBSUB_BACKEND": "chat.pubsub.LocalBackend",
+    "QUEUE_SIZE": 100,
+    "WRITE_BUFFER": {
+        "MAX_SIZE": 100,
+        "MAX_DELAY": 0.05,
+        "MAX_ATTEMPTS": 5,
+        "RETRY_DELAY": 1,
+    },
+    "PRESENCE": {
+        "BACKEND": "chat.presence.LocalPresence",
+        "TIMEOUT": 60,
+        "TYPING_INTERVAL": 3,
+    },
+}
+
+
+# Note search
+
+NOTE_SEARCH = {
+    # None picks MySQL FULLTEXT on MySQL and the built-in inverted index elsewhere.
+    "BACKEND": None,
+    "MAX_RESULTS": 50,
+}
+
+NOTE_REVISIONS = {
+    "SNAPSHOT_INTERVAL": 50,
+    "SNAPSHOT_RATIO": 0.5,
+}
+
+# Todo reminders are sent by the ``send_reminders`` worker command.
+TODO_REMINDERS = {
+    "BATCH_SIZE": 200,
+}
+
+
+# Request profiling, see utils.profiling. SAMPLE_RATE is the fraction of
+# requests run under cProfile.
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED") == "1",
+    "SAMPLE_RATE": float(os.environ.get("PROFILING_SAMPLE_RATE", 0)),
+    "DIRECTORY": os.path.join(BASE_DIR, "profiles"),
+    "MAX_FILES": 200,
+    "SERVER_TIMING": True,
+    "SLOW_MS": 500,
+}
+
+# Prometheus metrics served at /metrics, see utils.metrics. Point
+# MULTIPROCESS_DIR at an empty directory when running several workers.
+# Behind a reverse proxy every request looks local, so set
+# METRICS_BEARER_TOKEN and have the scraper send it.
+METRICS = {
+    "ENABLED": os.environ.get("METRICS_ENABLED", "1") == "1",
+    "PATH_PREFIX": "/api/",
+    "MULTIPROCESS_DIR": os.environ.get("METRICS_MULTIPROCESS_DIR"),
+    "FLUSH_INTERVAL": 1,
+    "ALLOWED_IPS": ("127.0.0.1", "::1"),
+    "BEARER_TOKEN": os.environ.get("METRICS_BEARER_TOKEN"),
 }
 
 
@@ -14,10 +14,17 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import os
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
+
+from accounts.avatars import RENDITIONS_DIR
+from utils.metrics import metrics_view
 
 api = [
     path("accounts/", include("accounts.urls.api_urls"), name="api-accounts"),
@@ -30,8 +37,17 @@ api = [
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(api)),
+    path("metrics", metrics_view, name="metrics"),
     path("", include("accounts.urls.view_urls"), name="accounts"),
 ]
 
 if settings.DEBUG:
+    # Renditions are content-hashed, so they never change under the same URL.
+    urlpatterns += [
+        re_path(
+            r"^%s%s/(?P<path>.*)$" % (settings.MEDIA_URL.lstrip("/"), RENDITIONS_DIR),
+            cache_control(max_age=31536000, public=True, immutable=True)(serve),
+            {"document_root": os.path.join(settings.MEDIA_ROOT, RENDITIONS_DIR)},
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backbone.settings")
 
 application = get_wsgi_application()
+
+# Connect before the first request with DB_WARM_UP=1. Leave it off when the
+# server loads the application before forking workers (gunicorn --preload)
+# and call utils.db.warm_up() in each worker instead, from a post_fork hook,
+# so no connection is shared across processes.
+if os.environ.get("DB_WARM_UP", "0") == "1":
+    from utils.db import warm_up
+
+    warm_up()
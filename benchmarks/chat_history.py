@@ -0,0 +1,128 @@
+"""
+Bulk-load chat messages into SQLite and measure history page latency.
+
+    BENCH_DB=/tmp/chat.sqlite3 python -m benchmarks.chat_history --messages 10000000
+
+Without BENCH_DB the database lives in memory, which only suits small runs.
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks.utils import setup, test_database
+
+
+def load(conversations, messages, batch_size):
+    from django.db import connection
+    from django.utils import timezone
+
+    from accounts.models import CustomUser
+    from chat.models import Conversation, Message, Participant
+
+    users = [
+        CustomUser(email=f"chat{i}@example.com", username=f"chat{i}", password="!")
+        for i in range(min(conversations * 2, 1000))
+    ]
+    CustomUser.objects.bulk_create(users)
+
+    Conversation.objects.bulk_create([Conversation() for _ in range(conversations)])
+    conversation_ids = list(Conversation.objects.values_list("id", flat=True))
+    members = {}
+    participants = []
+    for conversation_id in conversation_ids:
+        pair = random.sample(users, 2)
+        members[conversation_id] = [user.pk.hex for user in pair]
+        participants += [Participant(conversation_id=conversation_id, user=user) for user in pair]
+    Participant.objects.bulk_create(participants)
+
+    table = Message._meta.db_table
+    sql = (
+        f'INSERT INTO "{table}" ("id", "conversation_id", "sender_id", "content", "created")'
+        " VALUES (%s, %s, %s, %s, %s)"
+    )
+    start_time = timezone.now() - timedelta(milliseconds=messages)
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+
+    started = time.perf_counter()
+    for offset in range(0, messages, batch_size):
+        rows = []
+        for i in range(offset, min(offset + batch_size, messages)):
+            conversation_id = random.choice(conversation_ids)
+            rows.append((
+                uuid.uuid4().hex,
+                conversation_id,
+                random.choice(members[conversation_id]),
+                "benchmark message",
+                (start_time + timedelta(milliseconds=i)).isoformat(sep=" "),
+            ))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+    elapsed = time.perf_counter() - started
+
+    print(f"Inserted {messages} messages in {elapsed:.1f}s ({messages / elapsed:.0f}/s)")
+    return conversation_ids
+
+
+def fetch_latency(conversation_ids, samples, page_size):
+    from chat.models import Message
+    from utils.pagination import encode_cursor, keyset_page
+
+    latest, older = [], []
+    for _ in range(samples):
+        qs = Message.objects.filter(conversation_id=random.choice(conversation_ids))
+
+        started = time.perf_counter()
+        page, next_cursor = keyset_page(qs, ("created", "id"), limit=page_size)
+        latest.append(time.perf_counter() - started)
+
+        # Jump somewhere deep into the history and load the page before it.
+        anchor = qs.order_by("created").values("created", "id")[:1].first()
+        if anchor is None:
+            continue
+        middle = qs.filter(created__gte=anchor["created"]).order_by("created", "id")
+        anchor = middle.values("created", "id")[:1].first()
+        cursor = encode_cursor([anchor["created"], anchor["id"]])
+
+        started = time.perf_counter()
+        keyset_page(qs, ("created", "id"), cursor=cursor, limit=page_size)
+        older.append(time.perf_counter() - started)
+
+    return latest, older
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(
+        f"{name:<14}"
+        f"p50 {statistics.median(timings) * 1e3:7.2f} ms"
+        f"   p99 {p99 * 1e3:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        conversation_ids = load(args.conversations, args.messages, args.batch_size)
+        latest, older = fetch_latency(conversation_ids, args.samples, args.page_size)
+        report("latest page", latest)
+        report("older page", older)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Connections opened and request latency under WSGI and ASGI, with
+connections opened per request, kept per thread, or pooled.
+
+    python -m benchmarks.connections [--requests N] [--concurrency N] [--connect-ms MS]
+
+Requests go through Django's own WSGI and ASGI handlers rather than the test
+client, which keeps connections open regardless of the settings. The
+database is a SQLite file. A SQLite connection is cheap to open, so
+--connect-ms adds a delay to every new connection to stand in for the TCP
+and authentication handshake of a MySQL server.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.utils import setup, test_database
+
+PATH = "/api/todo/lists/"
+
+MODES = [
+    ("wsgi", {"CONN_MAX_AGE": 0, "POOL_SIZE": 0}),
+    ("wsgi", {"CONN_MAX_AGE": 60, "POOL_SIZE": 0}),
+    ("asgi", {"CONN_MAX_AGE": 0, "POOL_SIZE": 0}),
+    ("asgi", {"CONN_MAX_AGE": 60, "POOL_SIZE": 0}),
+    ("asgi", {"CONN_MAX_AGE": 60, "POOL_SIZE": 8}),
+]
+
+
+def count_connects(delay):
+    """Count new connections, each delayed by ``delay`` seconds."""
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    opened = [0]
+    get_new_connection = DatabaseWrapper.get_new_connection
+
+    def counted(self, conn_params):
+        opened[0] += 1
+        time.sleep(delay)
+        return get_new_connection(self, conn_params)
+
+    DatabaseWrapper.get_new_connection = counted
+    return opened
+
+
+def run_wsgi(token, requests):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+
+    handler = WSGIHandler()
+    factory = RequestFactory(HTTP_AUTHORIZATION=f"Token {token}")
+    timings = []
+    for _ in range(requests):
+        environ = factory.get(PATH).environ
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: None)
+        assert response.status_code == 200, response.status_code
+        b"".join(response)
+        response.close()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run_asgi(token, requests, concurrency):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": PATH,
+        "query_string": b"",
+        "headers": [(b"authorization", f"Token {token}".encode())],
+    }
+    timings = []
+
+    async def one():
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await handler(dict(scope), receive, send)
+        timings.append(time.perf_counter() - started)
+        assert messages[0]["status"] == 200, messages[0]["status"]
+
+    for _ in range(requests // concurrency):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent ASGI requests.")
+    parser.add_argument("--connect-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    # Connections to an in-memory database are never closed, so use a file.
+    os.environ.setdefault("BENCH_DB", os.path.join(directory.name, "connections.sqlite3"))
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from rest_framework.authtoken.models import Token
+
+    from utils.db import get_pool
+
+    with directory, test_database():
+        user = get_user_model().objects.create_user(
+            "connections@example.com", "Passw0rd1", username="connections"
+        )
+        token = Token.objects.create(user=user).key
+        connections["default"].close()
+
+        settings_dict = connections.settings["default"]
+        settings_dict["ENGINE"] = "utils.db.sqlite3"
+        opened = count_connects(args.connect_ms / 1e3)
+
+        print(f"{args.requests} requests, {args.connect_ms} ms per new connection")
+        print(f"{'':<6}{'CONN_MAX_AGE':>13}{'POOL_SIZE':>10}{'opened':>8}{'median':>11}{'total':>10}")
+        for handler, values in MODES:
+            settings_dict.update(values)
+            opened[0] = 0
+            started = time.perf_counter()
+            if handler == "wsgi":
+                timings = run_wsgi(token, args.requests)
+            else:
+                timings = asyncio.run(run_asgi(token, args.requests, args.concurrency))
+            total = time.perf_counter() - started
+            print(
+                f"{handler:<6}{values['CONN_MAX_AGE']:>13}{values['POOL_SIZE']:>10}{opened[0]:>8}"
+                f"{statistics.median(timings) * 1e3:>8.2f} ms{total:>8.2f} s"
+            )
+            connections.close_all()
+            if values["POOL_SIZE"]:
+                get_pool("default", values["POOL_SIZE"], values["CONN_MAX_AGE"]).clear()
+
+
+if __name__ == "__main__":
+    main()
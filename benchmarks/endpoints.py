@@ -0,0 +1,507 @@
+"""
+Query count, latency and peak memory of every route, checked against a
+recorded baseline.
+
+    python -m benchmarks.endpoints                    # compare with the baseline
+    python -m benchmarks.endpoints --update-baseline  # record a new baseline
+    BENCH_DB=/tmp/endpoints.sqlite3 python -m benchmarks.endpoints --users 200000
+
+Users with profiles, friendships, pending friend requests, conversations,
+notes and todos are seeded into SQLite, then every scenario is requested
+through the test client. A scenario regresses when it runs more queries
+than its baseline, or gets slower or uses more memory by more than the
+thresholds. Query counts do not depend on the dataset size, so any growth
+means an N+1 or a new round trip. Time and memory depend on the machine, so
+compare against a baseline recorded on the same one.
+
+Exits with status 1 on any regression, failed request or route that no
+scenario covers.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+
+from benchmarks.utils import setup, test_database
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "endpoints.json")
+TRACED_RUNS = 3
+
+PASSWORD = "Benchmark-Passw0rd"
+
+# Routes without a scenario on purpose.
+UNCOVERED = ("admin/",)
+
+
+def seed(users, friends, requests, batch_size=5000):
+    """
+    Bulk-load the dataset and return the ids the scenarios need. User 0 is
+    the one making the requests; everybody else is noise around it.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from django.utils import timezone
+
+    from accounts.models import CustomUser, Profile
+    from chat.models import Conversation, Message, Participant
+    from friendship.models import Friend, FriendshipRequest
+    from note.models import Note
+    from note.search import get_search_backend
+    from sync.services import allocate
+    from todo.models import TodoItem, TodoList, TodoReminder
+    from todo.ordering import spaced_keys
+
+    random.seed(0)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        for offset in range(0, users, batch_size):
+            batch = [
+                CustomUser(email=f"user{i}@example.com", username=f"user{i}", password=password)
+                for i in range(offset, min(offset + batch_size, users))
+            ]
+            CustomUser.objects.bulk_create(batch)
+            Profile.objects.bulk_create([Profile(user=user) for user in batch])
+        user_ids = {
+            int(username[4:]): pk
+            for pk, username in CustomUser.objects.values_list("id", "username")
+        }
+        me = user_ids[0]
+
+        # The requesting user has ``friends`` friends; everybody else about
+        # ten, drawn at random.
+        pairs = {(0, i) for i in range(1, min(friends, users - 1) + 1)}
+        while len(pairs) < friends + (users - 1) * 5:
+            a, b = random.sample(range(1, users), 2)
+            pairs.add((min(a, b), max(a, b)))
+        edges = [
+            Friend(from_user_id=user_ids[a], to_user_id=user_ids[b], created=now - timedelta(seconds=n))
+            for n, (x, y) in enumerate(pairs)
+            for a, b in ((x, y), (y, x))
+        ]
+        Friend.objects.bulk_create(edges, batch_size=batch_size)
+        counts = {}
+        for edge in edges:
+            counts[edge.to_user_id] = counts.get(edge.to_user_id, 0) + 1
+        profiles = list(Profile.objects.only("id", "user_id"))
+        for profile in profiles:
+            profile.friend_count = counts.get(profile.user_id, 0)
+        Profile.objects.bulk_update(profiles, ["friend_count"], batch_size=batch_size)
+
+        strangers = range(friends + 1, users)
+        FriendshipRequest.objects.bulk_create([
+            FriendshipRequest(from_user_id=user_ids[i], to_user_id=me)
+            for i in random.sample(strangers, min(requests, len(strangers)))
+        ])
+
+        conversations = []
+        for i in range(1, min(friends, 20) + 1):
+            conversation = Conversation.objects.create()
+            Participant.objects.bulk_create([
+                Participant(conversation=conversation, user_id=me),
+                Participant(conversation=conversation, user_id=user_ids[i]),
+            ])
+            Message.objects.bulk_create([
+                Message(
+                    conversation=conversation,
+                    sender_id=(me, user_ids[i])[n % 2],
+                    content=f"message {n}",
+                    created=now - timedelta(minutes=n),
+                )
+                for n in range(200)
+            ])
+            conversations.append(conversation.id)
+
+        seq = allocate(me, 200)
+        notes = Note.objects.bulk_create([
+            Note(owner_id=me, title=f"note {n}", content=f"alpha beta gamma {n} " * 20, seq=seq + n)
+            for n in range(200)
+        ])
+        get_search_backend().index_many(Note.objects.filter(owner_id=me))
+
+        todo_list = TodoList.objects.create(owner_id=me, title="benchmark")
+        seq = allocate(me, 300)
+        TodoItem.objects.bulk_create([
+            TodoItem(todo_list=todo_list, owner_id=me, title=f"item {n}", position=key, seq=seq + n)
+            for n, key in enumerate(spaced_keys(300))
+        ])
+        item = TodoItem.objects.filter(todo_list=todo_list).order_by("position").first()
+        TodoReminder.objects.create(
+            item=item, owner_id=me, remind_at=now + timedelta(days=1),
+            next_fire_at=now + timedelta(days=1),
+        )
+
+    print(
+        f"Seeded {users} users, {len(edges)} friend rows and {requests} requests"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+    return {
+        "me": me,
+        "friend": user_ids[1],
+        "conversation": conversations[0],
+        "note": notes[0].id,
+        "todo_list": todo_list.id,
+        "item": item.id,
+    }
+
+
+class Scenario:
+    """
+    One request. ``path`` and ``data`` may be callables taking the context
+    and the iteration number; ``status`` may be a tuple of accepted codes. ``prepare(context, i)`` runs unmeasured before
+    every request, to reset whatever the previous one changed.
+    """
+
+    def __init__(self, name, method, path, data=None, client="api", status=200, prepare=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.client = client
+        self.status = status
+        self.prepare = prepare
+
+    def request(self, clients, context, i):
+        path = self.path(context, i) if callable(self.path) else self.path.format(**context)
+        data = self.data(context, i) if callable(self.data) else self.data
+        kwargs = {}
+        if path.startswith("/api/") and self.method != "get":
+            data, kwargs = json.dumps(data or {}), {"content_type": "application/json"}
+        client = clients[self.client]
+        if self.client == "anon":
+            # Forget the session a previous login or signup left behind.
+            client.cookies.clear()
+        response = getattr(client, self.method)(path, data, **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return path, response
+
+
+def signup_data(context, i):
+    n = next(context["counter"])
+    return {
+        "email": f"signup{n}@example.com",
+        "username": f"signup{n}",
+        "password": PASSWORD,
+        "confirm_password": PASSWORD,
+    }
+
+
+def create_token(context, i):
+    from rest_framework.authtoken.models import Token
+
+    Token.objects.get_or_create(user_id=context["friend"], defaults={"key": context["friend_token"]})
+
+
+def deactivate(context, i):
+    from django.contrib.auth import get_user_model
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+
+    from accounts.tokens import generate_token
+
+    user = get_user_model().objects.get(pk=context["friend"])
+    user.is_active = False
+    user.save(update_fields=["is_active"])
+    context["uid"] = urlsafe_base64_encode(force_bytes(user.pk))
+    context["token"] = generate_token.make_token(user)
+
+
+def reset_token(context, i):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.tokens import default_token_generator
+    from django.utils.encoding import force_bytes
+    from django.utils.http import urlsafe_base64_encode
+
+    user = get_user_model().objects.get(pk=context["friend"])
+    context["uid"] = urlsafe_base64_encode(force_bytes(user.pk))
+    context["token"] = default_token_generator.make_token(user)
+
+
+def new_note(context, i):
+    from note.models import Note
+
+    context["scratch_note"] = Note.objects.create(owner_id=context["me"], title="scratch").id
+
+
+def new_item(context, i):
+    from django.contrib.auth import get_user_model
+
+    from todo.services import apply_operations
+
+    user = get_user_model().objects.get(pk=context["me"])
+    [result] = apply_operations(user, [{"op": "create", "list": context["todo_list"], "title": "scratch"}])
+    context["scratch_item"] = result["item"]["id"]
+
+
+def new_reminder(context, i):
+    from django.utils import timezone
+
+    from todo.models import TodoReminder
+
+    context["scratch_reminder"] = TodoReminder.objects.create(
+        item_id=context["item"], owner_id=context["me"], remind_at=timezone.now(),
+    ).id
+
+
+def scenarios():
+    note_update = {"title": "note 0", "content": "alpha beta delta " * 20}
+    return [
+        # Accounts API
+        Scenario("api signup", "post", "/api/accounts/signup/", signup_data, client="anon", status=201),
+        Scenario("api login", "post", "/api/accounts/login/",
+                 {"email": "user0@example.com", "password": PASSWORD}, client="anon"),
+        Scenario("api logout", "post", "/api/accounts/logout/", client="friend", status=202,
+                 prepare=create_token),
+        # Friendship
+        Scenario("friend list", "get", "/api/friendship/friend-list/"),
+        Scenario("friend list stream", "get", "/api/friendship/friend-list/?stream=1"),
+        Scenario("search user", "get", "/api/friendship/search-user/user1"),
+        Scenario("send friend request", "post", "/api/friendship/send-friend-request/", status=405),
+        Scenario("cancel friend request", "post", "/api/friendship/cancel-friend-request/", status=405),
+        Scenario("friend request list", "get", "/api/friendship/friend-request-list/", status=405),
+        Scenario("friend request action", "post", "/api/friendship/friend-request-action/", status=405),
+        # Chat
+        Scenario("conversations", "get", "/api/chat/conversations/"),
+        Scenario("open conversation", "post", "/api/chat/conversations/", {"username": "user1"},
+                 status=(200, 201)),
+        Scenario("message history", "get", "/api/chat/conversations/{conversation}/messages/"),
+        Scenario("message history stream", "get",
+                 "/api/chat/conversations/{conversation}/messages/?stream=1"),
+        Scenario("send message", "post", "/api/chat/conversations/{conversation}/messages/",
+                 {"content": "hello"}, status=202),
+        Scenario("mark read", "post", "/api/chat/conversations/{conversation}/read/"),
+        # Notes
+        Scenario("note list", "get", "/api/note/notes/"),
+        Scenario("create note", "post", "/api/note/notes/",
+                 {"title": "new", "content": "alpha beta"}, status=201),
+        Scenario("note search", "get", "/api/note/notes/search/?q=alpha+gamma"),
+        Scenario("note sync", "get", "/api/note/sync/?since=0"),
+        Scenario("note detail", "get", "/api/note/notes/{note}/"),
+        Scenario("update note", "put", "/api/note/notes/{note}/", note_update),
+        Scenario("delete note", "delete", "/api/note/notes/{scratch_note}/", prepare=new_note),
+        Scenario("note revisions", "get", "/api/note/notes/{note}/revisions/"),
+        Scenario("note revision", "get", "/api/note/notes/{note}/revisions/1/"),
+        # Todos
+        Scenario("todo lists", "get", "/api/todo/lists/"),
+        Scenario("create todo list", "post", "/api/todo/lists/", {"title": "new"}, status=201),
+        Scenario("rename todo list", "patch", "/api/todo/lists/{todo_list}/", {"title": "renamed"}),
+        Scenario("todo items", "get", "/api/todo/lists/{todo_list}/items/"),
+        Scenario("create todo item", "post", "/api/todo/lists/{todo_list}/items/",
+                 {"title": "new"}, status=201),
+        Scenario("move todo item", "patch", "/api/todo/items/{item}/", {"after": None}),
+        Scenario("delete todo item", "delete", "/api/todo/items/{scratch_item}/", prepare=new_item),
+        Scenario("reminders", "get", "/api/todo/items/{item}/reminders/"),
+        Scenario("create reminder", "post", "/api/todo/items/{item}/reminders/",
+                 {"remind_at": "2030-01-01T09:00:00Z", "recurrence": "FREQ=DAILY"}, status=201),
+        Scenario("delete reminder", "delete", "/api/todo/reminders/{scratch_reminder}/",
+                 prepare=new_reminder),
+        Scenario("todo batch", "post", "/api/todo/batch/", lambda context, i: {"operations": [
+            {"op": "create", "list": context["todo_list"], "title": "a", "ref": "a"},
+            {"op": "complete", "id": "a"},
+            {"op": "update", "id": context["item"], "title": f"item {i}"},
+        ]}),
+        Scenario("todo sync", "get", "/api/todo/sync/?since=0"),
+        # Web pages
+        Scenario("home", "get", "/", client="web"),
+        Scenario("signup page", "get", "/signup/", client="anon"),
+        Scenario("signup", "post", "/signup/", lambda context, i: {
+            "email": f"web{next(context['counter'])}@example.com",
+            "username": f"web{next(context['counter'])}",
+            "password1": PASSWORD,
+            "password2": PASSWORD,
+        }, client="anon", status=302),
+        Scenario("login page", "get", "/login/", client="anon"),
+        Scenario("login", "post", "/login/",
+                 {"email": "user0@example.com", "password": PASSWORD}, client="anon", status=302),
+        Scenario("activate", "get", "/activate/{uid}/{token}/", client="anon", status=302,
+                 prepare=deactivate),
+        Scenario("password reset page", "get", "/password-reset/", client="anon"),
+        Scenario("password reset", "post", "/password-reset/",
+                 {"email": "user0@example.com"}, client="anon", status=302),
+        Scenario("password reset confirm", "get", "/password-reset-confirm/{uid}/{token}/",
+                 client="anon", status=302, prepare=reset_token),
+        Scenario("password reset complete", "get", "/password-reset-complete/", client="anon"),
+        Scenario("password change page", "get", "/password-change/", client="web"),
+        Scenario("profile", "get", "/profile/", client="web"),
+        Scenario("logout page", "post", "/logout/", client="anon"),
+        # Monitoring
+        Scenario("metrics", "get", "/metrics", client="anon"),
+    ]
+
+
+def all_routes():
+    from django.urls import URLPattern, get_resolver
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLPattern):
+                yield route
+            else:
+                yield from walk(pattern.url_patterns, route)
+
+    return {route for route in walk(get_resolver().url_patterns, "") if not route.startswith(UNCOVERED)}
+
+
+def make_clients(context):
+    from itertools import count
+
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    User = get_user_model()
+    me = User.objects.get(pk=context["me"])
+    context["counter"] = count()
+
+    web = Client()
+    web.force_login(me)
+    # Logging out deletes the token; create_token() brings back the same key.
+    context["friend_token"] = Token.generate_key()
+
+    return {
+        "anon": Client(),
+        "api": Client(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=me).key}"),
+        "friend": Client(HTTP_AUTHORIZATION=f"Token {context['friend_token']}"),
+        "web": web,
+    }
+
+
+def run(scenario, clients, context, repeat):
+    """Return the scenario's route and its measurements, or raise on a bad status."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from chat.buffer import get_write_buffer
+
+    def once(i):
+        if scenario.prepare is not None:
+            scenario.prepare(context, i)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            path, response = scenario.request(clients, context, i)
+            elapsed = time.perf_counter() - started
+        # Buffered chat messages are written by the flusher thread; flush
+        # them here so that write does not land inside the next measurement.
+        get_write_buffer().flush()
+        expected = scenario.status if isinstance(scenario.status, tuple) else (scenario.status,)
+        if response.status_code not in expected:
+            raise AssertionError(
+                f"{scenario.name}: {scenario.method.upper()} {path} returned"
+                f" {response.status_code}, expected {scenario.status}"
+            )
+        return path, len(queries), elapsed
+
+    path, _queries, _elapsed = once(0)  # warm caches and connections
+    counts, timings = [], []
+    for i in range(1, repeat + 1):
+        _path, queries, elapsed = once(i)
+        counts.append(queries)
+        timings.append(elapsed)
+
+    # The smallest of a few traced peaks, so a one-off cache fill or GC cycle
+    # landing inside a request does not read as a regression.
+    peaks = []
+    for i in range(repeat + 1, repeat + 1 + TRACED_RUNS):
+        tracemalloc.start()
+        once(i)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    peak = min(peaks)
+
+    return path, {
+        "queries": max(counts),
+        "ms": round(statistics.median(timings) * 1e3, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, time_threshold, memory_threshold):
+    """Yield ``(name, problem)`` for every regression against the baseline."""
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["queries"] > expected["queries"]:
+            yield name, f"{result['queries']} queries, baseline {expected['queries']}"
+        # Small absolute slack keeps sub-millisecond noise out.
+        if result["ms"] > expected["ms"] * time_threshold + 1:
+            yield name, f"{result['ms']:.2f} ms, baseline {expected['ms']:.2f} ms"
+        if result["peak_kib"] > expected["peak_kib"] * memory_threshold + 64:
+            yield name, f"{result['peak_kib']:.0f} KiB peak, baseline {expected['peak_kib']:.0f} KiB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--friends", type=int, default=500, help="Friends of the requesting user.")
+    parser.add_argument("--requests", type=int, default=200, help="Friend requests it has received.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", help="Run the scenarios whose name contains this.")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--time-threshold", type=float, default=1.5,
+                        help="Allowed ratio to the baseline time.")
+    parser.add_argument("--memory-threshold", type=float, default=1.5,
+                        help="Allowed ratio to the baseline peak memory.")
+    args = parser.parse_args()
+
+    setup()
+    from django.urls import resolve
+
+    with test_database():
+        context = seed(args.users, args.friends, args.requests)
+        clients = make_clients(context)
+
+        results, covered, failures = {}, set(), []
+        print(f"{'scenario':<28}{'queries':>8}{'ms':>10}{'peak KiB':>10}")
+        for scenario in scenarios():
+            if args.only and args.only not in scenario.name:
+                continue
+            try:
+                path, result = run(scenario, clients, context, args.repeat)
+            except AssertionError as e:
+                failures.append(str(e))
+                continue
+            covered.add(resolve(path.split("?")[0]).route)
+            results[scenario.name] = result
+            print(f"{scenario.name:<28}{result['queries']:>8}{result['ms']:>10.2f}{result['peak_kib']:>10.1f}")
+
+    dataset = {"users": args.users, "friends": args.friends, "requests": args.requests}
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"dataset": dataset, "scenarios": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Wrote {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["dataset"] != dataset:
+            print(f"Baseline was recorded with {baseline['dataset']}, timings may not compare.")
+        regressions = list(compare(results, baseline["scenarios"], args.time_threshold, args.memory_threshold))
+        for name, problem in regressions:
+            failures.append(f"{name}: {problem}")
+        for name in results.keys() - baseline["scenarios"].keys():
+            print(f"{name}: not in the baseline")
+
+    if not args.only:
+        for route in sorted(all_routes() - covered):
+            failures.append(f"no scenario for route {route!r}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Render and parse time of API envelopes with DRF's stdlib JSON classes versus
+the orjson-backed ones in utils.renderers and utils.parsers.
+
+    python -m benchmarks.json_renderer [--rows N] [--repeat N]
+"""
+
+import argparse
+import io
+import timeit
+import uuid
+from datetime import timedelta
+
+from benchmarks.utils import setup
+
+
+def envelope(rows):
+    from django.utils import timezone
+    from django.utils.translation import gettext_lazy as _
+
+    now = timezone.now()
+    return {
+        "status": True,
+        "message": _("Friends retrieved successfully."),
+        "data": {
+            "count": rows,
+            "next": None,
+            "results": [
+                {
+                    "id": uuid.uuid4(),
+                    "username": f"user{i}",
+                    "avatar": f"http://testserver/media/avatar/{i}_40.jpg",
+                    "online": i % 3 == 0,
+                    "created": now - timedelta(minutes=i),
+                }
+                for i in range(rows)
+            ],
+        },
+    }
+
+
+def best(func, repeat):
+    number = 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 50, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from rest_framework import parsers, renderers
+
+    from utils.parsers import JSONParser
+    from utils.renderers import JSONRenderer, orjson
+
+    if orjson is None:
+        print("orjson is not installed, both columns use stdlib json.")
+
+    context = {"encoding": "utf-8"}
+    print(f"{'rows':>6}  {'':<6}{'drf':>10}{'fast':>10}{'speedup':>9}")
+    for rows in args.rows:
+        data = envelope(rows)
+        content = renderers.JSONRenderer().render(data)
+        assert JSONRenderer().render(data) == content
+
+        timings = {
+            "render": (
+                best(lambda: renderers.JSONRenderer().render(data), args.repeat),
+                best(lambda: JSONRenderer().render(data), args.repeat),
+            ),
+            "parse": (
+                best(lambda: parsers.JSONParser().parse(io.BytesIO(content), None, context), args.repeat),
+                best(lambda: JSONParser().parse(io.BytesIO(content), None, context), args.repeat),
+            ),
+        }
+        for name, (drf, fast) in timings.items():
+            print(
+                f"{rows:>6}  {name:<6}{drf * 1e6:8.1f}us{fast * 1e6:8.1f}us{drf / fast:8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
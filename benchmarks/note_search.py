@@ -0,0 +1,98 @@
+"""
+Seed notes into SQLite and measure ranked search latency against a
+LIKE '%term%' scan over the same notes.
+
+    BENCH_DB=/tmp/notes.sqlite3 python -m benchmarks.note_search --notes 1000000
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from benchmarks.utils import setup, test_database
+
+
+def seed(notes, words_per_note, vocabulary, batch_size):
+    from accounts.models import CustomUser
+    from note.models import Note
+    from note.search import get_search_backend
+
+    owner = CustomUser.objects.create(email="notes@example.com", username="notes", password="!")
+    words = [f"word{i}" for i in range(vocabulary)]
+    # Zipf-like term frequencies, so a few terms are common and most are rare.
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    backend = get_search_backend()
+
+    started = time.perf_counter()
+    for offset in range(0, notes, batch_size):
+        batch = Note.objects.bulk_create([
+            Note(
+                owner=owner,
+                title=" ".join(random.choices(words, cum_weights=cum_weights, k=3)),
+                content=" ".join(random.choices(words, cum_weights=cum_weights, k=words_per_note)),
+            )
+            for _ in range(min(batch_size, notes - offset))
+        ])
+        backend.index_many(batch)
+    elapsed = time.perf_counter() - started
+
+    print(f"Seeded and indexed {notes} notes in {elapsed:.1f}s ({notes / elapsed:.0f}/s)")
+    return owner, words
+
+
+def timed(func, samples):
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(
+        f"{name:<16}"
+        f"p50 {statistics.median(timings) * 1e3:8.2f} ms"
+        f"   p99 {p99 * 1e3:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=30, help="words per note")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from note.models import Note
+        from note.search import get_search_backend
+
+        owner, words = seed(args.notes, args.words, args.vocabulary, args.batch_size)
+        backend = get_search_backend()
+        # Skip the handful of very common terms, as a stop word list would.
+        rare = words[100:]
+
+        for terms in (1, 2, 3):
+            report(
+                f"index, {terms} term{'s' if terms > 1 else ''}",
+                timed(lambda: backend.search(owner, " ".join(random.sample(rare, terms)), 20),
+                      args.samples),
+            )
+        report(
+            "LIKE, 1 term",
+            timed(lambda: list(Note.objects.filter(
+                owner=owner, content__icontains=random.choice(rare)
+            )[:20]), max(1, args.samples // 20)),
+        )
+
+
+if __name__ == "__main__":
+    main()
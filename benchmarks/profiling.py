@@ -0,0 +1,62 @@
+"""
+Per-request overhead of utils.profiling: middleware off, counters only, and
+counters with every request run under cProfile.
+
+    python -m benchmarks.profiling [--requests N] [--path PATH]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks.utils import setup, test_database
+
+MODES = {
+    "off": {"ENABLED": False},
+    "counters": {"ENABLED": True, "SLOW_MS": 10**6},
+    "cProfile": {"ENABLED": True, "SLOW_MS": 10**6, "SAMPLE_RATE": 1},
+}
+
+
+def timings(client, path, requests):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - started)
+    assert response.status_code == 200, response.status_code
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--path", default="/api/friendship/friend-list/")
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from rest_framework.authtoken.models import Token
+
+    with test_database(), tempfile.TemporaryDirectory() as directory:
+        user = get_user_model().objects.create_user(
+            "profiling@example.com", "Passw0rd1", username="profiling"
+        )
+        token = Token.objects.create(user=user).key
+
+        print(f"{args.path}, {args.requests} requests")
+        baseline = None
+        for mode, setting in MODES.items():
+            with override_settings(PROFILING={**setting, "DIRECTORY": directory}):
+                # A new client loads the middleware stack with this setting.
+                client = Client(HTTP_AUTHORIZATION=f"Token {token}")
+                timings(client, args.path, 20)
+                median = statistics.median(timings(client, args.path, args.requests))
+            baseline = baseline or median
+            print(f"{mode:<10}{median * 1e6:9.1f} us{(median - baseline) * 1e6:+9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Settings for the benchmark scripts: the project settings on top of a local
+SQLite database and the in-memory email backend.
+"""
+
+import os
+
+for name, value in {
+    "DJANGO_SECRET_KEY": "benchmark",
+    "DBNAME": "",
+    "DBUSER": "",
+    "DBPASSWORD": "",
+    "DBHOST": "",
+    "DBPORT": "",
+    "EMHOST": "localhost",
+    "EMUSER": "noreply@localhost",
+    "EMPASSWORD": "",
+    "EMPORT": "25",
+}.items():
+    os.environ.setdefault(name, value)
+
+from backbone.settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+# Benchmarks run against a throwaway test database: in memory by default,
+# or the SQLite file named by BENCH_DB for datasets that do not fit in RAM.
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "benchmark.sqlite3"),  # noqa: F405
+        "TEST": {"NAME": os.environ.get("BENCH_DB")},
+    }
+}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+MAILER = {**MAILER, "DISPATCHER": "mailer.dispatch.QueueDispatcher"}  # noqa: F405
@@ -0,0 +1,86 @@
+"""
+Measure peak Python memory of streamed sync responses as the feed grows.
+
+    python -m benchmarks.streaming --items 10000 100000
+
+A flat peak across sizes means the response never holds the whole feed.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.utils import setup, test_database
+
+
+def load(user, items, batch_size=5000):
+    from sync.services import allocate
+    from todo.models import TodoItem, TodoList
+    from todo.ordering import spaced_keys
+
+    todo_list = TodoList.objects.create(owner=user, title="benchmark")
+    existing = TodoItem.objects.filter(owner=user).count()
+    count = items - existing
+    if count <= 0:
+        return
+
+    seq = allocate(user.pk, count)
+    keys = spaced_keys(count)
+    for offset in range(0, count, batch_size):
+        TodoItem.objects.bulk_create([
+            TodoItem(
+                todo_list=todo_list,
+                owner=user,
+                title=f"item {existing + i}",
+                position=keys[i],
+                seq=seq + i,
+            )
+            for i in range(offset, min(offset + batch_size, count))
+        ])
+
+
+def stream(client):
+    response = client.get("/api/todo/sync/", {"since": 0, "stream": 1})
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+def measure_stream(client):
+    """Time one pass, then trace another; tracing slows Python down severalfold."""
+    started = time.perf_counter()
+    size = stream(client)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    stream(client)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from rest_framework.authtoken.models import Token
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            "stream@example.com", "Passw0rd1", username="stream"
+        )
+        client = Client(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}")
+
+        for items in sorted(args.items):
+            load(user, items)
+            size, elapsed, peak = measure_stream(client)
+            print(
+                f"{items:>9} items   {size / 2**20:7.1f} MiB streamed"
+                f"   {elapsed:6.2f} s   peak {peak / 2**20:6.2f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Queries and time per authenticated API request with DRF's TokenAuthentication
+versus CachedTokenAuthentication.
+
+    python -m benchmarks.token_auth [--requests N]
+"""
+
+import argparse
+
+from benchmarks.utils import measure, setup, test_database
+
+
+def run(requests):
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.permissions import IsAuthenticated
+    from rest_framework.response import Response
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.views import APIView
+
+    from accounts.authentication import CachedTokenAuthentication, get_token_cache
+    from accounts.models import CustomUser
+
+    user = CustomUser.objects.create_user(
+        "bench@example.com", "Benchmark1", username="bench"
+    )
+    token = Token.objects.create(user=user)
+    factory = APIRequestFactory()
+
+    rows = []
+    for authentication_class in (TokenAuthentication, CachedTokenAuthentication):
+        view = type(
+            "WhoAmIView",
+            (APIView,),
+            {
+                "authentication_classes": (authentication_class,),
+                "permission_classes": (IsAuthenticated,),
+                "get": lambda self, request: Response({"id": request.user.id}),
+            },
+        ).as_view()
+        get_token_cache().clear()
+
+        result = {}
+        with measure(result):
+            for _ in range(requests):
+                request = factory.get("/", HTTP_AUTHORIZATION=f"Token {token.key}")
+                view(request).render()
+        rows.append((authentication_class.__name__, result))
+
+    print(f"{'authentication':<28}{'queries/request':>18}{'us/request':>14}")
+    for name, result in rows:
+        print(
+            f"{name:<28}"
+            f"{result['queries'] / requests:>18.3f}"
+            f"{result['seconds'] / requests * 1e6:>14.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        run(args.requests)
+
+
+if __name__ == "__main__":
+    main()
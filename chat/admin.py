@@ -1,3 +1,27 @@
 from django.contrib import admin
 
-# Register your models here.
+from chat.models import Conversation, Message, Participant
+
+
+class ParticipantInline(admin.TabularInline):
+    model = Participant
+    extra = 0
+
+
+class ConversationAdmin(admin.ModelAdmin):
+    model = Conversation
+    list_display = ("id", "direct_key", "created")
+    inlines = (ParticipantInline,)
+
+
+class MessageAdmin(admin.ModelAdmin):
+    model = Message
+    list_display = ("conversation", "sender", "created")
+    list_filter = ("conversation",)
+    fieldsets = (
+        (None, {"fields": ("conversation", "sender", "content", "created")}),
+    )
+
+
+admin.site.register(Conversation, ConversationAdmin)
+admin.site.register(Message, MessageAdmin)
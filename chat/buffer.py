@@ -0,0 +1,156 @@
+"""
+Write buffer for inbound chat messages.
+
+Messages are collected in memory and written with one bulk INSERT per
+flush, together with one unread-counter UPDATE per conversation and sender.
+A flush happens once CHAT["WRITE_BUFFER"]["MAX_SIZE"] messages are waiting
+or MAX_DELAY seconds after the first one arrived, whichever comes first.
+Events are only published after the flush commits, so nobody ever sees a
+message that is not stored. A MAX_SIZE of 1 makes every write synchronous.
+
+Delayed flushes run in one flusher thread per process, which keeps its
+database connection like a request thread does. A batch that fails to
+write goes back to the front of the queue and is retried after
+RETRY_DELAY seconds, doubling on each attempt. After MAX_ATTEMPTS its
+messages are dropped and logged as errors.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from chat.conf import DEFAULTS, chat_setting
+from chat.models import Message, Participant
+
+logger = logging.getLogger(__name__)
+
+
+def buffer_setting(name):
+    return chat_setting("WRITE_BUFFER").get(name, DEFAULTS["WRITE_BUFFER"][name])
+
+
+class MessageWriteBuffer:
+    def __init__(self, max_size, max_delay, max_attempts=5, retry_delay=1):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Entries are (message, participant_ids, on_flush, failed attempts).
+        self._pending = []
+        self._condition = threading.Condition()
+        self._deadline = None
+        self._thread = None
+
+    def add(self, message, participant_ids, on_flush):
+        """
+        Queue an unsaved message. ``on_flush(message, participant_ids)`` is
+        called once it has been committed.
+        """
+        with self._condition:
+            self._pending.append((message, participant_ids, on_flush, 0))
+            full = len(self._pending) >= self.max_size
+            if not full:
+                self._schedule(self.max_delay)
+
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                # Queued again, the flusher thread retries it.
+                logger.exception("Failed to flush buffered chat messages.")
+
+    def flush(self):
+        with self._condition:
+            batch, self._pending = self._pending, []
+            self._deadline = None
+
+        if not batch:
+            return 0
+
+        try:
+            self._write(batch)
+        except Exception:
+            self._requeue(batch)
+            raise
+        return len(batch)
+
+    def _write(self, batch):
+        unread = Counter()
+        for message, _ids, _cb, _attempts in batch:
+            unread[(message.conversation_id, message.sender_id)] += 1
+
+        with transaction.atomic():
+            Message.objects.bulk_create([message for message, _ids, _cb, _attempts in batch])
+            for (conversation_id, sender_id), count in unread.items():
+                Participant.objects.filter(conversation_id=conversation_id).exclude(
+                    user_id=sender_id
+                ).update(unread_count=F("unread_count") + count)
+
+            for message, participant_ids, on_flush, _attempts in batch:
+                transaction.on_commit(
+                    lambda m=message, p=participant_ids, cb=on_flush: cb(m, p)
+                )
+
+    def _requeue(self, batch):
+        retry, dropped = [], []
+        for message, participant_ids, on_flush, attempts in batch:
+            if attempts + 1 < self.max_attempts:
+                retry.append((message, participant_ids, on_flush, attempts + 1))
+            else:
+                dropped.append(message)
+
+        for message in dropped:
+            logger.error(
+                "Dropped chat message %s to conversation %s after %s failed writes.",
+                message.id, message.conversation_id, self.max_attempts,
+            )
+        if retry:
+            attempts = min(entry[3] for entry in retry)
+            with self._condition:
+                self._pending[:0] = retry
+                self._schedule(self.retry_delay * 2 ** (attempts - 1))
+
+    def _schedule(self, delay):
+        """Have the flusher thread flush in ``delay`` seconds, unless sooner."""
+        deadline = time.monotonic() + delay
+        if self._deadline is None or deadline < self._deadline:
+            self._deadline = deadline
+            self._condition.notify()
+        # Threads do not survive a fork, so a worker starts its own.
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="chat-write-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                delay = self._deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered chat messages.")
+            finally:
+                close_old_connections()
+
+
+@lru_cache(maxsize=None)
+def get_write_buffer():
+    return MessageWriteBuffer(
+        buffer_setting("MAX_SIZE"),
+        buffer_setting("MAX_DELAY"),
+        buffer_setting("MAX_ATTEMPTS"),
+        buffer_setting("RETRY_DELAY"),
+    )
@@ -0,0 +1,21 @@
+from django.conf import settings
+
+DEFAULTS = {
+    "PUBSUB_BACKEND": "chat.pubsub.LocalBackend",
+    "QUEUE_SIZE": 100,
+    "WRITE_BUFFER": {
+        "MAX_SIZE": 100,
+        "MAX_DELAY": 0.05,
+        "MAX_ATTEMPTS": 5,
+        "RETRY_DELAY": 1,
+    },
+    "PRESENCE": {
+        "BACKEND": "chat.presence.LocalPresence",
+        "TIMEOUT": 60,
+        "TYPING_INTERVAL": 3,
+    },
+}
+
+
+def chat_setting(name):
+    return getattr(settings, "CHAT", {}).get(name, DEFAULTS[name])
@@ -0,0 +1,179 @@
+"""
+WebSocket endpoint for chat, written directly against ASGI so that every
+socket is a pair of coroutines on the worker's event loop rather than a
+thread. Database work is pushed to Django's thread-sensitive executor.
+
+Clients connect to ``/ws/chat/?token=<api token>`` and exchange JSON frames:
+
+    -> {"type": "message", "conversation": 1, "content": "hi"}
+    <- {"type": "message", "message": {...}}
+    -> {"type": "typing", "conversation": 1}
+    <- {"type": "typing", "conversation": 1, "user": 2}
+    <- {"type": "presence", "user": 2, "online": true}
+    -> {"type": "ping"}
+    <- {"type": "pong"}
+
+Any frame counts as a heartbeat. A socket that stays silent for longer than
+CHAT["PRESENCE"]["TIMEOUT"] seconds is closed and its session expires.
+"""
+
+import asyncio
+import json
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+
+from accounts.authentication import CachedTokenAuthentication
+from chat.presence import get_presence, presence_setting
+from chat.pubsub import get_backend, user_channel
+from chat.serializers import SendMessageSerializer
+from chat.services import publish_presence, publish_typing, send_message
+from utils.handle_error_message import get_first_error
+
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_TIMEOUT = 4408
+
+
+def database_sync_to_async(func):
+    """sync_to_async that also recycles stale connections around the call."""
+
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper)
+
+
+@database_sync_to_async
+def authenticate(scope):
+    query = parse_qs(scope.get("query_string", b"").decode())
+    key = (query.get("token") or [None])[0]
+    if not key:
+        return None
+
+    try:
+        user, _token = CachedTokenAuthentication().authenticate_credentials(key)
+    except exceptions.AuthenticationFailed:
+        return None
+    return user
+
+
+class ChatConsumer:
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.user = None
+        self.session_id = uuid.uuid4().hex
+
+    async def send_json(self, content):
+        await self.send({
+            "type": "websocket.send",
+            "text": json.dumps(content, cls=DjangoJSONEncoder),
+        })
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+
+        self.user = await authenticate(self.scope)
+        if self.user is None:
+            await self.send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+            return
+        await self.send({"type": "websocket.accept"})
+
+        subscription = get_backend().subscribe(user_channel(self.user.pk))
+        forwarder = asyncio.create_task(self.forward(subscription))
+        try:
+            await self.on_connect()
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        self.receive(), presence_setting("TIMEOUT")
+                    )
+                except asyncio.TimeoutError:
+                    await self.send({"type": "websocket.close", "code": CLOSE_TIMEOUT})
+                    break
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] == "websocket.receive":
+                    await self.on_frame(message.get("text"))
+        finally:
+            forwarder.cancel()
+            subscription.close()
+            await self.on_disconnect()
+
+    async def forward(self, subscription):
+        while True:
+            event = await subscription.get()
+            await self.send_json(event)
+
+    async def on_connect(self):
+        if get_presence().connect(self.user.pk, self.session_id):
+            await database_sync_to_async(publish_presence)(self.user.pk, True)
+
+    async def on_disconnect(self):
+        if get_presence().disconnect(self.user.pk, self.session_id):
+            await database_sync_to_async(publish_presence)(self.user.pk, False)
+
+    async def on_frame(self, text):
+        get_presence().heartbeat(self.user.pk, self.session_id)
+
+        try:
+            frame = json.loads(text or "")
+            frame_type = frame["type"]
+        except (ValueError, TypeError, KeyError):
+            await self.send_json({"type": "error", "message": _("Invalid frame.")})
+            return
+
+        handler = getattr(self, f"handle_{frame_type}", None)
+        if handler is None:
+            await self.send_json({"type": "error", "message": _("Unknown frame type.")})
+            return
+        await handler(frame)
+
+    async def handle_ping(self, frame):
+        await self.send_json({"type": "pong"})
+
+    async def handle_message(self, frame):
+        conversation_id = frame.get("conversation")
+        if not isinstance(conversation_id, int):
+            await self.send_json({"type": "error", "message": _("Invalid conversation.")})
+            return
+
+        serializer = SendMessageSerializer(data=frame)
+        if not serializer.is_valid():
+            await self.send_json({"type": "error", "message": get_first_error(serializer.errors)})
+            return
+
+        try:
+            await database_sync_to_async(send_message)(
+                self.user, conversation_id, serializer.validated_data["content"]
+            )
+        except (PermissionDenied, ValueError) as e:
+            await self.send_json({"type": "error", "message": str(e)})
+
+    async def handle_typing(self, frame):
+        conversation_id = frame.get("conversation")
+        if not isinstance(conversation_id, int):
+            await self.send_json({"type": "error", "message": _("Invalid conversation.")})
+            return
+
+        try:
+            await database_sync_to_async(publish_typing)(self.user, conversation_id)
+        except PermissionDenied as e:
+            await self.send_json({"type": "error", "message": str(e)})
+
+
+async def chat_websocket(scope, receive, send):
+    await ChatConsumer(scope, receive, send).run()
@@ -0,0 +1,9 @@
+from django.core.exceptions import PermissionDenied
+
+
+class NotAParticipantError(PermissionDenied):
+    pass
+
+
+class NotFriendsError(PermissionDenied):
+    pass
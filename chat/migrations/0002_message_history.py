@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:07
+
+from django.db import migrations, models
+import uuid
+
+
+def drop_messages(apps, schema_editor):
+    # Integer message ids have no UUID equivalent; the few messages stored
+    # before this migration are discarded rather than given fake ids.
+    apps.get_model("chat", "Message").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='last_read',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='last read'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='unread count'),
+        ),
+        migrations.RunPython(drop_messages, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='id'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created', 'id'], name='chat_message_history_idx'),
+        ),
+    ]
@@ -1,3 +1,101 @@
-from django.db import models
+import uuid
 
-# Create your models here.
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class ConversationManager(models.Manager):
+    def for_user(self, user):
+        return self.filter(participant__user=user)
+
+    def get_or_create_direct(self, user1, user2):
+        """The one-to-one conversation between two users, created on demand."""
+        key = ":".join(sorted([str(user1.pk), str(user2.pk)]))
+
+        conversation = self.filter(direct_key=key).first()
+        if conversation is not None:
+            return conversation, False
+
+        with transaction.atomic():
+            conversation, created = self.get_or_create(direct_key=key)
+            if created:
+                Participant.objects.bulk_create([
+                    Participant(conversation=conversation, user=user1),
+                    Participant(conversation=conversation, user=user2),
+                ])
+        return conversation, created
+
+
+class Conversation(models.Model):
+    participants = models.ManyToManyField(
+        User,
+        through="Participant",
+        related_name="conversations",
+    )
+    direct_key = models.CharField(
+        _("direct key"), max_length=100, unique=True, blank=True, null=True
+    )
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    objects = ConversationManager()
+
+    class Meta:
+        verbose_name = _("conversation")
+        verbose_name_plural = _("conversation")
+
+    def __str__(self):
+        return f"Conversation {self.id}"
+
+
+class Participant(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_participants")
+    joined = models.DateTimeField(_("joined"), default=timezone.now)
+    unread_count = models.PositiveIntegerField(_("unread count"), default=0)
+    last_read = models.DateTimeField(_("last read"), blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("participant")
+        verbose_name_plural = _("participant")
+        unique_together = ("conversation", "user")
+
+    def __str__(self):
+        return f"User {self.user_id} in conversation {self.conversation_id}"
+
+
+class Message(models.Model):
+    # Generated in-process so buffered messages have an identity before
+    # they are bulk-inserted, which MySQL cannot report back.
+    id = models.UUIDField(_("id"), primary_key=True, default=uuid.uuid4, editable=False)
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name="messages"
+    )
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_messages")
+    content = models.TextField(_("content"))
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("message")
+        verbose_name_plural = _("message")
+        indexes = [
+            models.Index(fields=["conversation", "created", "id"], name="chat_message_history_idx"),
+        ]
+
+    def __str__(self):
+        return f"Message {self.id} from {self.sender_id}"
+
+    def to_event(self):
+        return {
+            "type": "message",
+            "message": {
+                "id": self.id,
+                "conversation": self.conversation_id,
+                "sender": self.sender_id,
+                "content": self.content,
+                "created": self.created,
+            },
+        }
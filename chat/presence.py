@@ -0,0 +1,124 @@
+"""
+Online and typing presence for chat users.
+
+Every open socket is a session that has to be refreshed at least every
+CHAT["PRESENCE"]["TIMEOUT"] seconds; a user is online while one of their
+sessions is fresh. Typing notices are coalesced so a user announces typing
+in a conversation at most once every TYPING_INTERVAL seconds.
+
+LocalPresence keeps state in the memory of the current process, which is
+the process holding the sockets. A shared store implements the same
+interface.
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+
+from chat.conf import DEFAULTS, chat_setting
+
+
+def presence_setting(name):
+    return chat_setting("PRESENCE").get(name, DEFAULTS["PRESENCE"][name])
+
+
+class BasePresence:
+    def connect(self, user_id, session_id):
+        """Register a session. Return True if the user just came online."""
+        raise NotImplementedError
+
+    def heartbeat(self, user_id, session_id):
+        raise NotImplementedError
+
+    def disconnect(self, user_id, session_id):
+        """Drop a session. Return True if the user just went offline."""
+        raise NotImplementedError
+
+    def online(self, user_ids):
+        """Return the subset of ``user_ids`` that is online."""
+        raise NotImplementedError
+
+    def should_announce_typing(self, user_id, conversation_id):
+        """
+        Return True if a typing notice from the user in the conversation is
+        due, and start a new interval if so.
+        """
+        raise NotImplementedError
+
+
+class LocalPresence(BasePresence):
+    def __init__(self, timeout, typing_interval):
+        self.timeout = timeout
+        self.typing_interval = typing_interval
+        # user id -> {session id: last heartbeat}
+        self._sessions = {}
+        # user id -> {conversation id: last typing notice}
+        self._typing = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, user_id, now):
+        """Prune the user's stale sessions and return the remaining ones."""
+        sessions = self._sessions.get(user_id)
+        if not sessions:
+            return {}
+
+        fresh = {
+            session_id: seen
+            for session_id, seen in sessions.items()
+            if now - seen < self.timeout
+        }
+        if len(fresh) != len(sessions):
+            if fresh:
+                self._sessions[user_id] = fresh
+            else:
+                del self._sessions[user_id]
+                self._typing.pop(user_id, None)
+        return fresh
+
+    def connect(self, user_id, session_id):
+        now = time.monotonic()
+        with self._lock:
+            was_online = bool(self._fresh(user_id, now))
+            self._sessions.setdefault(user_id, {})[session_id] = now
+        return not was_online
+
+    def heartbeat(self, user_id, session_id):
+        now = time.monotonic()
+        with self._lock:
+            sessions = self._sessions.get(user_id)
+            if sessions is not None and session_id in sessions:
+                sessions[session_id] = now
+
+    def disconnect(self, user_id, session_id):
+        now = time.monotonic()
+        with self._lock:
+            sessions = self._sessions.get(user_id)
+            if sessions is None or sessions.pop(session_id, None) is None:
+                return False
+            return not self._fresh(user_id, now)
+
+    def online(self, user_ids):
+        now = time.monotonic()
+        with self._lock:
+            return {user_id for user_id in user_ids if self._fresh(user_id, now)}
+
+    def should_announce_typing(self, user_id, conversation_id):
+        now = time.monotonic()
+        with self._lock:
+            if not self._fresh(user_id, now):
+                return False
+            announced = self._typing.setdefault(user_id, {})
+            last = announced.get(conversation_id)
+            if last is not None and now - last < self.typing_interval:
+                return False
+            announced[conversation_id] = now
+            return True
+
+
+@lru_cache(maxsize=None)
+def get_presence():
+    return import_string(presence_setting("BACKEND"))(
+        presence_setting("TIMEOUT"), presence_setting("TYPING_INTERVAL")
+    )
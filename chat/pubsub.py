@@ -0,0 +1,107 @@
+"""
+Fan-out of chat events to connected sockets.
+
+Every connection subscribes to its user's channel and consumers publish to
+the channels of the users an event is meant for. The backend is chosen by
+CHAT["PUBSUB_BACKEND"]; LocalBackend only reaches sockets held by the
+current process, a networked backend implements the same interface.
+"""
+
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+
+from django.utils.module_loading import import_string
+
+from chat.conf import chat_setting
+
+logger = logging.getLogger(__name__)
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class BaseSubscription:
+    async def get(self):
+        """Wait for the next event published to the channel."""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class BaseBackend:
+    def publish(self, channel, event):
+        """
+        Deliver ``event`` to every subscriber of ``channel``. Must not block,
+        and must be callable both from the event loop and from sync code.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a subscription bound to the running event loop."""
+        raise NotImplementedError
+
+
+class LocalSubscription(BaseSubscription):
+    def __init__(self, backend, channel):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=chat_setting("QUEUE_SIZE"))
+
+    async def get(self):
+        return await self.queue.get()
+
+    def put(self, event):
+        if self.queue.full():
+            # A socket that cannot keep up loses its oldest events rather
+            # than holding memory for everybody else.
+            self.queue.get_nowait()
+            logger.warning("Dropped an event for slow subscriber on %s.", self.channel)
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.backend._remove(self)
+
+
+class LocalBackend(BaseBackend):
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        for subscription in subscriptions:
+            if running is subscription.loop:
+                subscription.put(event)
+            else:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(chat_setting("PUBSUB_BACKEND"))()
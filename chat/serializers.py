@@ -0,0 +1,16 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+
+class CreateConversationSerializer(serializers.Serializer):
+    username = serializers.CharField(error_messages={
+        "required": _("Username is required."),
+        "blank": _("Username cannot be blank."),
+    })
+
+
+class SendMessageSerializer(serializers.Serializer):
+    content = serializers.CharField(error_messages={
+        "required": _("Message is required."),
+        "blank": _("Message cannot be blank."),
+    })
@@ -0,0 +1,90 @@
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from chat.buffer import get_write_buffer
+from chat.exceptions import NotAParticipantError, NotFriendsError
+from chat.models import Message, Participant
+from chat.presence import get_presence
+from chat.pubsub import get_backend, user_channel
+from friendship.cache import get_friend_ids
+from friendship.models import Friend
+
+
+def send_message(sender, conversation_id, content):
+    """
+    Queue a message from ``sender``, who must take part in the conversation
+    and still be friends with everyone else in it. Both are checked in the
+    query that loads the participants.
+    """
+    participants = dict(
+        Participant.objects.filter(conversation_id=conversation_id)
+        .annotate(
+            is_friend=Exists(
+                Friend.objects.filter(to_user=sender, from_user=OuterRef("user_id"))
+            )
+        )
+        .values_list("user_id", "is_friend")
+    )
+    if sender.pk not in participants:
+        raise NotAParticipantError(_("You are not a participant of this conversation."))
+    if not all(is_friend for user_id, is_friend in participants.items() if user_id != sender.pk):
+        raise NotFriendsError(_("You can only chat with your friends."))
+    participant_ids = list(participants)
+
+    message = Message(conversation_id=conversation_id, sender=sender, content=content)
+    get_write_buffer().add(message, participant_ids, publish_message)
+    return message
+
+
+def mark_read(user, conversation_id):
+    return Participant.objects.filter(
+        conversation_id=conversation_id, user=user
+    ).update(unread_count=0, last_read=timezone.now())
+
+
+def publish_message(message, participant_ids):
+    """
+    Fan the message out to the sender's other sockets and to the
+    participants who are friends with the sender.
+    """
+    friend_ids = get_friend_ids(message.sender_id)
+    event = message.to_event()
+    backend = get_backend()
+
+    for user_id in participant_ids:
+        if user_id == message.sender_id or user_id in friend_ids:
+            backend.publish(user_channel(user_id), event)
+
+
+def publish_presence(user_id, online):
+    """Tell the user's friends that the user came online or went offline."""
+    event = {"type": "presence", "user": user_id, "online": online}
+    backend = get_backend()
+
+    for friend_id in get_friend_ids(user_id):
+        backend.publish(user_channel(friend_id), event)
+
+
+def publish_typing(user, conversation_id):
+    """
+    Tell the conversation's participants who are friends with the user that
+    the user is typing. Notices arriving within the typing interval of the
+    last one are dropped before touching the database.
+    """
+    if not get_presence().should_announce_typing(user.pk, conversation_id):
+        return False
+
+    participant_ids = Participant.objects.filter(
+        conversation_id=conversation_id
+    ).values_list("user_id", flat=True)
+    participant_ids = set(participant_ids)
+    if user.pk not in participant_ids:
+        raise NotAParticipantError(_("You are not a participant of this conversation."))
+
+    event = {"type": "typing", "conversation": conversation_id, "user": user.pk}
+    backend = get_backend()
+
+    for user_id in participant_ids & get_friend_ids(user.pk):
+        backend.publish(user_channel(user_id), event)
+    return True
@@ -1,3 +1,334 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from chat.buffer import MessageWriteBuffer, get_write_buffer
+from chat.consumers import CLOSE_UNAUTHORIZED, chat_websocket
+from chat.models import Conversation, Message, Participant
+from chat.presence import LocalPresence
+from friendship.models import Friend
+
+User = get_user_model()
+
+# Writes go straight to the database instead of waiting for a timer.
+SYNC_WRITES = {**settings.CHAT, "WRITE_BUFFER": {"MAX_SIZE": 1, "MAX_DELAY": 0.05}}
+
+
+def make_friends(user1, user2):
+    Friend.objects.bulk_create([
+        Friend(from_user=user1, to_user=user2),
+        Friend(from_user=user2, to_user=user1),
+    ])
+
+
+def run_socket(query_string, frames):
+    """Connect, send ``frames`` and disconnect; return what the server sent."""
+    sent = []
+
+    async def session():
+        incoming = asyncio.Queue()
+        for message in [{"type": "websocket.connect"}, *frames, {"type": "websocket.disconnect"}]:
+            incoming.put_nowait(message)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "websocket", "path": "/ws/chat/", "query_string": query_string}
+        await chat_websocket(scope, incoming.get, send)
+
+    async_to_sync(session)()
+    return sent
+
+
+@override_settings(CHAT=SYNC_WRITES)
+class ChatTests(TestCase):
+    def setUp(self):
+        get_write_buffer.cache_clear()
+        self.addCleanup(get_write_buffer.cache_clear)
+
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        self.carol = User.objects.create_user("carol@example.com", "Passw0rd1", username="carol")
+        make_friends(self.alice, self.bob)
+        self.conversation, _created = Conversation.objects.get_or_create_direct(
+            self.alice, self.bob
+        )
+        self.client.force_login(self.alice)
+
+    def messages_url(self):
+        return f"/api/chat/conversations/{self.conversation.id}/messages/"
+
+    def send(self, content="hi"):
+        return self.client.post(self.messages_url(), {"content": content}, content_type="application/json")
+
+    def test_send_and_read(self):
+        response = self.send()
+        self.assertEqual(response.status_code, 202)
+
+        self.client.force_login(self.bob)
+        results = self.client.get(self.messages_url()).json()["data"]["results"]
+        self.assertEqual([message["content"] for message in results], ["hi"])
+
+    def test_send_as_non_participant(self):
+        self.client.force_login(self.carol)
+        response = self.send()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(self.messages_url()).status_code, 403)
+        self.assertFalse(Message.objects.exists())
+
+    def test_send_to_former_friend(self):
+        Friend.objects.remove_friend(self.alice, self.bob)
+
+        response = self.send()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["message"], "You can only chat with your friends.")
+        self.assertFalse(Message.objects.exists())
+        self.assertEqual(self.conversation.participant_set.get(user=self.bob).unread_count, 0)
+
+    def test_history_pages(self):
+        # Messages 1 and 2 share a timestamp, so a page ends between them.
+        now = timezone.now()
+        Message.objects.bulk_create([
+            Message(
+                conversation=self.conversation,
+                sender=self.bob,
+                content=f"message {i}",
+                created=now - timedelta(minutes=minutes),
+            )
+            for i, minutes in enumerate([0, 1, 1, 3, 4])
+        ])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            data = self.client.get(self.messages_url(), params).json()["data"]
+            seen += [message["content"] for message in data["results"]]
+            cursor = data["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(set(seen), {f"message {i}" for i in range(5)})
+        self.assertEqual(seen[0], "message 0")
+        self.assertEqual(seen[-1], "message 4")
+
+        response = self.client.get(self.messages_url(), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CHAT=SYNC_WRITES)
+class ChatSocketTests(TestCase):
+    def setUp(self):
+        get_write_buffer.cache_clear()
+        self.addCleanup(get_write_buffer.cache_clear)
+
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        make_friends(self.alice, self.bob)
+        self.conversation, _created = Conversation.objects.get_or_create_direct(
+            self.alice, self.bob
+        )
+        self.token = Token.objects.create(user=self.alice).key
+
+    def test_rejects_missing_and_unknown_tokens(self):
+        for query_string in (b"", b"token=unknown"):
+            sent = run_socket(query_string, [])
+            self.assertEqual(sent, [{"type": "websocket.close", "code": CLOSE_UNAUTHORIZED}])
+
+    def test_ping(self):
+        sent = run_socket(f"token={self.token}".encode(), [
+            {"type": "websocket.receive", "text": '{"type": "ping"}'},
+        ])
+        self.assertEqual(sent[0], {"type": "websocket.accept"})
+        self.assertEqual(sent[1], {"type": "websocket.send", "text": '{"type": "pong"}'})
+
+    def test_message_to_former_friend(self):
+        Friend.objects.remove_friend(self.alice, self.bob)
+        frame = f'{{"type": "message", "conversation": {self.conversation.id}, "content": "hi"}}'
+
+        sent = run_socket(f"token={self.token}".encode(), [
+            {"type": "websocket.receive", "text": frame},
+        ])
+        self.assertEqual(
+            sent[1],
+            {
+                "type": "websocket.send",
+                "text": '{"type": "error", "message": "You can only chat with your friends."}',
+            },
+        )
+        self.assertFalse(Message.objects.exists())
+
+    def test_malformed_frames(self):
+        frames = [
+            "not json",
+            [1, 2],
+            {"type": "message", "conversation": [self.conversation.id], "content": "hi"},
+            {"type": "message", "conversation": {"id": self.conversation.id}, "content": "hi"},
+            {"type": "message", "conversation": str(self.conversation.id), "content": "hi"},
+            {"type": "message", "conversation": self.conversation.id, "content": {"text": "hi"}},
+            {"type": "message", "conversation": self.conversation.id, "content": "  "},
+            {"type": "typing", "conversation": [self.conversation.id]},
+        ]
+        sent = run_socket(f"token={self.token}".encode(), [
+            {"type": "websocket.receive", "text": frame if isinstance(frame, str) else json.dumps(frame)}
+            for frame in frames
+        ])
+
+        self.assertEqual(
+            [json.loads(message["text"]) for message in sent[1:]],
+            [
+                {"type": "error", "message": "Invalid frame."},
+                {"type": "error", "message": "Invalid frame."},
+                {"type": "error", "message": "Invalid conversation."},
+                {"type": "error", "message": "Invalid conversation."},
+                {"type": "error", "message": "Invalid conversation."},
+                {"type": "error", "message": "Not a valid string."},
+                {"type": "error", "message": "Message cannot be blank."},
+                {"type": "error", "message": "Invalid conversation."},
+            ],
+        )
+        self.assertFalse(Message.objects.exists())
+
+
+class WriteBufferTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        self.conversation, _created = Conversation.objects.get_or_create_direct(
+            self.alice, self.bob
+        )
+        self.flushed = []
+        self.done = threading.Event()
+
+    def on_flush(self, message, participant_ids):
+        self.flushed.append(message.content)
+        self.done.set()
+
+    def add(self, buffer, content="hi"):
+        message = Message(conversation=self.conversation, sender=self.alice, content=content)
+        buffer.add(message, [self.alice.pk, self.bob.pk], self.on_flush)
+
+    def unread(self):
+        return Participant.objects.get(conversation=self.conversation, user=self.bob).unread_count
+
+    def test_flush_on_size(self):
+        buffer = MessageWriteBuffer(max_size=2, max_delay=60)
+        self.add(buffer, "one")
+        self.assertFalse(Message.objects.exists())
+
+        self.add(buffer, "two")
+        self.assertEqual(Message.objects.count(), 2)
+        self.assertEqual(self.flushed, ["one", "two"])
+        self.assertEqual(self.unread(), 2)
+
+    def test_flush_on_delay(self):
+        buffer = MessageWriteBuffer(max_size=10, max_delay=0.05)
+        self.add(buffer)
+        self.assertTrue(self.done.wait(5))
+        self.assertEqual(Message.objects.get().content, "hi")
+        self.assertEqual(self.unread(), 1)
+
+        # The same flusher thread serves the next batch.
+        thread = buffer._thread
+        self.done.clear()
+        self.add(buffer, "again")
+        self.assertTrue(self.done.wait(5))
+        self.assertIs(buffer._thread, thread)
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_failed_batch_is_retried(self):
+        buffer = MessageWriteBuffer(max_size=1, max_delay=60, retry_delay=60)
+        with mock.patch.object(Message.objects, "bulk_create", side_effect=DatabaseError("gone")):
+            with self.assertLogs("chat.buffer", "ERROR"):
+                self.add(buffer)
+        self.assertFalse(Message.objects.exists())
+        self.assertEqual(self.unread(), 0)
+        self.assertEqual(len(buffer._pending), 1)
+
+        # What the flusher thread does once the retry delay is up.
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.flushed, ["hi"])
+        self.assertEqual(self.unread(), 1)
+
+    def test_failed_batch_is_dropped_after_max_attempts(self):
+        buffer = MessageWriteBuffer(max_size=1, max_delay=60, max_attempts=2, retry_delay=60)
+        with mock.patch.object(Message.objects, "bulk_create", side_effect=DatabaseError("gone")):
+            with self.assertLogs("chat.buffer", "ERROR"):
+                self.add(buffer)
+            with self.assertLogs("chat.buffer", "ERROR") as logs, self.assertRaises(DatabaseError):
+                buffer.flush()
+
+        self.assertIn("Dropped chat message", logs.output[0])
+        self.assertEqual(buffer._pending, [])
+        self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(self.flushed, [])
+
+
+class LocalPresenceTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("chat.presence.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.presence = LocalPresence(timeout=60, typing_interval=3)
+
+    def test_online_while_any_session_is_open(self):
+        self.assertTrue(self.presence.connect(1, "phone"))
+        self.assertFalse(self.presence.connect(1, "laptop"))
+        self.assertEqual(self.presence.online([1, 2]), {1})
+
+        self.assertFalse(self.presence.disconnect(1, "phone"))
+        self.assertEqual(self.presence.online([1]), {1})
+        self.assertTrue(self.presence.disconnect(1, "laptop"))
+        self.assertEqual(self.presence.online([1]), set())
+        # A session that is already gone changes nothing.
+        self.assertFalse(self.presence.disconnect(1, "laptop"))
+
+    def test_sessions_without_heartbeat_expire(self):
+        self.presence.connect(1, "phone")
+        self.presence.connect(1, "laptop")
+
+        self.now += 50
+        self.presence.heartbeat(1, "laptop")
+        self.now += 20
+        # Only the phone missed its heartbeat.
+        self.assertEqual(self.presence.online([1]), {1})
+        self.assertTrue(self.presence.disconnect(1, "laptop"))
+
+        self.presence.connect(2, "phone")
+        self.now += 60
+        self.assertEqual(self.presence.online([2]), set())
+        self.assertTrue(self.presence.connect(2, "phone"))
+
+    def test_typing_is_coalesced_per_conversation(self):
+        self.assertFalse(self.presence.should_announce_typing(1, 10))
+        self.presence.connect(1, "phone")
+
+        self.assertTrue(self.presence.should_announce_typing(1, 10))
+        self.assertFalse(self.presence.should_announce_typing(1, 10))
+        self.assertTrue(self.presence.should_announce_typing(1, 11))
+
+        self.now += 2
+        self.assertFalse(self.presence.should_announce_typing(1, 10))
+        self.now += 1
+        self.assertTrue(self.presence.should_announce_typing(1, 10))
+
+    def test_typing_state_goes_with_the_last_session(self):
+        self.presence.connect(1, "phone")
+        self.assertTrue(self.presence.should_announce_typing(1, 10))
+
+        self.now += 61
+        self.assertFalse(self.presence.should_announce_typing(1, 10))
+        self.assertEqual(self.presence._typing, {})
+        self.presence.connect(1, "phone")
+        self.assertTrue(self.presence.should_announce_typing(1, 10))
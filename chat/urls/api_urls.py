@@ -1,3 +1,17 @@
 from django.urls import path
 
-urlpatterns = []
\ No newline at end of file
+from chat.views import ConversationListView, MarkReadView, MessageListView
+
+urlpatterns = [
+    path("conversations/", ConversationListView.as_view(), name="conversations"),
+    path(
+        "conversations/<int:conversation_id>/messages/",
+        MessageListView.as_view(),
+        name="conversation-messages",
+    ),
+    path(
+        "conversations/<int:conversation_id>/read/",
+        MarkReadView.as_view(),
+        name="conversation-read",
+    ),
+]
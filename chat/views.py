@@ -1,3 +1,194 @@
-from django.shortcuts import render
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from accounts.views import ExceptionHandlerMixin
+from chat.exceptions import NotAParticipantError, NotFriendsError
+from chat.models import Conversation, Message, Participant
+from chat.serializers import CreateConversationSerializer, SendMessageSerializer
+from chat.services import mark_read, send_message
+from friendship.models import Friend
+from utils.handle_error_message import get_first_error
+from utils.pagination import get_page_size, keyset_chunks, keyset_page
+from utils.streaming import streaming_response, wants_stream
+
+User = get_user_model()
+
+
+class ConversationListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = CreateConversationSerializer
+
+    def get(self, request):
+        memberships = (
+            Participant.objects.filter(user=request.user)
+            .select_related("conversation")
+            .prefetch_related("conversation__participants")
+        )
+        content = [
+            {
+                "id": membership.conversation.id,
+                "participants": [
+                    {"id": user.id, "username": user.username}
+                    for user in membership.conversation.participants.all()
+                ],
+                "unread_count": membership.unread_count,
+                "created": membership.conversation.created,
+            }
+            for membership in memberships
+        ]
+
+        response_content = {
+            "status": True,
+            "message": _("Conversations retrieved successfully."),
+            "data": content,
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        other = User.objects.filter(username=serializer.validated_data["username"]).first()
+        if other is None:
+            response_content = {
+                "status": False,
+                "message": _("User account does not exist."),
+            }
+            return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+        if not Friend.objects.are_friends(request.user, other):
+            response_content = {
+                "status": False,
+                "message": _("You can only chat with your friends."),
+            }
+            return Response(response_content, status=status.HTTP_403_FORBIDDEN)
+
+        conversation, created = Conversation.objects.get_or_create_direct(
+            request.user, other
+        )
+
+        response_content = {
+            "status": True,
+            "message": _("Conversation ready."),
+            "data": {"id": conversation.id},
+        }
+        return Response(
+            response_content,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+
+class MessageListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = SendMessageSerializer
+
+    def get(self, request, conversation_id):
+        """
+        Newest messages first; ``next`` loads the page of older ones. With
+        ``stream=1`` every message older than ``cursor`` is streamed in one
+        response instead.
+        """
+        if not Participant.objects.filter(
+            conversation_id=conversation_id, user=request.user
+        ).exists():
+            response_content = {
+                "status": False,
+                "message": _("You are not a participant of this conversation."),
+            }
+            return Response(response_content, status=status.HTTP_403_FORBIDDEN)
+
+        qs = Message.objects.filter(conversation_id=conversation_id)
+        stream = wants_stream(request)
+
+        try:
+            if stream:
+                chunks = keyset_chunks(qs, ("created", "id"), request.query_params.get("cursor"))
+            else:
+                messages, next_cursor = keyset_page(
+                    qs,
+                    ("created", "id"),
+                    cursor=request.query_params.get("cursor"),
+                    limit=get_page_size(request, default=50, maximum=200),
+                )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        if stream:
+            return streaming_response(
+                request,
+                _("Messages retrieved successfully."),
+                (message.to_event()["message"] for messages in chunks for message in messages),
+                data={"next": None},
+            )
+
+        content = {
+            "next": next_cursor,
+            "results": [message.to_event()["message"] for message in messages],
+        }
+
+        response_content = {
+            "status": True,
+            "message": _("Messages retrieved successfully."),
+            "data": content,
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request, conversation_id):
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            message = send_message(
+                request.user, conversation_id, serializer.validated_data["content"]
+            )
+        except (NotAParticipantError, NotFriendsError) as e:
+            response_content = {
+                "status": False,
+                "message": str(e),
+            }
+            return Response(response_content, status=status.HTTP_403_FORBIDDEN)
+
+        response_content = {
+            "status": True,
+            "message": _("Message sent."),
+            "data": message.to_event()["message"],
+        }
+        return Response(response_content, status=status.HTTP_202_ACCEPTED)
+
+
+class MarkReadView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, conversation_id):
+        if not mark_read(request.user, conversation_id):
+            response_content = {
+                "status": False,
+                "message": _("You are not a participant of this conversation."),
+            }
+            return Response(response_content, status=status.HTTP_403_FORBIDDEN)
+
+        response_content = {
+            "status": True,
+            "message": _("Conversation marked as read."),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
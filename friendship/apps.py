@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FriendshipConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'friendship'
+
+    def ready(self):
+        import friendship.checks  # noqa
@@ -0,0 +1,104 @@
+"""
+Versioned per-user cache of the friendship graph around one user: friend
+ids plus pending outgoing and incoming request ids.
+
+Invalidation bumps a per-user version instead of deleting keys, so a reader
+racing with a writer can at worst repopulate a key nobody will read again.
+Versions start from the clock, so a version key that was evicted never
+comes back pointing at an old graph.
+
+Invalidation only reaches the processes that share the cache. With
+several workers, point CACHE_ALIAS at Redis or memcached. A per-process
+LocMemCache keeps graphs for LOCAL_TIMEOUT seconds only, so another
+worker may serve a stale graph for that long; ``check --deploy`` warns
+about it.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+DEFAULTS = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 3600,
+    "LOCAL_TIMEOUT": 5,
+}
+
+
+def graph_cache_setting(name):
+    return getattr(settings, "FRIENDSHIP_GRAPH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[graph_cache_setting("CACHE_ALIAS")]
+
+
+def is_process_local(cache):
+    return isinstance(cache, LocMemCache)
+
+
+def _timeout(cache):
+    if is_process_local(cache):
+        return graph_cache_setting("LOCAL_TIMEOUT")
+    return graph_cache_setting("TIMEOUT")
+
+
+def _version_key(user_id):
+    return f"friendship:version:{user_id}"
+
+
+def _graph_key(user_id, version):
+    return f"friendship:graph:{user_id}:{version}"
+
+
+def _build_graph(user_id):
+    from friendship.models import Friend, FriendshipRequest
+
+    return {
+        "friends": frozenset(
+            Friend.objects.filter(to_user=user_id).values_list("from_user", flat=True)
+        ),
+        "outgoing": frozenset(
+            FriendshipRequest.objects.filter(
+                from_user=user_id, rejected__isnull=True
+            ).values_list("to_user", flat=True)
+        ),
+        "incoming": frozenset(
+            FriendshipRequest.objects.filter(
+                to_user=user_id, rejected__isnull=True
+            ).values_list("from_user", flat=True)
+        ),
+    }
+
+
+def get_graph(user_id):
+    cache = _cache()
+    version = cache.get_or_set(_version_key(user_id), time.time_ns, None)
+    key = _graph_key(user_id, version)
+
+    graph = cache.get(key)
+    if graph is None:
+        graph = _build_graph(user_id)
+        cache.set(key, graph, _timeout(cache))
+    return graph
+
+
+def get_friend_ids(user_id):
+    return get_graph(user_id)["friends"]
+
+
+def invalidate(*user_ids):
+    """Drop the cached graphs of ``user_ids`` once the transaction commits."""
+
+    def bump():
+        cache = _cache()
+        for user_id in user_ids:
+            try:
+                cache.incr(_version_key(user_id))
+            except ValueError:
+                cache.set(_version_key(user_id), time.time_ns(), None)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,18 @@
+from django.core.checks import Tags, Warning, register
+
+from friendship.cache import _cache, graph_cache_setting, is_process_local
+
+
+@register(Tags.caches, deploy=True)
+def check_graph_cache(app_configs, **kwargs):
+    if not is_process_local(_cache()):
+        return []
+    return [
+        Warning(
+            f"The friendship graph cache {graph_cache_setting('CACHE_ALIAS')!r} is local "
+            "to each process, so workers can serve graphs that another worker has "
+            f"invalidated for up to {graph_cache_setting('LOCAL_TIMEOUT')} seconds.",
+            hint="Set REDIS_URL, or point FRIENDSHIP_GRAPH_CACHE['CACHE_ALIAS'] at a shared cache.",
+            id="friendship.W001",
+        )
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friendship', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='friend',
+            index=models.Index(fields=['to_user', 'created', 'id'], name='friend_list_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:04
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+import django.db.models.functions.comparison
+
+
+def drop_mirrored_requests(apps, schema_editor):
+    """Keep only the oldest request of each pair that exists in both directions."""
+    FriendshipRequest = apps.get_model("friendship", "FriendshipRequest")
+    mirrored = FriendshipRequest.objects.filter(
+        from_user=OuterRef("to_user"), to_user=OuterRef("from_user")
+    )
+
+    seen = set()
+    duplicates = []
+    for request in FriendshipRequest.objects.filter(Exists(mirrored)).order_by("created", "id"):
+        pair = frozenset((request.from_user_id, request.to_user_id))
+        if pair in seen:
+            duplicates.append(request.id)
+        seen.add(pair)
+
+    FriendshipRequest.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friendship', '0002_friend_list_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_mirrored_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='friendshiprequest',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Least('from_user', 'to_user'), django.db.models.functions.comparison.Greatest('from_user', 'to_user'), name='friendship_request_pair_unique'),
+        ),
+    ]
@@ -1,14 +1,23 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Least
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from accounts.models import Profile
+from friendship import cache as friendship_cache
 from friendship.exceptions import AlreadyFriendsError, AlreadyExistsError
 
 User = get_user_model()
 
+FRIEND = "friend"
+REQUEST_SENT = "request_sent"
+REQUEST_RECEIVED = "request_received"
+NONE = "none"
+
 
 class FriendshipRequest(models.Model):
     from_user = models.ForeignKey(
@@ -30,29 +39,56 @@ class FriendshipRequest(models.Model):
         verbose_name = _("friendship request")
         verbose_name_plural = _("friendship request")
         unique_together = ("from_user", "to_user")
+        constraints = [
+            models.UniqueConstraint(
+                Least("from_user", "to_user"),
+                Greatest("from_user", "to_user"),
+                name="friendship_request_pair_unique",
+            ),
+        ]
 
     def __str__(self):
         return f"User {self.from_user_id} friendship requested {self.to_user_id}"
 
     def accept(self):
-        Friend.objects.create(from_user=self.from_user, to_user=self.to_user)
-        Friend.objects.create(from_user=self.to_user, to_user=self.from_user)
-
-        self.delete()
-
-        FriendshipRequest.objects.filter(
-            from_user=self.to_user, to_user=self.from_user
-        ).delete()
+        """
+        Turn the request into a friendship in one transaction. Deleting the
+        requests in both directions first makes concurrent accepts serialize
+        on those rows: the loser deletes nothing and returns False.
+        """
+        try:
+            with transaction.atomic():
+                deleted, _rows = FriendshipRequest.objects.filter(
+                    Q(from_user=self.from_user_id, to_user=self.to_user_id)
+                    | Q(from_user=self.to_user_id, to_user=self.from_user_id)
+                ).delete()
+                if not deleted:
+                    return False
+
+                Friend.objects.bulk_create([
+                    Friend(from_user_id=self.from_user_id, to_user_id=self.to_user_id),
+                    Friend(from_user_id=self.to_user_id, to_user_id=self.from_user_id),
+                ])
+
+                Profile.objects.filter(
+                    user__in=[self.from_user_id, self.to_user_id]
+                ).update(friend_count=F("friend_count") + 1)
+
+                friendship_cache.invalidate(self.from_user_id, self.to_user_id)
+        except IntegrityError:
+            raise AlreadyFriendsError(_("Users are already friends."))
 
         return True
 
     def reject(self):
         self.rejected = timezone.now()
         self.save()
+        friendship_cache.invalidate(self.from_user_id, self.to_user_id)
         return True
 
     def cancel(self):
         self.delete()
+        friendship_cache.invalidate(self.from_user_id, self.to_user_id)
         return True
 
     def mark_viewed(self):
@@ -89,45 +125,63 @@ class FriendshipManager(models.Manager):
         if self.are_friends(from_user, to_user):
             raise AlreadyFriendsError(_("Users are already friends."))
 
-        if FriendshipRequest.objects.filter(
-            from_user=from_user, to_user=to_user
-        ).exists():
-            raise AlreadyExistsError(_("You already requested friendship from this user."))
-
-        if FriendshipRequest.objects.filter(
-            from_user=to_user, to_user=from_user
-        ).exists():
+        # A single constraint covers both directions of a pair, so concurrent
+        # requests cannot both get in and no existence checks are needed.
+        try:
+            with transaction.atomic():
+                request = FriendshipRequest.objects.create(
+                    from_user=from_user, to_user=to_user, content=message
+                )
+        except IntegrityError:
+            if FriendshipRequest.objects.filter(
+                from_user=from_user, to_user=to_user
+            ).exists():
+                raise AlreadyExistsError(_("You already requested friendship from this user."))
             raise AlreadyExistsError(_("This user already requested friendship from you."))
 
-        request, created = FriendshipRequest.objects.get_or_create(
-            from_user=from_user, to_user=to_user
-        )
-
-        if created is False:
-            raise AlreadyExistsError(_("Friendship already requested."))
-
-        request.message = message
-        request.save()
+        friendship_cache.invalidate(from_user.pk, to_user.pk)
         return request
 
     def remove_friend(self, from_user, to_user):
-        qs = Friend.objects.filter(
-            to_user__in=[to_user, from_user],
-            from_user__in=[from_user, to_user],
-        )
+        with transaction.atomic():
+            deleted, _rows = Friend.objects.filter(
+                to_user__in=[to_user, from_user],
+                from_user__in=[from_user, to_user],
+            ).delete()
+
+            if not deleted:
+                return False
 
-        if qs:
-            qs.delete()
-            return True
-        else:
-            return False
+            Profile.objects.filter(
+                user__in=[from_user, to_user], friend_count__gt=0
+            ).update(friend_count=F("friend_count") - 1)
+
+            friendship_cache.invalidate(from_user.pk, to_user.pk)
+
+        return True
 
     def are_friends(self, user1, user2):
-        try:
-            Friend.objects.get(to_user=user1, from_user=user2)
-            return True
-        except Friend.DoesNotExist:
-            return False
+        return user2.pk in friendship_cache.get_friend_ids(user1.pk)
+
+    def friendship_status(self, viewer, users):
+        """
+        Map each of ``users`` (instances or ids) to FRIEND, REQUEST_SENT,
+        REQUEST_RECEIVED or NONE as seen by ``viewer``. Everything comes from
+        the viewer's cached graph: no query per user, none on a warm cache.
+        """
+        graph = friendship_cache.get_graph(viewer.pk)
+        statuses = {}
+        for user in users:
+            user_id = getattr(user, "pk", user)
+            if user_id in graph["friends"]:
+                statuses[user_id] = FRIEND
+            elif user_id in graph["outgoing"]:
+                statuses[user_id] = REQUEST_SENT
+            elif user_id in graph["incoming"]:
+                statuses[user_id] = REQUEST_RECEIVED
+            else:
+                statuses[user_id] = NONE
+        return statuses
 
     def _friendship_request_select_related(self, qs, *fields):
         strategy = getattr(
@@ -153,6 +207,9 @@ class Friend(models.Model):
         verbose_name = _("friend")
         verbose_name_plural = _("friend")
         unique_together = ("from_user", "to_user")
+        indexes = [
+            models.Index(fields=["to_user", "created", "id"], name="friend_list_idx"),
+        ]
 
     def __str__(self):
         return f"User {self.to_user_id} is friends with {self.from_user_id}"
@@ -1,3 +1,307 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Profile
+from friendship.checks import check_graph_cache
+from friendship.exceptions import AlreadyExistsError
+from friendship.models import FRIEND, NONE, REQUEST_RECEIVED, REQUEST_SENT, Friend, FriendshipRequest
+
+User = get_user_model()
+
+
+class ConcurrentFriendshipTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+
+    def run_concurrently(self, func):
+        """Run ``func(i)`` in several threads released at the same moment."""
+        barrier = threading.Barrier(self.threads)
+        results = [None] * self.threads
+
+        def target(i):
+            try:
+                barrier.wait()
+                results[i] = func(i)
+            except Exception as e:
+                results[i] = e
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def assertNoUnexpectedErrors(self, results, *expected):
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(result, expected):
+                # SQLite serializes writers with a database-wide lock instead
+                # of row locks, so contention may surface as "locked" errors.
+                if connection.vendor == "sqlite" and isinstance(result, OperationalError):
+                    continue
+                raise result
+
+    def test_concurrent_accept_creates_one_friendship(self):
+        request = FriendshipRequest.objects.create(from_user=self.alice, to_user=self.bob)
+
+        results = self.run_concurrently(lambda i: request.accept())
+
+        self.assertNoUnexpectedErrors(results)
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Friend.objects.count(), 2)
+        self.assertTrue(Friend.objects.are_friends(self.alice, self.bob))
+        self.assertFalse(FriendshipRequest.objects.exists())
+        self.assertEqual(
+            list(Profile.objects.values_list("friend_count", flat=True)), [1, 1]
+        )
+
+    def test_concurrent_requests_in_both_directions(self):
+        users = (self.alice, self.bob)
+
+        results = self.run_concurrently(
+            lambda i: Friend.objects.add_friend(users[i % 2], users[(i + 1) % 2])
+        )
+
+        self.assertNoUnexpectedErrors(results, AlreadyExistsError)
+        self.assertEqual(
+            len([r for r in results if isinstance(r, FriendshipRequest)]), 1
+        )
+        self.assertEqual(FriendshipRequest.objects.count(), 1)
+
+    def test_concurrent_remove_friend_decrements_once(self):
+        FriendshipRequest.objects.create(from_user=self.alice, to_user=self.bob).accept()
+
+        results = self.run_concurrently(
+            lambda i: Friend.objects.remove_friend(self.alice, self.bob)
+        )
+
+        self.assertNoUnexpectedErrors(results)
+        self.assertEqual(results.count(True), 1)
+        self.assertFalse(Friend.objects.exists())
+        self.assertEqual(
+            list(Profile.objects.values_list("friend_count", flat=True)), [0, 0]
+        )
+
+
+class FriendListTests(TestCase):
+    url = "/api/friendship/friend-list/"
+
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.friends = [
+            User.objects.create_user(f"friend{i}@example.com", "Passw0rd1", username=f"friend{i}")
+            for i in range(7)
+        ]
+        # Pairs of friendships made in the same microsecond, so pages break
+        # between rows that only differ by id.
+        now = timezone.now()
+        Friend.objects.bulk_create([
+            Friend(from_user=friend, to_user=self.alice, created=now - timedelta(seconds=i // 2))
+            for i, friend in enumerate(self.friends)
+        ])
+        self.client.force_login(self.alice)
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()["data"]
+            seen += [friend["username"] for friend in data["results"]]
+            cursor = data["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), len(self.friends))
+        self.assertEqual(set(seen), {friend.username for friend in self.friends})
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-a-cursor", "WyJ4Il0="):
+            response = self.client.get(self.url, {"cursor": cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["message"], "Invalid cursor.")
+
+    def test_stream(self):
+        response = self.client.get(self.url, {"stream": 1})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(b"".join(response.streaming_content))["data"]
+
+        paged = self.client.get(self.url, {"limit": 100}).json()["data"]["results"]
+        self.assertEqual(data["results"], paged)
+        self.assertIsNone(data["next"])
+
+
+class SearchUserTests(TestCase):
+    url = "/api/friendship/search-user/"
+
+    def setUp(self):
+        caches["default"].clear()
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.users = {
+            username: User.objects.create_user(f"{username}@example.com", "Passw0rd1", username=username)
+            for username in ("Mark", "marco", "MARY", "martin", "maxine", "bob")
+        }
+        User.objects.create_user("marvin@example.com", "Passw0rd1", username="marvin", is_active=False)
+        self.client.force_login(self.alice)
+
+    def search(self, prefix, **params):
+        response = self.client.get(self.url + prefix, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_prefix_match_ignores_case(self):
+        for prefix in ("mar", "MAR", "mAr"):
+            usernames = [user["username"] for user in self.search(prefix)["results"]]
+            self.assertEqual(usernames, ["marco", "Mark", "martin", "MARY"])
+        self.assertEqual(self.search("z")["results"], [])
+        self.assertEqual(len(self.search("m")["results"]), 5)
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        seen, cursor = [], None
+        while True:
+            data = self.search("m", limit=2, **({"cursor": cursor} if cursor else {}))
+            seen += [user["username"] for user in data["results"]]
+            cursor = data["next"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, ["marco", "Mark", "martin", "MARY", "maxine"])
+
+    def test_friendship_status(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Friend.objects.add_friend(self.alice, self.users["Mark"]).accept()
+            Friend.objects.add_friend(self.alice, self.users["marco"])
+            Friend.objects.add_friend(self.users["MARY"], self.alice)
+
+        statuses = {user["username"]: user["friendship"] for user in self.search("mar")["results"]}
+        self.assertEqual(statuses, {
+            "Mark": FRIEND,
+            "marco": REQUEST_SENT,
+            "MARY": REQUEST_RECEIVED,
+            "martin": NONE,
+        })
+
+    def test_blank_username(self):
+        response = self.client.get(self.url + "%20")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "Username cannot be blank.")
+
+
+class FriendCountTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        self.carol = User.objects.create_user("carol@example.com", "Passw0rd1", username="carol")
+
+    def counts(self):
+        return dict(Profile.objects.values_list("user__username", "friend_count"))
+
+    def test_add_and_remove(self):
+        Friend.objects.add_friend(self.alice, self.bob).accept()
+        Friend.objects.add_friend(self.carol, self.alice).accept()
+        self.assertEqual(self.counts(), {"alice": 2, "bob": 1, "carol": 1})
+
+        self.assertTrue(Friend.objects.remove_friend(self.bob, self.alice))
+        self.assertEqual(self.counts(), {"alice": 1, "bob": 0, "carol": 1})
+
+        # Removing a friendship that is gone changes nothing.
+        self.assertFalse(Friend.objects.remove_friend(self.alice, self.bob))
+        self.assertEqual(self.counts(), {"alice": 1, "bob": 0, "carol": 1})
+
+        self.client.force_login(self.alice)
+        data = self.client.get("/api/friendship/friend-list/").json()["data"]
+        self.assertEqual(data["count"], 1)
+        self.assertEqual([friend["username"] for friend in data["results"]], ["carol"])
+
+
+class GraphCacheTests(TestCase):
+    def setUp(self):
+        # Ids are reused between tests, and so would be their cached graphs.
+        caches["default"].clear()
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        self.carol = User.objects.create_user("carol@example.com", "Passw0rd1", username="carol")
+        self.dave = User.objects.create_user("dave@example.com", "Passw0rd1", username="dave")
+
+    def status(self, viewer, user):
+        return Friend.objects.friendship_status(viewer, [user])[user.pk]
+
+    def test_friendship_status(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Friend.objects.add_friend(self.alice, self.bob).accept()
+            Friend.objects.add_friend(self.alice, self.carol)
+            Friend.objects.add_friend(self.dave, self.alice)
+
+        users = [self.bob, self.carol.pk, self.dave, self.alice]
+        expected = {
+            self.bob.pk: FRIEND,
+            self.carol.pk: REQUEST_SENT,
+            self.dave.pk: REQUEST_RECEIVED,
+            self.alice.pk: NONE,
+        }
+        self.assertEqual(Friend.objects.friendship_status(self.alice, users), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(Friend.objects.friendship_status(self.alice, users), expected)
+
+    def test_invalidated_on_accept_and_remove(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            request = Friend.objects.add_friend(self.alice, self.bob)
+        self.assertEqual(self.status(self.alice, self.bob), REQUEST_SENT)
+        self.assertEqual(self.status(self.bob, self.alice), REQUEST_RECEIVED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            request.accept()
+        self.assertEqual(self.status(self.alice, self.bob), FRIEND)
+        self.assertEqual(self.status(self.bob, self.alice), FRIEND)
+        self.assertTrue(Friend.objects.are_friends(self.alice, self.bob))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Friend.objects.remove_friend(self.bob, self.alice)
+        self.assertEqual(self.status(self.alice, self.bob), NONE)
+        self.assertEqual(self.status(self.bob, self.alice), NONE)
+        self.assertFalse(Friend.objects.are_friends(self.alice, self.bob))
+
+    def test_invalidated_on_cancel(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            request = Friend.objects.add_friend(self.alice, self.bob)
+        self.assertEqual(self.status(self.bob, self.alice), REQUEST_RECEIVED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            request.cancel()
+        self.assertEqual(self.status(self.alice, self.bob), NONE)
+        self.assertEqual(self.status(self.bob, self.alice), NONE)
+
+    def test_process_local_cache_expires(self):
+        self.assertEqual(self.status(self.alice, self.bob), NONE)
+        # A change made by another process: nothing here is invalidated.
+        Friend.objects.bulk_create([
+            Friend(from_user=self.alice, to_user=self.bob),
+            Friend(from_user=self.bob, to_user=self.alice),
+        ])
+        self.assertEqual(self.status(self.alice, self.bob), NONE)
+
+        caches["default"].clear()
+        with override_settings(FRIENDSHIP_GRAPH_CACHE={"LOCAL_TIMEOUT": 0}):
+            self.assertEqual(self.status(self.alice, self.bob), FRIEND)
+            with self.assertNumQueries(3):
+                self.status(self.alice, self.bob)
+
+    def test_deploy_check(self):
+        self.assertEqual([error.id for error in check_graph_cache(None)], ["friendship.W001"])
+        with override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        }):
+            self.assertEqual(check_graph_cache(None), [])
@@ -1,5 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from accounts.models import Profile
+from accounts.views import ExceptionHandlerMixin
+from chat.presence import get_presence
+from friendship.models import Friend
+from utils.pagination import get_page_size, keyset_chunks, keyset_page
+from utils.streaming import streaming_response, wants_stream
+
+User = get_user_model()
+
 
 class SendFriendRequestView(APIView):
     pass
@@ -17,9 +31,134 @@ class AcceptRejectRequestView(APIView):
     pass
 
 
-class SearchUserView(APIView):
-    pass
+class SearchUserView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
 
+    def get(self, request, username):
+        username = username.strip()
+        if not username:
+            response_content = {
+                "status": False,
+                "message": _("Username cannot be blank."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
 
-class ShowFriendsView(APIView):
-    pass
+        qs = (
+            User.objects.search(username)
+            .exclude(id=request.user.id)
+            .select_related("user_profile")
+        )
+
+        try:
+            users, next_cursor = keyset_page(
+                qs,
+                ("username_lower", "id"),
+                cursor=request.query_params.get("cursor"),
+                limit=get_page_size(request, maximum=50),
+                descending=False,
+            )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        statuses = Friend.objects.friendship_status(request.user, users)
+        content = {
+            "next": next_cursor,
+            "results": [
+                {
+                    "id": user.id,
+                    "username": user.username,
+                    "avatar": request.build_absolute_uri(
+                        user.user_profile.avatar_url(40)
+                    ),
+                    "friendship": statuses[user.id],
+                }
+                for user in users
+            ],
+        }
+
+        response_content = {
+            "status": True,
+            "message": _("Users retrieved successfully."),
+            "data": content,
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class ShowFriendsView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def friend_to_dict(self, friend, online):
+        return {
+            "id": friend.from_user.id,
+            "username": friend.from_user.username,
+            "avatar": self.request.build_absolute_uri(
+                friend.from_user.user_profile.avatar_url(40)
+            ),
+            "online": friend.from_user_id in online,
+            "created": friend.created,
+        }
+
+    def get(self, request):
+        """
+        A page of friends, newest first. With ``stream=1`` every friend
+        after ``cursor`` is streamed in one response instead.
+        """
+        qs = Friend.objects.filter(to_user=request.user).select_related(
+            "from_user__user_profile"
+        )
+        stream = wants_stream(request)
+
+        try:
+            if stream:
+                chunks = keyset_chunks(qs, ("created", "id"), request.query_params.get("cursor"))
+            else:
+                friends, next_cursor = keyset_page(
+                    qs,
+                    ("created", "id"),
+                    cursor=request.query_params.get("cursor"),
+                    limit=get_page_size(request),
+                )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        friend_count = (
+            Profile.objects.filter(user=request.user)
+            .values_list("friend_count", flat=True)
+            .first()
+        )
+
+        if stream:
+            def results():
+                for friends in chunks:
+                    online = get_presence().online([friend.from_user_id for friend in friends])
+                    for friend in friends:
+                        yield self.friend_to_dict(friend, online)
+
+            return streaming_response(
+                request,
+                _("Friends retrieved successfully."),
+                results(),
+                data={"count": friend_count or 0, "next": None},
+            )
+
+        online = get_presence().online([friend.from_user_id for friend in friends])
+        content = {
+            "count": friend_count or 0,
+            "next": next_cursor,
+            "results": [self.friend_to_dict(friend, online) for friend in friends],
+        }
+
+        response_content = {
+            "status": True,
+            "message": _("Friends retrieved successfully."),
+            "data": content,
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from mailer.models import QueuedEmail
+
+
+class QueuedEmailAdmin(admin.ModelAdmin):
+    model = QueuedEmail
+    list_display = ("subject", "to", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    fieldsets = (
+        (None, {"fields": ("subject", "body", "html_body", "from_email", "to")}),
+        (
+            "Delivery",
+            {"fields": ("status", "attempts", "next_attempt_at", "last_error", "created", "sent")},
+        ),
+    )
+
+
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
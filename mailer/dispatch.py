@@ -0,0 +1,166 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from mailer.models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DISPATCHER": "mailer.dispatch.ThreadPoolDispatcher",
+    "BATCH_SIZE": 50,
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 60,
+    "LEASE_SECONDS": 300,
+    "THREAD_POOL_WORKERS": 1,
+}
+
+
+def mailer_setting(name):
+    return getattr(settings, "MAILER", {}).get(name, DEFAULTS[name])
+
+
+class BaseDispatcher:
+    """
+    Decides when queued emails get delivered. ``notify`` is called once the
+    transaction that queued new mail has committed.
+    """
+
+    def notify(self):
+        raise NotImplementedError
+
+
+class QueueDispatcher(BaseDispatcher):
+    """Leave delivery to the ``send_queued_mail`` worker command."""
+
+    def notify(self):
+        pass
+
+
+class ThreadPoolDispatcher(BaseDispatcher):
+    """Deliver from a background thread pool, for single-process deployments."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=mailer_setting("THREAD_POOL_WORKERS"),
+            thread_name_prefix="mailer",
+        )
+
+    def notify(self):
+        self.executor.submit(self._run)
+
+    def _run(self):
+        try:
+            while send_batch():
+                pass
+        except Exception:
+            logger.exception("Failed to deliver queued email.")
+        finally:
+            close_old_connections()
+
+
+class ImmediateDispatcher(BaseDispatcher):
+    """Deliver inside the calling thread, mostly useful in tests."""
+
+    def notify(self):
+        while send_batch():
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_dispatcher():
+    return import_string(mailer_setting("DISPATCHER"))()
+
+
+def enqueue_mail(subject, message, from_email, recipient_list, html_message=None):
+    email = QueuedEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or "",
+        from_email=from_email,
+        to=list(recipient_list),
+    )
+    transaction.on_commit(get_dispatcher().notify)
+    return email
+
+
+def _claim_batch(batch_size):
+    """
+    Lease a batch of due emails so concurrent workers never pick the same rows.
+    An email whose sender dies mid-batch becomes due again when the lease expires.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        qs = QueuedEmail.objects.filter(
+            status=QueuedEmail.Status.PENDING, next_attempt_at__lte=now
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        batch = list(qs[:batch_size])
+        QueuedEmail.objects.filter(id__in=[e.id for e in batch]).update(
+            next_attempt_at=now + timedelta(seconds=mailer_setting("LEASE_SECONDS"))
+        )
+    return batch
+
+
+def _build_message(email, mail_connection):
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        email.to,
+        connection=mail_connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def send_batch(batch_size=None):
+    """
+    Deliver one batch of due emails over a single backend connection.
+    Returns the number of emails that were attempted.
+    """
+    batch = _claim_batch(batch_size or mailer_setting("BATCH_SIZE"))
+    if not batch:
+        return 0
+
+    max_attempts = mailer_setting("MAX_ATTEMPTS")
+    backoff = mailer_setting("RETRY_BACKOFF")
+
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as e:
+        logger.warning("Could not open mail connection: %s", e)
+
+    try:
+        for email in batch:
+            email.attempts += 1
+            try:
+                _build_message(email, mail_connection).send()
+            except Exception as e:
+                email.last_error = str(e)
+                if email.attempts >= max_attempts:
+                    email.status = QueuedEmail.Status.FAILED
+                else:
+                    delay = backoff * 2 ** (email.attempts - 1)
+                    email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            else:
+                email.status = QueuedEmail.Status.SENT
+                email.sent = timezone.now()
+                email.last_error = ""
+    finally:
+        mail_connection.close()
+
+    QueuedEmail.objects.bulk_update(
+        batch, ["status", "attempts", "next_attempt_at", "last_error", "sent"]
+    )
+    return len(batch)
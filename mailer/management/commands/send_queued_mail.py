@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailer.dispatch import send_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails in batches over a reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the due emails and exit instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = send_batch(options["batch_size"])
+            if sent:
+                self.stdout.write(f"Attempted {sent} email(s).")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
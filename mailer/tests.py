@@ -0,0 +1,81 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from mailer.dispatch import _claim_batch, enqueue_mail, get_dispatcher, send_batch
+from mailer.models import QueuedEmail
+
+
+@override_settings(MAILER={
+    "DISPATCHER": "mailer.dispatch.ImmediateDispatcher",
+    "MAX_ATTEMPTS": 3,
+    "RETRY_BACKOFF": 60,
+    "LEASE_SECONDS": 300,
+})
+class MailerTests(TestCase):
+    def setUp(self):
+        get_dispatcher.cache_clear()
+        self.addCleanup(get_dispatcher.cache_clear)
+
+    def enqueue(self, **kwargs):
+        return enqueue_mail(
+            "Welcome", "Hello", "noreply@example.com", ["alice@example.com"], **kwargs
+        )
+
+    def test_delivered_once_the_transaction_commits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            email = self.enqueue(html_message="<p>Hello</p>")
+            self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["alice@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Hello</p>", "text/html")])
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.Status.SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent)
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        email = self.enqueue()
+        send = mock.patch(
+            "mailer.dispatch.EmailMultiAlternatives.send", side_effect=SMTPException("down")
+        )
+
+        for attempt, delay in [(1, 60), (2, 120)]:
+            started = timezone.now()
+            with send:
+                self.assertEqual(send_batch(), 1)
+            email.refresh_from_db()
+            self.assertEqual(email.status, QueuedEmail.Status.PENDING)
+            self.assertEqual(email.attempts, attempt)
+            self.assertEqual(email.last_error, "down")
+            self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=delay))
+            self.assertLess(email.next_attempt_at, timezone.now() + timedelta(seconds=delay))
+
+            # Not due again before the backoff is over.
+            self.assertEqual(send_batch(), 0)
+            QueuedEmail.objects.update(next_attempt_at=timezone.now())
+
+        with send:
+            send_batch()
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.Status.FAILED)
+        self.assertEqual(email.attempts, 3)
+        self.assertEqual(mail.outbox, [])
+
+    def test_expired_lease_is_claimed_again(self):
+        email = self.enqueue()
+        # A worker claims the email and dies before sending it.
+        self.assertEqual(_claim_batch(10), [email])
+        self.assertEqual(send_batch(), 0)
+
+        later = timezone.now() + timedelta(seconds=301)
+        with mock.patch("mailer.dispatch.timezone.now", return_value=later):
+            self.assertEqual(send_batch(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.Status.SENT)
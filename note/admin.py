@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from note.models import Note
+
+
+class NoteAdmin(admin.ModelAdmin):
+    model = Note
+    list_display = ("title", "owner", "created", "updated")
+    search_fields = ("title",)
+    fieldsets = (
+        (None, {"fields": ("owner", "title", "content", "created")}),
+    )
+
+
+admin.site.register(Note, NoteAdmin)
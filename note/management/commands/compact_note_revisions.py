@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from note.models import NoteRevision
+from note.revisions import compact_revisions
+
+
+class Command(BaseCommand):
+    help = (
+        "Thin out old note revisions to one per time bucket and re-encode the"
+        " remaining deltas against fresh snapshots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=30,
+            help="Only compact revisions older than this many days.",
+        )
+        parser.add_argument(
+            "--keep-every",
+            type=float,
+            default=24,
+            help="Keep the last revision of every bucket of this many hours.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        bucket = timedelta(hours=options["keep_every"])
+
+        note_ids = (
+            NoteRevision.objects.filter(created__lt=cutoff)
+            .values_list("note_id", flat=True)
+            .order_by("note_id")
+            .distinct()
+        )
+
+        notes, removed = 0, 0
+        for note_id in list(note_ids):
+            count = compact_revisions(note_id, cutoff, bucket)
+            if count:
+                notes += 1
+                removed += count
+
+        self.stdout.write(f"Removed {removed} revision(s) from {notes} note(s).")
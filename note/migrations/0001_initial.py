@@ -0,0 +1,69 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(
+            "ALTER TABLE note_note ADD FULLTEXT INDEX note_fulltext_idx (title, content)"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute("ALTER TABLE note_note DROP INDEX note_fulltext_idx")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(blank=True, max_length=200, verbose_name='title')),
+                ('content', models.TextField(blank=True, verbose_name='content')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='updated')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'note',
+                'verbose_name_plural': 'notes',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotePosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='term')),
+                ('weight', models.FloatField(verbose_name='weight')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='note.note')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'note posting',
+                'verbose_name_plural': 'note postings',
+                'indexes': [models.Index(fields=['owner', 'term'], name='note_posting_term_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='noteposting',
+            constraint=models.UniqueConstraint(fields=('note', 'term'), name='note_posting_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', 'updated', 'id'], name='note_list_idx'),
+        ),
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='number')),
+                ('title', models.CharField(blank=True, max_length=200, verbose_name='title')),
+                ('data', models.BinaryField(verbose_name='data')),
+                ('size', models.PositiveIntegerField(verbose_name='size')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='note.note')),
+                ('snapshot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='deltas', to='note.noterevision')),
+            ],
+            options={
+                'verbose_name': 'note revision',
+                'verbose_name_plural': 'note revisions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='note_revision_unique'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+def number_existing(apps, schema_editor, model_names):
+    """Give rows written before sync existed a place in their owner's sequence."""
+    SyncCounter = apps.get_model("sync", "SyncCounter")
+    counters = dict(SyncCounter.objects.values_list("user_id", "value"))
+
+    for model_name in model_names:
+        model = apps.get_model(*model_name.split("."))
+        for pk, owner_id in model.objects.order_by("pk").values_list("pk", "owner_id"):
+            counters[owner_id] = counters.get(owner_id, 0) + 1
+            model.objects.filter(pk=pk).update(seq=counters[owner_id])
+
+    for user_id, value in counters.items():
+        SyncCounter.objects.update_or_create(user_id=user_id, defaults={"value": value})
+
+
+def number_notes(apps, schema_editor):
+    number_existing(apps, schema_editor, ["note.Note"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('note', '0002_note_revision'),
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='seq',
+            field=models.BigIntegerField(default=0, verbose_name='sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['owner', 'seq'], name='note_sync_idx'),
+        ),
+        migrations.RunPython(number_notes, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,113 @@
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from sync.models import Synced
+
+User = get_user_model()
+
+
+class Note(Synced):
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notes")
+    title = models.CharField(_("title"), max_length=200, blank=True)
+    content = models.TextField(_("content"), blank=True)
+    created = models.DateTimeField(_("created"), default=timezone.now)
+    updated = models.DateTimeField(_("updated"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("note")
+        verbose_name_plural = _("notes")
+        indexes = [
+            models.Index(fields=["owner", "updated", "id"], name="note_list_idx"),
+            models.Index(fields=["owner", "seq"], name="note_sync_idx"),
+        ]
+
+    def __str__(self):
+        return self.title or f"Note {self.id}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_text = instance._text()
+        return instance
+
+    def _text(self):
+        return (self.__dict__.get("title"), self.__dict__.get("content"))
+
+    def text_changed(self):
+        return getattr(self, "_loaded_text", None) != self._text()
+
+    def save(self, *args, **kwargs):
+        self.updated = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "updated" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "updated"]
+
+        super().save(*args, **kwargs)
+        self._loaded_text = self._text()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "content": self.content,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+
+class NotePosting(models.Model):
+    """One term of a note in the inverted index used by InvertedIndexBackend."""
+
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name="postings")
+    # Copied from the note so a search only reads the owner's postings.
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    term = models.CharField(_("term"), max_length=64)
+    weight = models.FloatField(_("weight"))
+
+    class Meta:
+        verbose_name = _("note posting")
+        verbose_name_plural = _("note postings")
+        constraints = [
+            models.UniqueConstraint(fields=["note", "term"], name="note_posting_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["owner", "term"], name="note_posting_term_idx"),
+        ]
+
+
+class NoteRevision(models.Model):
+    """
+    One saved state of a note. Snapshots hold the zlib-compressed content;
+    every other revision holds a compressed delta against its snapshot, so
+    rebuilding any revision reads at most two rows.
+    """
+
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name="revisions")
+    number = models.PositiveIntegerField(_("number"))
+    snapshot = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="deltas",
+    )
+    title = models.CharField(_("title"), max_length=200, blank=True)
+    data = models.BinaryField(_("data"))
+    size = models.PositiveIntegerField(_("size"))
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("note revision")
+        verbose_name_plural = _("note revisions")
+        constraints = [
+            models.UniqueConstraint(fields=["note", "number"], name="note_revision_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.note_id}@{self.number}"
+
+    @property
+    def is_snapshot(self):
+        return self.snapshot_id is None
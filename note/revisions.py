@@ -0,0 +1,184 @@
+"""
+Revision history for notes.
+
+Every save that changes a note's text records a revision. Most revisions
+store a line delta against the note's latest snapshot, compressed with
+zlib. A full snapshot is taken every NOTE_REVISIONS["SNAPSHOT_INTERVAL"]
+revisions, or sooner when a delta would exceed SNAPSHOT_RATIO of the
+compressed content. Deltas never chain, so rebuilding a revision decodes
+one snapshot and at most one delta whatever the length of the history.
+"""
+
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+
+from note.models import NoteRevision
+
+DEFAULTS = {
+    "SNAPSHOT_INTERVAL": 50,
+    "SNAPSHOT_RATIO": 0.5,
+}
+
+
+def revisions_setting(name):
+    return getattr(settings, "NOTE_REVISIONS", {}).get(name, DEFAULTS[name])
+
+
+def encode_delta(base, text):
+    """
+    Line edit script turning ``base`` into ``text``: ``[start, end]`` copies
+    base lines, a string is inserted as is.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return json.dumps(ops, separators=(",", ":")).encode()
+
+
+def apply_delta(base, delta):
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        "".join(base_lines[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in json.loads(delta)
+    )
+
+
+def _decompress(data):
+    return zlib.decompress(data).decode()
+
+
+def _encode(content, number, base, base_content):
+    """
+    Return ``(snapshot, data)`` for storing ``content`` as revision
+    ``number``, given the latest snapshot ``base`` and its content.
+    ``snapshot`` is None when the revision has to be a snapshot itself.
+    """
+    full = zlib.compress(content.encode())
+    if base is None or number - base.number >= revisions_setting("SNAPSHOT_INTERVAL"):
+        return None, full
+
+    delta = zlib.compress(encode_delta(base_content, content))
+    if len(delta) > len(full) * revisions_setting("SNAPSHOT_RATIO"):
+        return None, full
+    return base, delta
+
+
+def revision_content(revision, snapshot=None):
+    """
+    Rebuild the content of a revision. The snapshot is read from
+    ``revision.snapshot`` unless given, so select it along with the revision.
+    """
+    if revision.is_snapshot:
+        return _decompress(revision.data)
+    snapshot = snapshot or revision.snapshot
+    return apply_delta(_decompress(snapshot.data), _decompress(revision.data))
+
+
+def record_revision(note):
+    """
+    Store the current text of a saved note as its next revision.
+
+    Call it in the transaction that saved the note: the UPDATE holds the
+    note's row lock, so concurrent saves of one note number their revisions
+    one after another.
+    """
+    latest = (
+        NoteRevision.objects.filter(note=note)
+        .select_related("snapshot")
+        .order_by("-number")
+        .first()
+    )
+
+    number, base, base_content = 1, None, None
+    if latest is not None:
+        number = latest.number + 1
+        base = latest if latest.is_snapshot else latest.snapshot
+        base_content = _decompress(base.data)
+
+    snapshot, data = _encode(note.content, number, base, base_content)
+    return NoteRevision.objects.create(
+        note=note,
+        number=number,
+        snapshot=snapshot,
+        title=note.title,
+        data=data,
+        size=len(note.content),
+    )
+
+
+def get_revision(note, number):
+    """
+    Return revision ``number`` of the note with its rebuilt text in
+    ``content``. Raises NoteRevision.DoesNotExist.
+    """
+    revision = NoteRevision.objects.select_related("snapshot").get(note=note, number=number)
+    revision.content = revision_content(revision)
+    return revision
+
+
+def compact_revisions(note_id, cutoff, bucket):
+    """
+    Keep only the last revision in each ``bucket`` (a timedelta) of the
+    note's history before ``cutoff``, and re-encode the revisions that
+    remain against a fresh snapshot sequence. Revision numbers are kept.
+    Returns the number of revisions removed.
+    """
+    with transaction.atomic():
+        revisions = list(
+            NoteRevision.objects.select_for_update().filter(note_id=note_id).order_by("number")
+        )
+        if not revisions:
+            return 0
+
+        seconds = bucket.total_seconds()
+        last_in_bucket = {}
+        for revision in revisions:
+            if revision.created < cutoff:
+                last_in_bucket[revision.created.timestamp() // seconds] = revision.id
+
+        last_ids = set(last_in_bucket.values())
+        kept = [
+            revision
+            for revision in revisions
+            if revision.created >= cutoff or revision.id in last_ids
+        ]
+        if len(kept) == len(revisions):
+            return 0
+
+        snapshots = {revision.id: revision for revision in revisions if revision.is_snapshot}
+        contents = {
+            revision.id: revision_content(revision, snapshots.get(revision.snapshot_id))
+            for revision in kept
+        }
+
+        changed = []
+        base, base_content = None, None
+        for revision in kept:
+            snapshot, data = _encode(contents[revision.id], revision.number, base, base_content)
+            if snapshot is None:
+                base, base_content = revision, contents[revision.id]
+
+            snapshot_id = snapshot.id if snapshot is not None else None
+            if snapshot_id != revision.snapshot_id or data != bytes(revision.data):
+                revision.snapshot = snapshot
+                revision.data = data
+                changed.append(revision)
+
+        # Repoint the survivors first: deleting a snapshot cascades to the
+        # deltas still based on it.
+        NoteRevision.objects.bulk_update(changed, ["snapshot", "data"], batch_size=500)
+        kept_ids = {revision.id for revision in kept}
+        removed = [revision.id for revision in revisions if revision.id not in kept_ids]
+        NoteRevision.objects.filter(id__in=removed).delete()
+        return len(removed)
@@ -0,0 +1,192 @@
+"""
+Full-text search over notes.
+
+The backend is chosen by NOTE_SEARCH["BACKEND"]. Left unset, MySQL uses the
+InnoDB FULLTEXT index on title and content, which the database keeps up to
+date by itself. Every other database uses InvertedIndexBackend. That
+backend keeps a term -> note table in sync on each save, so a query only
+reads the postings of its own terms.
+
+Queries match any of their terms. Notes matching more terms rank first,
+then notes with the higher TF-IDF score.
+"""
+
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from note.models import Note, NotePosting
+
+DEFAULTS = {
+    "BACKEND": None,
+    "MAX_RESULTS": 50,
+}
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TERM_LENGTH = 64
+TITLE_BOOST = 2
+
+
+def search_setting(name):
+    return getattr(settings, "NOTE_SEARCH", {}).get(name, DEFAULTS[name])
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower())
+        if len(token) > 1
+    ]
+
+
+def term_weights(note):
+    """Log-scaled term frequencies of a note, with title terms counted double."""
+    frequencies = Counter(tokenize(note.content))
+    for term in tokenize(note.title):
+        frequencies[term] += TITLE_BOOST
+    return {term: 1 + math.log(count) for term, count in frequencies.items()}
+
+
+class BaseSearchBackend:
+    def index(self, note):
+        """Bring the index up to date with a saved note."""
+        raise NotImplementedError
+
+    def index_many(self, notes):
+        for note in notes:
+            self.index(note)
+
+    def remove(self, note):
+        """Drop a deleted note from the index."""
+        raise NotImplementedError
+
+    def search(self, owner, query, limit):
+        """Return up to ``limit`` of the owner's notes, best match first."""
+        raise NotImplementedError
+
+
+class InvertedIndexBackend(BaseSearchBackend):
+    def index(self, note):
+        weights = term_weights(note)
+        postings = {
+            posting.term: posting
+            for posting in NotePosting.objects.filter(note=note).only("id", "term", "weight")
+        }
+
+        changed = []
+        for term, weight in weights.items():
+            posting = postings.get(term)
+            if posting is not None and posting.weight != weight:
+                posting.weight = weight
+                changed.append(posting)
+
+        with transaction.atomic():
+            stale = postings.keys() - weights.keys()
+            if stale:
+                NotePosting.objects.filter(note=note, term__in=stale).delete()
+            NotePosting.objects.bulk_create([
+                NotePosting(note_id=note.id, owner_id=note.owner_id, term=term, weight=weight)
+                for term, weight in weights.items()
+                if term not in postings
+            ])
+            NotePosting.objects.bulk_update(changed, ["weight"])
+
+    def index_many(self, notes, batch_size=1000):
+        """Index notes from scratch, e.g. after a bulk import."""
+        notes = list(notes)
+        with transaction.atomic():
+            NotePosting.objects.filter(note__in=notes).delete()
+            NotePosting.objects.bulk_create(
+                (
+                    NotePosting(note_id=note.id, owner_id=note.owner_id, term=term, weight=weight)
+                    for note in notes
+                    for term, weight in term_weights(note).items()
+                ),
+                batch_size=batch_size,
+            )
+
+    def remove(self, note):
+        # Postings go with the note through the foreign key cascade.
+        pass
+
+    def search(self, owner, query, limit):
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        postings = NotePosting.objects.filter(owner=owner, term__in=terms)
+        document_frequency = dict(
+            postings.order_by().values("term").annotate(n=Count("id")).values_list("term", "n")
+        )
+        if not document_frequency:
+            return []
+
+        total = Note.objects.filter(owner=owner).count()
+        score = Sum(
+            Case(
+                *[
+                    When(term=term, then=F("weight") * math.log(1 + total / n))
+                    for term, n in document_frequency.items()
+                ],
+                output_field=FloatField(),
+            )
+        )
+        ranked = list(
+            postings.order_by()
+            .values("note")
+            .annotate(matched=Count("id"), score=score)
+            .order_by("-matched", "-score", "-note")[:limit]
+        )
+
+        notes = Note.objects.in_bulk([row["note"] for row in ranked])
+        results = []
+        for row in ranked:
+            note = notes[row["note"]]
+            note.score = row["score"]
+            results.append(note)
+        return results
+
+
+class FullTextBackend(BaseSearchBackend):
+    """
+    MySQL FULLTEXT search. Needs the note_fulltext_idx index that the note
+    migrations create on MySQL.
+    """
+
+    def index(self, note):
+        pass
+
+    def remove(self, note):
+        pass
+
+    def search(self, owner, query, limit):
+        if not tokenize(query):
+            return []
+
+        score = RawSQL(
+            "MATCH (title, content) AGAINST (%s IN NATURAL LANGUAGE MODE)", (query,)
+        )
+        return list(
+            Note.objects.filter(owner=owner)
+            .annotate(score=score)
+            .filter(score__gt=0)
+            .order_by("-score", "-id")[:limit]
+        )
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    backend = search_setting("BACKEND")
+    if backend is None:
+        if connection.vendor == "mysql":
+            backend = "note.search.FullTextBackend"
+        else:
+            backend = "note.search.InvertedIndexBackend"
+    return import_string(backend)()
@@ -0,0 +1,30 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+
+class NoteSerializer(serializers.Serializer):
+    title = serializers.CharField(
+        max_length=200,
+        required=False,
+        allow_blank=True,
+        error_messages={
+            "max_length": _("Title cannot be longer than 200 characters."),
+        },
+    )
+    content = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        trim_whitespace=False,
+    )
+
+    def validate(self, attrs):
+        if not self.partial and not (attrs.get("title") or attrs.get("content")):
+            raise serializers.ValidationError(_("Note cannot be empty."))
+        return attrs
+
+
+class NoteSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(error_messages={
+        "required": _("Search query is required."),
+        "blank": _("Search query cannot be blank."),
+    })
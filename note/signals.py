@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from note.models import Note
+from note.revisions import record_revision
+from note.search import get_search_backend
+from sync.services import deleted_with_owner, record_deletions
+
+
+@receiver(post_save, sender=Note)
+def index_note(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.text_changed():
+        get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=Note)
+def record_note_revision(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.text_changed():
+        record_revision(instance)
+
+
+@receiver(post_delete, sender=Note)
+def unindex_note(sender, instance, **kwargs):
+    get_search_backend().remove(instance)
+
+
+@receiver(post_delete, sender=Note)
+def record_note_deletion(sender, instance, origin=None, **kwargs):
+    if deleted_with_owner(origin, instance.owner_id):
+        return
+    record_deletions(instance.owner_id, "note", [instance.id])
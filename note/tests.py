@@ -1,3 +1,140 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from note.models import Note, NotePosting, NoteRevision
+from note.revisions import compact_revisions, get_revision
+from note.search import InvertedIndexBackend
+
+User = get_user_model()
+
+
+class InvertedIndexTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        self.backend = InvertedIndexBackend()
+
+    def search(self, query, owner=None):
+        return [note.title for note in self.backend.search(owner or self.alice, query, 10)]
+
+    def test_index_follows_edits(self):
+        note = Note.objects.create(owner=self.alice, title="Groceries", content="milk eggs")
+        self.assertEqual(self.search("milk"), ["Groceries"])
+
+        note.content = "bread eggs"
+        note.save()
+        self.assertEqual(self.search("milk"), [])
+        self.assertEqual(self.search("bread"), ["Groceries"])
+        self.assertEqual(
+            set(NotePosting.objects.values_list("term", flat=True)),
+            {"groceries", "bread", "eggs"},
+        )
+
+        note.delete()
+        self.assertFalse(NotePosting.objects.exists())
+
+    def test_unchanged_text_is_not_reindexed(self):
+        note = Note.objects.create(owner=self.alice, title="Groceries", content="milk")
+
+        with CaptureQueriesContext(connection) as queries:
+            note.save(update_fields=["title"])
+
+        self.assertFalse(
+            [query for query in queries if "note_noteposting" in query["sql"]]
+        )
+
+    def test_ranking(self):
+        Note.objects.create(owner=self.alice, title="one term", content="python")
+        Note.objects.create(owner=self.alice, title="both terms", content="python django")
+        Note.objects.create(owner=self.alice, title="repeated", content="python python python")
+        Note.objects.create(owner=self.bob, title="other owner", content="python django")
+
+        self.assertEqual(self.search("django python"), ["both terms", "repeated", "one term"])
+        self.assertEqual(self.search("django", owner=self.bob), ["other owner"])
+        self.assertEqual(self.search("?!"), [])
+
+
+@override_settings(NOTE_REVISIONS={"SNAPSHOT_INTERVAL": 4, "SNAPSHOT_RATIO": 0.5})
+class RevisionTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.lines = [f"line {i} of a fairly long note\n" for i in range(50)]
+        self.note = Note.objects.create(owner=user, title="Draft", content="".join(self.lines))
+        self.versions = [self.note.content]
+
+        for i in range(9):
+            self.lines[i * 5] = f"edit {i}\n"
+            self.note.content = "".join(self.lines)
+            self.note.save()
+            self.versions.append(self.note.content)
+
+    def assertVersions(self):
+        for number, content in enumerate(self.versions, start=1):
+            if NoteRevision.objects.filter(note=self.note, number=number).exists():
+                self.assertEqual(get_revision(self.note, number).content, content)
+
+    def test_deltas_against_periodic_snapshots(self):
+        self.assertEqual(
+            list(
+                NoteRevision.objects.filter(snapshot=None).values_list("number", flat=True)
+            ),
+            [1, 5, 9],
+        )
+        self.assertVersions()
+
+        with self.assertNumQueries(1):
+            get_revision(self.note, 8)
+
+    def test_unchanged_text_records_no_revision(self):
+        self.note.save()
+        self.assertEqual(self.note.revisions.count(), 10)
+
+    def test_compaction(self):
+        start = (timezone.now() - timedelta(days=10)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        for revision in NoteRevision.objects.all():
+            revision.created = start + timedelta(hours=revision.number * 6)
+            revision.save(update_fields=["created"])
+
+        removed = compact_revisions(self.note.id, timezone.now(), timedelta(days=1))
+
+        self.assertEqual(removed, 7)
+        self.assertEqual(
+            list(self.note.revisions.values_list("number", "snapshot__number")),
+            [(3, None), (7, None), (10, 7)],
+        )
+        self.assertVersions()
+
+
+class NoteAPITests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        token = Token.objects.create(user=user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+
+    def test_crud_and_search(self):
+        response = self.client.post(
+            "/api/note/notes/", {"title": "Trip", "content": "Pack the tent"}
+        )
+        self.assertEqual(response.status_code, 201)
+        note_id = response.json()["data"]["id"]
+
+        response = self.client.patch(
+            f"/api/note/notes/{note_id}/", {"content": "Pack the stove"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json()["data"]["title"], "Trip")
+
+        results = self.client.get("/api/note/notes/search/", {"q": "stove"}).json()["data"]
+        self.assertEqual([result["id"] for result in results], [note_id])
+        self.assertEqual(self.client.get("/api/note/notes/search/", {"q": "tent"}).json()["data"], [])
+
+        self.assertEqual(self.client.delete(f"/api/note/notes/{note_id}/").status_code, 200)
+        self.assertEqual(self.client.get(f"/api/note/notes/{note_id}/").status_code, 404)
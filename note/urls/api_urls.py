@@ -1,3 +1,27 @@
 from django.urls import path
 
-urlpatterns = []
\ No newline at end of file
+from note.views import (
+    NoteDetailView,
+    NoteListView,
+    NoteRevisionDetailView,
+    NoteRevisionListView,
+    NoteSearchView,
+    NoteSyncView,
+)
+
+urlpatterns = [
+    path("notes/", NoteListView.as_view(), name="notes"),
+    path("notes/search/", NoteSearchView.as_view(), name="note-search"),
+    path("sync/", NoteSyncView.as_view(), name="note-sync"),
+    path("notes/<int:note_id>/", NoteDetailView.as_view(), name="note-detail"),
+    path(
+        "notes/<int:note_id>/revisions/",
+        NoteRevisionListView.as_view(),
+        name="note-revisions",
+    ),
+    path(
+        "notes/<int:note_id>/revisions/<int:number>/",
+        NoteRevisionDetailView.as_view(),
+        name="note-revision-detail",
+    ),
+]
@@ -1,3 +1,252 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from accounts.views import ExceptionHandlerMixin
+from note.models import Note, NoteRevision
+from note.revisions import get_revision
+from note.search import get_search_backend, search_setting
+from note.serializers import NoteSearchSerializer, NoteSerializer
+from sync.views import SyncView
+from utils.handle_error_message import get_first_error
+from utils.pagination import get_page_size, keyset_page
+
+
+def note_summary(note):
+    return {
+        "id": note.id,
+        "title": note.title,
+        "created": note.created,
+        "updated": note.updated,
+    }
+
+
+class NoteListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = NoteSerializer
+
+    def get(self, request):
+        """Most recently updated notes first, without their content."""
+        try:
+            notes, next_cursor = keyset_page(
+                Note.objects.filter(owner=request.user).defer("content"),
+                ("updated", "id"),
+                cursor=request.query_params.get("cursor"),
+                limit=get_page_size(request),
+            )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        response_content = {
+            "status": True,
+            "message": _("Notes retrieved successfully."),
+            "data": {
+                "next": next_cursor,
+                "results": [note_summary(note) for note in notes],
+            },
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            note = Note.objects.create(owner=request.user, **serializer.validated_data)
+
+        response_content = {
+            "status": True,
+            "message": _("Note created successfully."),
+            "data": note.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_201_CREATED)
+
+
+class NoteDetailView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = NoteSerializer
+
+    def not_found(self):
+        response_content = {
+            "status": False,
+            "message": _("Note does not exist."),
+        }
+        return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+    def get(self, request, note_id):
+        note = Note.objects.filter(id=note_id, owner=request.user).first()
+        if note is None:
+            return self.not_found()
+
+        response_content = {
+            "status": True,
+            "message": _("Note retrieved successfully."),
+            "data": note.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def put(self, request, note_id):
+        return self.update(request, note_id, partial=False)
+
+    def patch(self, request, note_id):
+        return self.update(request, note_id, partial=True)
+
+    def update(self, request, note_id, partial):
+        serializer = self.serializer_class(data=request.data, partial=partial)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        note = Note.objects.filter(id=note_id, owner=request.user).first()
+        if note is None:
+            return self.not_found()
+
+        fields = ["title", "content"] if not partial else list(serializer.validated_data)
+        for field in fields:
+            setattr(note, field, serializer.validated_data.get(field, ""))
+        with transaction.atomic():
+            note.save(update_fields=fields)
+
+        response_content = {
+            "status": True,
+            "message": _("Note updated successfully."),
+            "data": note.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def delete(self, request, note_id):
+        with transaction.atomic():
+            deleted, _rows = Note.objects.filter(id=note_id, owner=request.user).delete()
+        if not deleted:
+            return self.not_found()
+
+        response_content = {
+            "status": True,
+            "message": _("Note deleted successfully."),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class NoteRevisionListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, note_id):
+        """Newest revisions first, without their content."""
+        if not Note.objects.filter(id=note_id, owner=request.user).exists():
+            response_content = {
+                "status": False,
+                "message": _("Note does not exist."),
+            }
+            return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            revisions, next_cursor = keyset_page(
+                NoteRevision.objects.filter(note_id=note_id).defer("data"),
+                ("number",),
+                cursor=request.query_params.get("cursor"),
+                limit=get_page_size(request),
+            )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        response_content = {
+            "status": True,
+            "message": _("Revisions retrieved successfully."),
+            "data": {
+                "next": next_cursor,
+                "results": [
+                    {
+                        "number": revision.number,
+                        "title": revision.title,
+                        "size": revision.size,
+                        "created": revision.created,
+                    }
+                    for revision in revisions
+                ],
+            },
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class NoteRevisionDetailView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, note_id, number):
+        note = Note.objects.filter(id=note_id, owner=request.user).only("id").first()
+
+        try:
+            revision = get_revision(note, number) if note is not None else None
+        except NoteRevision.DoesNotExist:
+            revision = None
+        if revision is None:
+            response_content = {
+                "status": False,
+                "message": _("Revision does not exist."),
+            }
+            return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+        response_content = {
+            "status": True,
+            "message": _("Revision retrieved successfully."),
+            "data": {
+                "number": revision.number,
+                "title": revision.title,
+                "content": revision.content,
+                "created": revision.created,
+            },
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class NoteSearchView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = NoteSearchSerializer
+
+    def get(self, request):
+        serializer = self.serializer_class(data=request.query_params)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        notes = get_search_backend().search(
+            request.user,
+            serializer.validated_data["q"],
+            get_page_size(request, maximum=search_setting("MAX_RESULTS")),
+        )
+
+        response_content = {
+            "status": True,
+            "message": _("Search completed successfully."),
+            "data": [{**note_summary(note), "score": note.score} for note in notes],
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class NoteSyncView(SyncView):
+    def get_sources(self, request):
+        return {"note": (Note.objects.filter(owner=request.user), Note.to_dict)}
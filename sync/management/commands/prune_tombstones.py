@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from sync.models import SyncCounter, Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old tombstones. Clients whose sync cursor is older than the"
+        " pruned tombstones are told to sync from the beginning."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=90,
+            help="Delete tombstones older than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        old = Tombstone.objects.filter(created__lt=cutoff)
+
+        with transaction.atomic():
+            horizons = old.order_by().values("user").annotate(seq=Max("seq"))
+            for row in horizons:
+                SyncCounter.objects.filter(user_id=row["user"]).update(
+                    horizon=Greatest("horizon", row["seq"])
+                )
+            deleted, _rows = old.delete()
+
+        self.stdout.write(f"Deleted {deleted} tombstone(s).")
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class SyncCounter(models.Model):
+    """The last change sequence number handed out for a user."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="sync_counter"
+    )
+    value = models.BigIntegerField(_("value"), default=0)
+    # Tombstones up to this sequence number have been pruned; clients behind
+    # it cannot catch up incrementally.
+    horizon = models.BigIntegerField(_("horizon"), default=0)
+
+    class Meta:
+        verbose_name = _("sync counter")
+        verbose_name_plural = _("sync counters")
+
+
+class Tombstone(models.Model):
+    """Marks a synced record as deleted at a point in the change sequence."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(_("kind"), max_length=32)
+    object_id = models.BigIntegerField(_("object id"))
+    seq = models.BigIntegerField(_("sequence"))
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("tombstone")
+        verbose_name_plural = _("tombstones")
+        indexes = [
+            models.Index(fields=["user", "seq"], name="sync_tombstone_seq_idx"),
+        ]
+
+
+class Synced(models.Model):
+    """
+    Base for models that clients sync incrementally. Every save stamps the
+    row with the owner's next change sequence number. Subclasses need an
+    ``owner`` foreign key and should index (owner, seq).
+    """
+
+    seq = models.BigIntegerField(_("sequence"), default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from sync.services import allocate
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "seq" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "seq"]
+
+        with transaction.atomic():
+            self.seq = allocate(self.owner_id)
+            super().save(*args, **kwargs)
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from note.models import Note
+from sync.models import SyncCounter, Tombstone
+from todo.models import TodoItem, TodoList
+
+User = get_user_model()
+
+
+class OwnerDeletionTests(TransactionTestCase):
+    # Foreign keys are only checked on commit, so this needs real transactions.
+    def setUp(self):
+        self.alice = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        self.bob = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        for user in (self.alice, self.bob):
+            Note.objects.create(owner=user, title="Groceries", content="milk")
+            todo_list = TodoList.objects.create(owner=user, title="Chores")
+            TodoItem.objects.create(todo_list=todo_list, owner=user, title="dishes", position="i")
+
+    def test_delete_user_with_synced_records(self):
+        self.alice.delete()
+
+        self.assertFalse(User.objects.filter(email="alice@example.com").exists())
+        self.assertEqual(Note.objects.count(), 1)
+        self.assertEqual(TodoList.objects.count(), 1)
+        self.assertEqual(TodoItem.objects.count(), 1)
+        self.assertEqual(list(SyncCounter.objects.values_list("user", flat=True)), [self.bob.pk])
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_delete_users_through_a_queryset(self):
+        User.objects.filter(pk=self.alice.pk).delete()
+
+        self.assertFalse(Note.objects.filter(owner_id=self.alice.pk).exists())
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_deleting_records_still_leaves_tombstones(self):
+        Note.objects.filter(owner=self.alice).delete()
+        TodoList.objects.get(owner=self.alice).delete()
+
+        self.assertEqual(
+            sorted(Tombstone.objects.filter(user=self.alice).values_list("kind", flat=True)),
+            ["note", "todo_item", "todo_list"],
+        )
@@ -0,0 +1,81 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.views import ExceptionHandlerMixin
+from sync.services import changes_since, horizon, iter_changes_since
+from utils.pagination import get_page_size
+from utils.streaming import streaming_response, wants_stream
+
+
+class SyncView(ExceptionHandlerMixin, APIView):
+    """
+    ``GET ?since=<seq>`` returns the changes a client has not seen yet, oldest
+    first. The client stores ``next`` and passes it as ``since`` until
+    ``more`` is false. With ``stream=1`` every change is streamed in one
+    response, e.g. for the first sync of a device.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get_sources(self, request):
+        """Map each kind of record to ``(queryset, to_dict)``."""
+        raise NotImplementedError
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get("since", 0))
+        except ValueError:
+            since = -1
+        if since < 0:
+            response_content = {
+                "status": False,
+                "message": _("Invalid sync cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        if since and since < horizon(request.user.pk):
+            response_content = {
+                "status": False,
+                "message": _("Sync cursor has expired, sync from the beginning."),
+            }
+            return Response(response_content, status=status.HTTP_410_GONE)
+
+        if wants_stream(request):
+            return self.stream(request, since)
+
+        changes, more = changes_since(
+            request.user.pk,
+            since,
+            get_page_size(request, default=200, maximum=1000),
+            self.get_sources(request),
+        )
+
+        response_content = {
+            "status": True,
+            "message": _("Changes retrieved successfully."),
+            "data": {
+                "changes": changes,
+                "next": changes[-1]["seq"] if changes else since,
+                "more": more,
+            },
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def stream(self, request, since):
+        last = {"seq": since}
+
+        def results():
+            for change in iter_changes_since(request.user.pk, since, self.get_sources(request)):
+                last["seq"] = change["seq"]
+                yield change
+
+        return streaming_response(
+            request,
+            _("Changes retrieved successfully."),
+            results(),
+            results_key="changes",
+            tail=lambda: {"next": last["seq"], "more": False},
+        )
@@ -1,3 +1,32 @@
 from django.contrib import admin
 
-# Register your models here.
+from todo.models import TodoItem, TodoList, TodoReminder
+
+
+class TodoItemInline(admin.TabularInline):
+    model = TodoItem
+    extra = 0
+    fields = ("title", "completed", "due", "position")
+    ordering = ("position", "id")
+
+    def has_add_permission(self, request, obj=None):
+        # Items are created through the API, which assigns their position.
+        return False
+
+
+class TodoListAdmin(admin.ModelAdmin):
+    model = TodoList
+    list_display = ("title", "owner", "created")
+    inlines = (TodoItemInline,)
+
+
+admin.site.register(TodoList, TodoListAdmin)
+
+
+class TodoReminderAdmin(admin.ModelAdmin):
+    model = TodoReminder
+    list_display = ("item", "owner", "remind_at", "recurrence", "next_fire_at")
+    raw_id_fields = ("item", "owner")
+
+
+admin.site.register(TodoReminder, TodoReminderAdmin)
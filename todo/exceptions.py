@@ -0,0 +1,11 @@
+from rest_framework import status
+
+
+class OperationError(Exception):
+    """A batch operation that cannot be applied; the batch is rolled back."""
+
+    def __init__(self, message, code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.index = None
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from todo.reminders import fire_due_reminders
+
+
+class Command(BaseCommand):
+    help = "Send due todo reminders in batches over a reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30.0,
+            help="Seconds to sleep when no reminder is due.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send the due reminders and exit instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            fired = fire_due_reminders(options["batch_size"])
+            if fired:
+                self.stdout.write(f"Fired {fired} reminder(s).")
+                continue
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
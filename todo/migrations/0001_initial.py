@@ -0,0 +1,49 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TodoList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='title')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todo_lists', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'todo list',
+                'verbose_name_plural': 'todo lists',
+            },
+        ),
+        migrations.CreateModel(
+            name='TodoItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='title')),
+                ('completed', models.DateTimeField(blank=True, null=True, verbose_name='completed')),
+                ('position', models.CharField(max_length=255, verbose_name='position')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now, verbose_name='updated')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todo_items', to=settings.AUTH_USER_MODEL)),
+                ('todo_list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='todo.todolist')),
+            ],
+            options={
+                'verbose_name': 'todo item',
+                'verbose_name_plural': 'todo items',
+                'indexes': [models.Index(fields=['todo_list', 'position', 'id'], name='todo_item_order_idx')],
+            },
+        ),
+    ]
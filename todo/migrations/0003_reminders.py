@@ -0,0 +1,41 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('todo', '0002_sync_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='todoitem',
+            name='due',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='due'),
+        ),
+        migrations.CreateModel(
+            name='TodoReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('remind_at', models.DateTimeField(verbose_name='remind at')),
+                ('recurrence', models.CharField(blank=True, max_length=200, verbose_name='recurrence')),
+                ('occurrence', models.PositiveIntegerField(default=0, verbose_name='occurrence')),
+                ('next_fire_at', models.DateTimeField(blank=True, null=True, verbose_name='next fire at')),
+                ('last_fired_at', models.DateTimeField(blank=True, null=True, verbose_name='last fired at')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='todo.todoitem')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='todo_reminders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'todo reminder',
+                'verbose_name_plural': 'todo reminders',
+                'indexes': [models.Index(fields=['next_fire_at'], name='todo_reminder_due_idx')],
+            },
+        ),
+    ]
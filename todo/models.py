@@ -1,3 +1,105 @@
+from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+from sync.models import Synced
+
+User = get_user_model()
+
+POSITION_MAX_LENGTH = 255
+
+
+class TodoList(Synced):
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="todo_lists")
+    title = models.CharField(_("title"), max_length=200)
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("todo list")
+        verbose_name_plural = _("todo lists")
+        indexes = [
+            models.Index(fields=["owner", "seq"], name="todo_list_sync_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "created": self.created,
+        }
+
+
+class TodoItem(Synced):
+    todo_list = models.ForeignKey(TodoList, on_delete=models.CASCADE, related_name="items")
+    # Copied from the list so ownership checks need no join.
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="todo_items")
+    title = models.CharField(_("title"), max_length=200)
+    completed = models.DateTimeField(_("completed"), blank=True, null=True)
+    due = models.DateTimeField(_("due"), blank=True, null=True)
+    # Lexicographic key from todo.ordering; items sort by (position, id).
+    position = models.CharField(_("position"), max_length=POSITION_MAX_LENGTH)
+    created = models.DateTimeField(_("created"), default=timezone.now)
+    updated = models.DateTimeField(_("updated"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("todo item")
+        verbose_name_plural = _("todo items")
+        indexes = [
+            models.Index(fields=["todo_list", "position", "id"], name="todo_item_order_idx"),
+            models.Index(fields=["owner", "seq"], name="todo_item_sync_idx"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "list": self.todo_list_id,
+            "title": self.title,
+            "completed": self.completed,
+            "due": self.due,
+            "position": self.position,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+
+class TodoReminder(models.Model):
+    item = models.ForeignKey(TodoItem, on_delete=models.CASCADE, related_name="reminders")
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="todo_reminders")
+    # The first occurrence; later ones follow from ``recurrence``.
+    remind_at = models.DateTimeField(_("remind at"))
+    # A todo.recurrence rule, blank for a one-off reminder.
+    recurrence = models.CharField(_("recurrence"), max_length=200, blank=True)
+    # Number of the occurrence at next_fire_at, counting remind_at as 0.
+    occurrence = models.PositiveIntegerField(_("occurrence"), default=0)
+    # Null once the reminder has nothing left to fire.
+    next_fire_at = models.DateTimeField(_("next fire at"), blank=True, null=True)
+    last_fired_at = models.DateTimeField(_("last fired at"), blank=True, null=True)
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("todo reminder")
+        verbose_name_plural = _("todo reminders")
+        indexes = [
+            models.Index(fields=["next_fire_at"], name="todo_reminder_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} @ {self.remind_at}"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "item": self.item_id,
+            "remind_at": self.remind_at,
+            "recurrence": self.recurrence,
+            "next_fire_at": self.next_fire_at,
+            "last_fired_at": self.last_fired_at,
+            "created": self.created,
+        }
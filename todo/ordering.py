@@ -0,0 +1,63 @@
+"""
+Lexicographic ordering keys for todo items.
+
+A key is a base-36 fraction between 0 and 1, written as its digits after
+the point. Between any two keys there is always room for another, so moving
+an item rewrites its own key and nothing else. Keys never end in "0",
+otherwise "x" and "x0" would be equal and nothing would fit between them.
+
+Only digits and lowercase letters are used, so keys sort the same under
+binary and case-insensitive collations.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def _midpoint(a, b):
+    """Key strictly between fractions ``a`` and ``b``; ``b`` None means 1."""
+    if b is not None:
+        prefix = 0
+        while prefix < len(b) and (a[prefix] if prefix < len(a) else "0") == b[prefix]:
+            prefix += 1
+        if prefix:
+            return b[:prefix] + _midpoint(a[prefix:], b[prefix:])
+
+    low = DIGITS.index(a[0]) if a else 0
+    high = DIGITS.index(b[0]) if b is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def key_between(before=None, after=None):
+    """
+    Return a key sorting after ``before`` and before ``after``. Either may
+    be None for the start or the end of the list.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} does not sort before {after!r}.")
+    return _midpoint(before or "", after)
+
+
+def is_valid_key(key):
+    return bool(key) and not key.endswith("0") and all(c in DIGITS for c in key)
+
+
+def spaced_keys(count):
+    """``count`` increasing keys of equal length, spread evenly over the range."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * step, []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
@@ -0,0 +1,119 @@
+"""
+A subset of RFC 5545 recurrence rules: FREQ of DAILY, WEEKLY, MONTHLY or
+YEARLY, with optional INTERVAL, COUNT and UNTIL, e.g.
+"FREQ=WEEKLY;INTERVAL=2;COUNT=10".
+
+Occurrences are numbered from the first one and computed directly from
+their number, so finding the next one never walks the series. They are
+placed in wall-clock time of the current time zone, so a 9:00 reminder
+stays at 9:00, and monthly ones on the 31st fall on the last day of
+shorter months.
+"""
+
+import calendar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+
+
+def _add_months(value, months):
+    month = value.month - 1 + months
+    year, month = value.year + month // 12, month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def _parse_until(value):
+    for pattern in ("%Y%m%dT%H%M%SZ", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, pattern).replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid UNTIL: {value!r}.")
+
+
+class Recurrence:
+    def __init__(self, freq, interval=1, count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, rule):
+        """Parse a rule string. Raises ValueError for anything unsupported."""
+        parts = {}
+        for part in rule.upper().split(";"):
+            name, sep, value = part.partition("=")
+            name, value = name.strip(), value.strip()
+            if not sep or not value or name in parts:
+                raise ValueError(f"Invalid recurrence rule: {rule!r}.")
+            parts[name] = value
+
+        unknown = parts.keys() - {"FREQ", "INTERVAL", "COUNT", "UNTIL"}
+        if unknown:
+            raise ValueError(f"Unsupported recurrence parts: {', '.join(sorted(unknown))}.")
+        if parts.get("FREQ") not in FREQUENCIES:
+            raise ValueError("FREQ must be DAILY, WEEKLY, MONTHLY or YEARLY.")
+
+        interval = int(parts.get("INTERVAL", 1))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL and COUNT must be positive.")
+        until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+
+        return cls(parts["FREQ"], interval, count, until)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}")
+        return ";".join(parts)
+
+    def occurrence(self, start, n):
+        """Occurrence ``n`` of a series whose occurrence 0 is ``start``."""
+        local = timezone.make_naive(start)
+        steps = n * self.interval
+        if self.freq == "DAILY":
+            local += timedelta(days=steps)
+        elif self.freq == "WEEKLY":
+            local += timedelta(weeks=steps)
+        elif self.freq == "MONTHLY":
+            local = _add_months(local, steps)
+        else:
+            local = _add_months(local, 12 * steps)
+        return timezone.make_aware(local)
+
+    def _estimate(self, start, moment):
+        """Roughly how many occurrences fit between ``start`` and ``moment``."""
+        start, moment = timezone.make_naive(start), timezone.make_naive(moment)
+        if self.freq == "DAILY":
+            return (moment - start).days // self.interval
+        if self.freq == "WEEKLY":
+            return (moment - start).days // (7 * self.interval)
+        months = (moment.year - start.year) * 12 + moment.month - start.month
+        return months // (self.interval * (12 if self.freq == "YEARLY" else 1))
+
+    def next_after(self, start, moment):
+        """
+        Return ``(n, when)`` for the first occurrence after ``moment``, or
+        None once the series has ended.
+        """
+        n = max(0, self._estimate(start, moment))
+        while n > 0 and self.occurrence(start, n - 1) > moment:
+            n -= 1
+        while self.occurrence(start, n) <= moment:
+            n += 1
+
+        when = self.occurrence(start, n)
+        if self.count is not None and n >= self.count:
+            return None
+        if self.until is not None and when > self.until:
+            return None
+        return n, when
@@ -0,0 +1,128 @@
+"""
+Due-date reminders for todo items.
+
+Every reminder row stores the time it fires next in ``next_fire_at``, which
+is indexed, so the worker finds due reminders with a range scan however many
+are pending. Recurring reminders are advanced one occurrence at a time when
+they fire; their series is never expanded ahead.
+
+Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the database
+supports it, so several workers can run side by side. Elsewhere, run a
+single worker.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from mailer.dispatch import enqueue_mail
+from todo.models import TodoItem, TodoReminder
+from todo.recurrence import Recurrence
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BATCH_SIZE": 200,
+}
+
+
+def reminder_setting(name):
+    return getattr(settings, "TODO_REMINDERS", {}).get(name, DEFAULTS[name])
+
+
+def schedule(reminder, now=None):
+    """Point ``next_fire_at`` at the first occurrence not yet past."""
+    now = now or timezone.now()
+    reminder.occurrence, reminder.next_fire_at = 0, reminder.remind_at
+    if reminder.recurrence and reminder.remind_at < now:
+        upcoming = Recurrence.parse(reminder.recurrence).next_after(reminder.remind_at, now)
+        reminder.occurrence, reminder.next_fire_at = upcoming or (0, None)
+
+
+def advance(reminder, now):
+    """
+    Move a reminder that just fired to its next occurrence. Occurrences
+    missed while no worker ran are skipped rather than fired in a burst.
+    """
+    reminder.last_fired_at = reminder.next_fire_at
+    reminder.next_fire_at = None
+    if reminder.recurrence:
+        upcoming = Recurrence.parse(reminder.recurrence).next_after(
+            reminder.remind_at, max(now, reminder.last_fired_at)
+        )
+        if upcoming is not None:
+            reminder.occurrence, reminder.next_fire_at = upcoming
+
+
+def _claim_batch(batch_size):
+    """Take a batch of due reminders and move each to its next occurrence."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = TodoReminder.objects.filter(next_fire_at__lte=now).order_by("next_fire_at")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        batch = list(qs[:batch_size])
+        for reminder in batch:
+            advance(reminder, now)
+        TodoReminder.objects.bulk_update(
+            batch, ["occurrence", "next_fire_at", "last_fired_at"]
+        )
+    return batch
+
+
+def _build_message(item, fired_at, mail_connection):
+    subject = f"[Backbone] Reminder: {item.title}"
+    message = render_to_string(
+        "todo_reminder_email.html",
+        {"item": item, "fired_at": timezone.localtime(fired_at)},
+    )
+    return EmailMessage(
+        subject,
+        message,
+        settings.EMAIL_HOST_USER,
+        [item.owner.email],
+        connection=mail_connection,
+    )
+
+
+def fire_due_reminders(batch_size=None):
+    """
+    Send one batch of due reminders over a single mail connection. Emails
+    that fail go to the mail queue, which retries them. Returns the number
+    of reminders that were due.
+    """
+    batch = _claim_batch(batch_size or reminder_setting("BATCH_SIZE"))
+    if not batch:
+        return 0
+
+    items = (
+        TodoItem.objects.select_related("owner")
+        .only("title", "completed", "due", "owner__email")
+        .in_bulk({reminder.item_id for reminder in batch})
+    )
+
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+    except Exception as e:
+        logger.warning("Could not open mail connection: %s", e)
+
+    try:
+        for reminder in batch:
+            item = items.get(reminder.item_id)
+            if item is None or item.completed is not None:
+                continue
+            message = _build_message(item, reminder.last_fired_at, mail_connection)
+            try:
+                message.send()
+            except Exception as e:
+                logger.warning("Could not send reminder %s: %s", reminder.id, e)
+                enqueue_mail(message.subject, message.body, message.from_email, message.to)
+    finally:
+        mail_connection.close()
+
+    return len(batch)
@@ -0,0 +1,139 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from todo.recurrence import Recurrence
+
+OPERATIONS = ("create", "update", "complete", "delete")
+MAX_BATCH_SIZE = 500
+
+
+class ItemReferenceField(serializers.Field):
+    """
+    An item id, or the ``ref`` of an item created earlier in the same batch.
+    Refs must not be all digits.
+    """
+
+    default_error_messages = {
+        "invalid": _("Item reference must be an id or a ref."),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.isdigit():
+            data = int(data)
+        if isinstance(data, bool) or not isinstance(data, (int, str)) or data == "":
+            self.fail("invalid")
+        return data
+
+    def to_representation(self, value):
+        return value
+
+
+class TodoListSerializer(serializers.Serializer):
+    title = serializers.CharField(
+        max_length=200,
+        error_messages={
+            "required": _("Title is required."),
+            "blank": _("Title cannot be blank."),
+            "max_length": _("Title cannot be longer than 200 characters."),
+        },
+    )
+
+
+class TodoOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(
+        choices=OPERATIONS,
+        error_messages={
+            "required": _("Operation is required."),
+            "invalid_choice": _("Unknown operation."),
+        },
+    )
+    id = ItemReferenceField(required=False)
+    ref = serializers.CharField(
+        required=False,
+        max_length=64,
+        error_messages={
+            "blank": _("Ref cannot be blank."),
+        },
+    )
+    list = serializers.IntegerField(
+        required=False,
+        error_messages={
+            "invalid": _("List must be an id."),
+        },
+    )
+    title = serializers.CharField(
+        required=False,
+        max_length=200,
+        error_messages={
+            "blank": _("Title cannot be blank."),
+            "max_length": _("Title cannot be longer than 200 characters."),
+        },
+    )
+    completed = serializers.BooleanField(required=False)
+    due = serializers.DateTimeField(
+        required=False,
+        allow_null=True,
+        error_messages={
+            "invalid": _("Due must be a date and time."),
+        },
+    )
+    after = ItemReferenceField(required=False, allow_null=True)
+
+    def validate_ref(self, value):
+        if value.isdigit():
+            raise serializers.ValidationError(_("Ref cannot be a number."))
+        return value
+
+    def validate(self, attrs):
+        if attrs["op"] == "create":
+            if "list" not in attrs:
+                raise serializers.ValidationError(_("List is required."))
+            if "title" not in attrs:
+                raise serializers.ValidationError(_("Title is required."))
+        elif "id" not in attrs:
+            raise serializers.ValidationError(_("Item is required."))
+        return attrs
+
+
+class TodoReminderSerializer(serializers.Serializer):
+    remind_at = serializers.DateTimeField(
+        error_messages={
+            "required": _("Reminder time is required."),
+            "null": _("Reminder time is required."),
+            "invalid": _("Reminder time must be a date and time."),
+        },
+    )
+    recurrence = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=200,
+        error_messages={
+            "max_length": _("Recurrence cannot be longer than 200 characters."),
+        },
+    )
+
+    def validate_recurrence(self, value):
+        if not value:
+            return ""
+        try:
+            return str(Recurrence.parse(value))
+        except ValueError:
+            raise serializers.ValidationError(
+                _("Recurrence must be a FREQ=DAILY, WEEKLY, MONTHLY or YEARLY rule "
+                  "with optional INTERVAL, COUNT and UNTIL.")
+            )
+
+
+class TodoBatchSerializer(serializers.Serializer):
+    # Each operation is validated by TodoOperationSerializer in turn, so an
+    # error can name the operation it came from.
+    operations = serializers.ListField(
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE,
+        error_messages={
+            "required": _("Operations are required."),
+            "empty": _("Operations cannot be empty."),
+            "max_length": _("A batch cannot have more than 500 operations."),
+            "not_a_list": _("Operations must be a list."),
+        },
+    )
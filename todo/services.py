@@ -0,0 +1,265 @@
+from bisect import bisect_right, insort
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+
+from sync.services import allocate, record_deletions
+from todo.exceptions import OperationError
+from todo.models import POSITION_MAX_LENGTH, TodoItem, TodoList
+from todo.ordering import key_between, spaced_keys
+
+# Stands in for the id of items that are not inserted yet. They sort after
+# every existing item at the same position, as their ids will.
+NEW_ITEM_SEQUENCE = 1 << 62
+
+APPEND = object()
+
+
+def apply_operations(user, operations):
+    """
+    Apply validated item operations in order, in one transaction, and
+    return one result per operation. Raises OperationError, carrying the
+    index of the failing operation, after rolling everything back.
+    """
+    with transaction.atomic():
+        return Batch(user, operations).apply()
+
+
+class Batch:
+    """
+    Applies a list of operations in memory, then writes the outcome with one
+    DELETE, one bulk INSERT and one bulk UPDATE.
+
+    Item ordering is resolved against the (position, id) pairs of every list
+    the batch touches. The pairs are read up front with one query, so moves
+    and inserts cost no queries of their own.
+    """
+
+    def __init__(self, user, operations):
+        self.user = user
+        self.operations = operations
+        self.now = timezone.now()
+
+        self.refs = {}
+        self.created = []
+        self.updated = {}
+        self.update_fields = set()
+        self.deleted = set()
+        self.respaced = {}
+        self.new_items = 0
+
+    def load(self):
+        item_ids = {
+            value
+            for operation in self.operations
+            for value in (operation.get("id"), operation.get("after"))
+            if isinstance(value, int)
+        }
+        self.items = TodoItem.objects.select_for_update().filter(
+            owner=self.user, id__in=item_ids
+        ).in_bulk()
+
+        list_ids = {operation["list"] for operation in self.operations if "list" in operation}
+        list_ids |= {item.todo_list_id for item in self.items.values()}
+        self.lists = set(
+            TodoList.objects.filter(owner=self.user, id__in=list_ids).values_list("id", flat=True)
+        )
+
+        self.orders = {list_id: [] for list_id in self.lists}
+        for list_id, position, item_id in TodoItem.objects.filter(
+            todo_list_id__in=self.lists
+        ).values_list("todo_list_id", "position", "id"):
+            self.orders[list_id].append((position, item_id))
+        for order in self.orders.values():
+            order.sort()
+
+    def apply(self):
+        self.load()
+
+        results = []
+        for index, operation in enumerate(self.operations):
+            try:
+                results.append(getattr(self, operation["op"])(operation))
+            except OperationError as e:
+                e.index = index
+                raise
+
+        self.write()
+        return [result() if callable(result) else result for result in results]
+
+    def write(self):
+        """Write the outcome, numbering every change in the owner's sync sequence."""
+        respaced = [
+            TodoItem(id=item_id, position=position, updated=self.now)
+            for item_id, position in self.respaced.items()
+        ]
+        changed = [*self.created, *self.updated.values(), *respaced]
+        if changed:
+            seq = allocate(self.user.pk, len(changed))
+            for i, item in enumerate(changed):
+                item.seq = seq + i
+
+        if self.deleted:
+            TodoItem.objects.filter(id__in=self.deleted).delete()
+            record_deletions(self.user.pk, "todo_item", self.deleted)
+
+        if self.created:
+            TodoItem.objects.bulk_create(self.created)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # MySQL does not return the new ids, but each item is the
+                # only one with its owner and sequence number.
+                ids = dict(
+                    TodoItem.objects.filter(
+                        owner=self.user, seq__in=[item.seq for item in self.created]
+                    ).values_list("seq", "id")
+                )
+                for item in self.created:
+                    item.id = ids[item.seq]
+
+        if self.updated:
+            TodoItem.objects.bulk_update(
+                self.updated.values(), [*self.update_fields, "updated", "seq"]
+            )
+
+        if respaced:
+            TodoItem.objects.bulk_update(respaced, ["position", "updated", "seq"])
+
+    def sequence(self, item):
+        return item.id if item.id is not None else item._sequence
+
+    def get_item(self, reference):
+        item = self.items.get(reference) if isinstance(reference, int) else self.refs.get(reference)
+        if item is None:
+            raise OperationError(_("Todo item does not exist."), status.HTTP_404_NOT_FOUND)
+        return item
+
+    def check_list(self, list_id):
+        if list_id not in self.lists:
+            raise OperationError(_("Todo list does not exist."), status.HTTP_404_NOT_FOUND)
+
+    def place(self, item, list_id, after):
+        """Give ``item`` a position in ``list_id`` after the item ``after``."""
+        order = self.orders[list_id]
+
+        if after is APPEND:
+            before, following = (order[-1][0] if order else None), None
+        elif after is None:
+            before, following = None, (order[0][0] if order else None)
+        else:
+            anchor = self.get_item(after)
+            if anchor is item:
+                raise OperationError(_("An item cannot be moved after itself."))
+            if anchor.todo_list_id != list_id:
+                raise OperationError(_("Items must be in the same list."))
+            i = bisect_right(order, (anchor.position, self.sequence(anchor)))
+            before, following = anchor.position, (order[i][0] if i < len(order) else None)
+
+        try:
+            position = key_between(before, following)
+        except ValueError:
+            # Two items share a position, nothing fits between them.
+            position = None
+        if position is None or len(position) > POSITION_MAX_LENGTH:
+            self.respace(list_id)
+            return self.place(item, list_id, after)
+
+        item.todo_list_id = list_id
+        item.position = position
+        insort(order, (position, self.sequence(item)))
+
+    def respace(self, list_id):
+        """Spread the keys of a whole list evenly. Only needed once keys run long."""
+        order = self.orders[list_id]
+        by_sequence = {self.sequence(item): item for item in self.created}
+        by_sequence.update(self.items)
+
+        respaced = []
+        for key, (_position, sequence) in zip(spaced_keys(len(order)), order):
+            item = by_sequence.get(sequence)
+            if item is None:
+                # Not touched by the batch otherwise, only its key changes.
+                self.respaced[sequence] = key
+            else:
+                item.position = key
+                self.mark_updated(item, "position")
+            respaced.append((key, sequence))
+        self.orders[list_id] = respaced
+
+    def unplace(self, item):
+        order = self.orders[item.todo_list_id]
+        order.remove((item.position, self.sequence(item)))
+
+    def mark_updated(self, item, *fields):
+        item.updated = self.now
+        if item.id is not None:
+            self.updated[item.id] = item
+            self.update_fields.update(fields)
+
+    def create(self, operation):
+        self.check_list(operation["list"])
+
+        item = TodoItem(
+            owner=self.user,
+            title=operation["title"],
+            completed=self.now if operation.get("completed") else None,
+            due=operation.get("due"),
+            created=self.now,
+            updated=self.now,
+        )
+        self.new_items += 1
+        item._sequence = NEW_ITEM_SEQUENCE + self.new_items
+        self.place(item, operation["list"], operation.get("after", APPEND))
+
+        self.created.append(item)
+        if "ref" in operation:
+            self.refs[operation["ref"]] = item
+        return lambda: {"op": "create", "ref": operation.get("ref"), "item": item.to_dict()}
+
+    def update(self, operation):
+        item = self.get_item(operation["id"])
+
+        if "title" in operation:
+            item.title = operation["title"]
+            self.mark_updated(item, "title")
+        if "completed" in operation:
+            self.set_completed(item, operation["completed"])
+        if "due" in operation:
+            item.due = operation["due"]
+            self.mark_updated(item, "due")
+        if "list" in operation or "after" in operation:
+            list_id = operation.get("list", item.todo_list_id)
+            self.check_list(list_id)
+            self.unplace(item)
+            self.place(item, list_id, operation.get("after", APPEND))
+            self.mark_updated(item, "todo_list", "position")
+
+        return lambda: {"op": "update", "item": item.to_dict()}
+
+    def complete(self, operation):
+        item = self.get_item(operation["id"])
+        self.set_completed(item, operation.get("completed", True))
+        return lambda: {"op": "complete", "item": item.to_dict()}
+
+    def set_completed(self, item, completed):
+        if completed and item.completed is None:
+            item.completed = self.now
+        elif not completed:
+            item.completed = None
+        self.mark_updated(item, "completed")
+
+    def delete(self, operation):
+        item = self.get_item(operation["id"])
+        self.unplace(item)
+
+        if item.id is None:
+            self.created.remove(item)
+        else:
+            self.deleted.add(item.id)
+            self.updated.pop(item.id, None)
+            del self.items[item.id]
+        for ref, referenced in list(self.refs.items()):
+            if referenced is item:
+                del self.refs[ref]
+        return {"op": "delete", "id": operation["id"]}
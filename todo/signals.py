@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from sync.services import deleted_with_owner, record_deletions
+from todo.models import TodoItem, TodoList
+
+
+@receiver(pre_delete, sender=TodoList)
+def record_item_deletions(sender, instance, origin=None, **kwargs):
+    if deleted_with_owner(origin, instance.owner_id):
+        return
+    # The items go with the list through the cascade, without signals.
+    record_deletions(
+        instance.owner_id,
+        "todo_item",
+        TodoItem.objects.filter(todo_list=instance).values_list("id", flat=True),
+    )
+
+
+@receiver(post_delete, sender=TodoList)
+def record_list_deletion(sender, instance, origin=None, **kwargs):
+    if deleted_with_owner(origin, instance.owner_id):
+        return
+    record_deletions(instance.owner_id, "todo_list", [instance.id])
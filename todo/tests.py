@@ -1,3 +1,332 @@
-from django.test import TestCase
+import json
+import random
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from todo.models import TodoItem, TodoList, TodoReminder
+from todo.ordering import is_valid_key, key_between
+from todo.recurrence import Recurrence
+from todo.reminders import fire_due_reminders
+
+User = get_user_model()
+
+
+class OrderingKeyTests(SimpleTestCase):
+    def test_random_inserts_stay_ordered(self):
+        keys = []
+        for _ in range(2000):
+            i = random.randint(0, len(keys))
+            key = key_between(keys[i - 1] if i else None, keys[i] if i < len(keys) else None)
+            self.assertTrue(is_valid_key(key))
+            keys.insert(i, key)
+        self.assertEqual(keys, sorted(keys))
+
+    def test_rejects_unordered_bounds(self):
+        with self.assertRaises(ValueError):
+            key_between("b", "a")
+
+
+class TodoBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        token = Token.objects.create(user=self.user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+        self.todo_list = TodoList.objects.create(owner=self.user, title="Chores")
+
+    def batch(self, *operations):
+        return self.client.post(
+            "/api/todo/batch/", {"operations": operations}, content_type="application/json"
+        )
+
+    def titles(self):
+        return list(
+            TodoItem.objects.filter(todo_list=self.todo_list)
+            .order_by("position", "id")
+            .values_list("title", flat=True)
+        )
+
+    def test_batch_with_refs(self):
+        response = self.batch(
+            {"op": "create", "list": self.todo_list.id, "title": "dishes", "ref": "a"},
+            {"op": "create", "list": self.todo_list.id, "title": "laundry"},
+            {"op": "create", "list": self.todo_list.id, "title": "vacuum", "after": "a"},
+            {"op": "create", "list": self.todo_list.id, "title": "shop", "after": None},
+            {"op": "complete", "id": "a"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["data"]
+        self.assertIsNotNone(results[4]["item"]["completed"])
+        self.assertEqual(self.titles(), ["shop", "dishes", "vacuum", "laundry"])
+
+    def test_move_writes_one_row(self):
+        self.batch(*[
+            {"op": "create", "list": self.todo_list.id, "title": str(i)} for i in range(5)
+        ])
+        first, *_rest, last = TodoItem.objects.order_by("position")
+
+        with self.assertNumQueries(8):
+            # savepoint, items, lists, positions, sync sequence number
+            # (UPDATE and SELECT), one item UPDATE, release
+            response = self.client.patch(
+                f"/api/todo/items/{last.id}/", {"after": first.id},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.titles(), ["0", "4", "1", "2", "3"])
+
+    def test_create_without_returning_bulk_insert(self):
+        operations = [
+            {"op": "create", "list": self.todo_list.id, "title": "dishes", "ref": "a"},
+            {"op": "create", "list": self.todo_list.id, "title": "laundry", "after": None},
+            {"op": "complete", "id": "a"},
+        ]
+        with mock.patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert",
+            new_callable=mock.PropertyMock, return_value=False,
+        ):
+            # token, savepoint, lists, positions, sync sequence number
+            # (UPDATE and SELECT), INSERT, SELECT of the new ids, release
+            with self.assertNumQueries(9):
+                response = self.batch(*operations)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["data"]
+        items = TodoItem.objects.in_bulk()
+        self.assertEqual(
+            [items[result["item"]["id"]].title for result in results], ["dishes", "laundry", "dishes"]
+        )
+        self.assertIsNotNone(items[results[2]["item"]["id"]].completed)
+        # The sequence numbers reserved for the batch are kept.
+        self.assertEqual(
+            sorted(item.seq for item in items.values()),
+            [self.todo_list.seq + 1, self.todo_list.seq + 2],
+        )
+
+    def test_failing_operation_rolls_back(self):
+        item = TodoItem.objects.create(
+            todo_list=self.todo_list, owner=self.user, title="keep", position="i"
+        )
+
+        response = self.batch(
+            {"op": "delete", "id": item.id},
+            {"op": "create", "list": self.todo_list.id, "title": "new"},
+            {"op": "update", "id": 999999, "title": "missing"},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["data"], {"index": 2})
+        self.assertEqual(self.titles(), ["keep"])
+
+    def test_other_users_items_are_invisible(self):
+        other = User.objects.create_user("bob@example.com", "Passw0rd1", username="bob")
+        other_list = TodoList.objects.create(owner=other, title="Bob's")
+
+        response = self.batch({"op": "create", "list": other_list.id, "title": "x"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TodoItem.objects.exists())
+
+    def test_item_views_reject_bodies_that_are_not_objects(self):
+        item = TodoItem.objects.create(
+            todo_list=self.todo_list, owner=self.user, title="keep", position="i"
+        )
+
+        for url, method in [
+            (f"/api/todo/lists/{self.todo_list.id}/items/", self.client.post),
+            (f"/api/todo/items/{item.id}/", self.client.patch),
+        ]:
+            # Strings go out as they are, so these are a JSON string and number.
+            for body in (["title"], '"title"', "1"):
+                response = method(url, body, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["message"], "Request body must be an object.")
+        self.assertEqual(self.titles(), ["keep"])
+
+    def test_long_keys_respace_the_list(self):
+        self.batch(*[
+            {"op": "create", "list": self.todo_list.id, "title": str(i)} for i in range(3)
+        ])
+        first = TodoItem.objects.order_by("position").first()
+
+        with mock.patch("todo.services.POSITION_MAX_LENGTH", 2):
+            for i in range(10):
+                self.batch({
+                    "op": "create", "list": self.todo_list.id, "title": f"n{i}", "after": first.id,
+                })
+
+        self.assertEqual(self.titles()[0], "0")
+        self.assertEqual(self.titles()[-2:], ["1", "2"])
+        self.assertTrue(
+            all(len(p) <= 2 for p in TodoItem.objects.values_list("position", flat=True))
+        )
+
+
+class TodoSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        token = Token.objects.create(user=self.user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+
+    def sync(self, since, limit=100):
+        return self.client.get("/api/todo/sync/", {"since": since, "limit": limit}).json()["data"]
+
+    def test_changes_and_tombstones_in_sequence_order(self):
+        todo_list = TodoList.objects.create(owner=self.user, title="Chores")
+        self.client.post(
+            "/api/todo/batch/",
+            {"operations": [
+                {"op": "create", "list": todo_list.id, "title": "a", "ref": "a"},
+                {"op": "create", "list": todo_list.id, "title": "b"},
+            ]},
+            content_type="application/json",
+        )
+        first = self.sync(0)
+        self.assertEqual(
+            [c["kind"] for c in first["changes"]], ["todo_list", "todo_item", "todo_item"]
+        )
+        self.assertFalse(first["more"])
+
+        item = TodoItem.objects.get(title="a")
+        self.client.delete(f"/api/todo/items/{item.id}/")
+        self.client.patch(
+            f"/api/todo/lists/{todo_list.id}/", {"title": "Home"}, content_type="application/json"
+        )
+
+        second = self.sync(first["next"], limit=1)
+        self.assertEqual(
+            [(c["kind"], c["id"], c["deleted"]) for c in second["changes"]],
+            [("todo_item", item.id, True)],
+        )
+        self.assertTrue(second["more"])
+
+        third = self.sync(second["next"])
+        self.assertEqual([c["data"]["title"] for c in third["changes"]], ["Home"])
+
+        self.client.delete(f"/api/todo/lists/{todo_list.id}/")
+        deleted = self.sync(third["next"])["changes"]
+        self.assertEqual(
+            [(c["kind"], c["deleted"]) for c in deleted],
+            [("todo_item", True), ("todo_list", True)],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/todo/sync/", {"since": "x"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_stream_matches_paged_changes(self):
+        todo_list = TodoList.objects.create(owner=self.user, title="Chores")
+        self.client.post(
+            "/api/todo/batch/",
+            {"operations": [
+                {"op": "create", "list": todo_list.id, "title": str(i)} for i in range(5)
+            ]},
+            content_type="application/json",
+        )
+        item = TodoItem.objects.get(title="2")
+        self.client.delete(f"/api/todo/items/{item.id}/")
+
+        response = self.client.get("/api/todo/sync/", {"since": 1, "stream": 1})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b"".join(response.streaming_content))
+
+        paged = self.client.get("/api/todo/sync/", {"since": 1}).json()
+        self.assertEqual(streamed, paged)
+
+
+class RecurrenceTests(SimpleTestCase):
+    def test_monthly_clamps_to_month_end(self):
+        start = timezone.make_aware(datetime(2026, 1, 31, 9, 0))
+        rule = Recurrence.parse("FREQ=MONTHLY")
+        days = [timezone.localtime(rule.occurrence(start, n)).date().isoformat() for n in range(4)]
+        self.assertEqual(days, ["2026-01-31", "2026-02-28", "2026-03-31", "2026-04-30"])
+
+    def test_next_after_skips_to_the_upcoming_occurrence(self):
+        start = timezone.make_aware(datetime(2026, 1, 1, 9, 0))
+        rule = Recurrence.parse("FREQ=DAILY;INTERVAL=2")
+        n, when = rule.next_after(start, start + timedelta(days=1000, hours=1))
+        self.assertEqual(n, 501)
+        self.assertEqual(when, start + timedelta(days=1002))
+
+    def test_series_ends(self):
+        start = timezone.make_aware(datetime(2026, 1, 1, 9, 0))
+        self.assertIsNone(Recurrence.parse("FREQ=WEEKLY;COUNT=2").next_after(start, start + timedelta(days=7)))
+        self.assertIsNone(Recurrence.parse("FREQ=DAILY;UNTIL=20260103").next_after(start, start + timedelta(days=2)))
+
+    def test_rejects_unsupported_rules(self):
+        for rule in ["", "FREQ=HOURLY", "FREQ=DAILY;BYDAY=MO", "FREQ=DAILY;INTERVAL=0"]:
+            with self.assertRaises(ValueError):
+                Recurrence.parse(rule)
+
+
+class TodoReminderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice@example.com", "Passw0rd1", username="alice")
+        token = Token.objects.create(user=self.user)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Token {token.key}"
+        self.todo_list = TodoList.objects.create(owner=self.user, title="Chores")
+        self.item = TodoItem.objects.create(
+            todo_list=self.todo_list, owner=self.user, title="dishes", position="i"
+        )
+
+    def remind(self, item, remind_at, recurrence=""):
+        return TodoReminder.objects.create(
+            item=item, owner=self.user, remind_at=remind_at,
+            recurrence=recurrence, next_fire_at=remind_at,
+        )
+
+    def test_create_schedules_the_upcoming_occurrence(self):
+        remind_at = timezone.now() - timedelta(days=3, hours=1)
+        response = self.client.post(
+            f"/api/todo/items/{self.item.id}/reminders/",
+            {"remind_at": remind_at.isoformat(), "recurrence": "freq=daily"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        reminder = TodoReminder.objects.get()
+        self.assertEqual(reminder.recurrence, "FREQ=DAILY")
+        self.assertEqual(reminder.occurrence, 4)
+        self.assertGreater(reminder.next_fire_at, timezone.now())
+
+        response = self.client.post(
+            f"/api/todo/items/{self.item.id}/reminders/",
+            {"remind_at": remind_at.isoformat(), "recurrence": "FREQ=HOURLY"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_worker_fires_due_reminders_once(self):
+        done = TodoItem.objects.create(
+            todo_list=self.todo_list, owner=self.user, title="done", position="r",
+            completed=timezone.now(),
+        )
+        past = timezone.now() - timedelta(minutes=5)
+        one_off = self.remind(self.item, past)
+        daily = self.remind(self.item, past - timedelta(days=2), "FREQ=DAILY")
+        self.remind(done, past)
+        self.remind(self.item, timezone.now() + timedelta(hours=1))
+
+        # Claim and advance the batch in one transaction, then read the items.
+        with self.assertNumQueries(5):
+            self.assertEqual(fire_due_reminders(), 3)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].subject, "[Backbone] Reminder: dishes")
+        self.assertEqual(mail.outbox[0].to, ["alice@example.com"])
+
+        one_off.refresh_from_db()
+        self.assertIsNone(one_off.next_fire_at)
+        daily.refresh_from_db()
+        self.assertEqual(daily.occurrence, 3)
+        self.assertEqual(daily.next_fire_at, past + timedelta(days=1))
+
+        self.assertEqual(fire_due_reminders(), 0)
@@ -1,3 +1,23 @@
 from django.urls import path
 
-urlpatterns = []
+from todo.views import (
+    TodoBatchView,
+    TodoItemDetailView,
+    TodoItemListView,
+    TodoListDetailView,
+    TodoListListView,
+    TodoReminderDetailView,
+    TodoReminderListView,
+    TodoSyncView,
+)
+
+urlpatterns = [
+    path("lists/", TodoListListView.as_view(), name="todo-lists"),
+    path("lists/<int:list_id>/", TodoListDetailView.as_view(), name="todo-list-detail"),
+    path("lists/<int:list_id>/items/", TodoItemListView.as_view(), name="todo-items"),
+    path("items/<int:item_id>/", TodoItemDetailView.as_view(), name="todo-item-detail"),
+    path("items/<int:item_id>/reminders/", TodoReminderListView.as_view(), name="todo-reminders"),
+    path("reminders/<int:reminder_id>/", TodoReminderDetailView.as_view(), name="todo-reminder-detail"),
+    path("batch/", TodoBatchView.as_view(), name="todo-batch"),
+    path("sync/", TodoSyncView.as_view(), name="todo-sync"),
+]
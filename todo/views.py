@@ -1,3 +1,338 @@
-from django.shortcuts import render
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from accounts.views import ExceptionHandlerMixin
+from sync.views import SyncView
+from todo.exceptions import OperationError
+from todo.models import TodoItem, TodoList, TodoReminder
+from todo.reminders import schedule
+from todo.serializers import (
+    TodoBatchSerializer,
+    TodoListSerializer,
+    TodoOperationSerializer,
+    TodoReminderSerializer,
+)
+from todo.services import apply_operations
+from utils.handle_error_message import get_first_error
+from utils.pagination import get_page_size, keyset_page
+
+
+def list_not_found():
+    response_content = {
+        "status": False,
+        "message": _("Todo list does not exist."),
+    }
+    return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+
+def item_not_found():
+    response_content = {
+        "status": False,
+        "message": _("Todo item does not exist."),
+    }
+    return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+
+class OperationViewMixin:
+    """Runs item writes through the batch engine, one operation at a time."""
+
+    def apply_operation(self, request, operation, success_message, success_status):
+        serializer = TodoOperationSerializer(data=operation)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            [result] = apply_operations(request.user, [serializer.validated_data])
+        except OperationError as e:
+            response_content = {
+                "status": False,
+                "message": e.message,
+            }
+            return Response(response_content, status=e.code)
+
+        response_content = {
+            "status": True,
+            "message": success_message,
+            "data": result.get("item"),
+        }
+        return Response(response_content, status=success_status)
+
+    def apply_body_operation(self, request, fields, success_message, success_status):
+        """apply_operation on the request body with ``fields`` on top."""
+        if not isinstance(request.data, dict):
+            response_content = {
+                "status": False,
+                "message": _("Request body must be an object."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.apply_operation(
+            request, {**request.data, **fields}, success_message, success_status
+        )
+
+
+class TodoListListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TodoListSerializer
+
+    def get(self, request):
+        todo_lists = TodoList.objects.filter(owner=request.user).order_by("created", "id")
+
+        response_content = {
+            "status": True,
+            "message": _("Todo lists retrieved successfully."),
+            "data": [todo_list.to_dict() for todo_list in todo_lists],
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        todo_list = TodoList.objects.create(owner=request.user, **serializer.validated_data)
+
+        response_content = {
+            "status": True,
+            "message": _("Todo list created successfully."),
+            "data": todo_list.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_201_CREATED)
+
+
+class TodoListDetailView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TodoListSerializer
+
+    def patch(self, request, list_id):
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        todo_list = TodoList.objects.filter(id=list_id, owner=request.user).first()
+        if todo_list is None:
+            return list_not_found()
+
+        todo_list.title = serializer.validated_data["title"]
+        todo_list.save(update_fields=["title"])
+
+        response_content = {
+            "status": True,
+            "message": _("Todo list updated successfully."),
+            "data": todo_list.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def delete(self, request, list_id):
+        deleted, _rows = TodoList.objects.filter(id=list_id, owner=request.user).delete()
+        if not deleted:
+            return list_not_found()
+
+        response_content = {
+            "status": True,
+            "message": _("Todo list deleted successfully."),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class TodoItemListView(OperationViewMixin, ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, list_id):
+        """Items in list order."""
+        if not TodoList.objects.filter(id=list_id, owner=request.user).exists():
+            return list_not_found()
+
+        try:
+            items, next_cursor = keyset_page(
+                TodoItem.objects.filter(todo_list_id=list_id),
+                ("position", "id"),
+                cursor=request.query_params.get("cursor"),
+                limit=get_page_size(request, default=100, maximum=500),
+                descending=False,
+            )
+        except ValueError:
+            response_content = {
+                "status": False,
+                "message": _("Invalid cursor."),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        response_content = {
+            "status": True,
+            "message": _("Todo items retrieved successfully."),
+            "data": {
+                "next": next_cursor,
+                "results": [item.to_dict() for item in items],
+            },
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request, list_id):
+        return self.apply_body_operation(
+            request,
+            {"op": "create", "list": list_id},
+            _("Todo item created successfully."),
+            status.HTTP_201_CREATED,
+        )
+
+
+class TodoItemDetailView(OperationViewMixin, ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def patch(self, request, item_id):
+        """Change the title or completion, or move the item with ``after``."""
+        return self.apply_body_operation(
+            request,
+            {"op": "update", "id": item_id},
+            _("Todo item updated successfully."),
+            status.HTTP_200_OK,
+        )
+
+    def delete(self, request, item_id):
+        return self.apply_operation(
+            request,
+            {"op": "delete", "id": item_id},
+            _("Todo item deleted successfully."),
+            status.HTTP_200_OK,
+        )
+
+
+class TodoReminderListView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TodoReminderSerializer
+
+    def get(self, request, item_id):
+        if not TodoItem.objects.filter(id=item_id, owner=request.user).exists():
+            return item_not_found()
+
+        reminders = TodoReminder.objects.filter(item_id=item_id).order_by("remind_at", "id")
+
+        response_content = {
+            "status": True,
+            "message": _("Reminders retrieved successfully."),
+            "data": [reminder.to_dict() for reminder in reminders],
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+    def post(self, request, item_id):
+        """
+        Add a reminder firing at ``remind_at``, and then again on every
+        occurrence of the optional ``recurrence`` rule.
+        """
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        if not TodoItem.objects.filter(id=item_id, owner=request.user).exists():
+            return item_not_found()
+
+        reminder = TodoReminder(item_id=item_id, owner=request.user, **serializer.validated_data)
+        schedule(reminder)
+        reminder.save()
+
+        response_content = {
+            "status": True,
+            "message": _("Reminder created successfully."),
+            "data": reminder.to_dict(),
+        }
+        return Response(response_content, status=status.HTTP_201_CREATED)
+
+
+class TodoReminderDetailView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def delete(self, request, reminder_id):
+        deleted, _rows = TodoReminder.objects.filter(id=reminder_id, owner=request.user).delete()
+        if not deleted:
+            response_content = {
+                "status": False,
+                "message": _("Reminder does not exist."),
+            }
+            return Response(response_content, status=status.HTTP_404_NOT_FOUND)
+
+        response_content = {
+            "status": True,
+            "message": _("Reminder deleted successfully."),
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class TodoBatchView(ExceptionHandlerMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = TodoBatchSerializer
+
+    def post(self, request):
+        """
+        Apply a list of item operations atomically. Each operation has an
+        ``op`` of create, update, complete or delete. Items created in the
+        batch can be referred to by later operations through their ``ref``.
+        """
+        serializer = self.serializer_class(data=request.data)
+
+        if not serializer.is_valid():
+            response_content = {
+                "status": False,
+                "message": get_first_error(serializer.errors),
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        operations = []
+        for index, operation in enumerate(serializer.validated_data["operations"]):
+            operation_serializer = TodoOperationSerializer(data=operation)
+            if not operation_serializer.is_valid():
+                response_content = {
+                    "status": False,
+                    "message": get_first_error(operation_serializer.errors),
+                    "data": {"index": index},
+                }
+                return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+            operations.append(operation_serializer.validated_data)
+
+        try:
+            results = apply_operations(request.user, operations)
+        except OperationError as e:
+            response_content = {
+                "status": False,
+                "message": e.message,
+                "data": {"index": e.index},
+            }
+            return Response(response_content, status=status.HTTP_400_BAD_REQUEST)
+
+        response_content = {
+            "status": True,
+            "message": _("Operations applied successfully."),
+            "data": results,
+        }
+        return Response(response_content, status=status.HTTP_200_OK)
+
+
+class TodoSyncView(SyncView):
+    def get_sources(self, request):
+        return {
+            "todo_list": (TodoList.objects.filter(owner=request.user), TodoList.to_dict),
+            "todo_item": (TodoItem.objects.filter(owner=request.user), TodoItem.to_dict),
+        }
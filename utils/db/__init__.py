@@ -0,0 +1,183 @@
+"""
+Database connection reuse.
+
+Django keeps a connection per thread for CONN_MAX_AGE seconds. Under ASGI
+that does not help: every request runs its sync code in a fresh
+thread-sensitive context, gets a connection wrapper of its own and opens a
+new connection. The backends in this package, ``utils.db.mysql`` and
+``utils.db.sqlite3``, add a per-process pool for that case. With
+POOL_SIZE set in the database settings, a connection goes back to the pool
+at the end of every request, and the next request takes it from there
+instead of connecting. Pooled connections are retired after CONN_MAX_AGE
+seconds, like Django's own, and pinged before reuse when
+CONN_HEALTH_CHECKS is on. Connections closed inside a transaction, or
+after a database error, are really closed rather than pooled.
+
+With POOL_SIZE 0, the default, the backends behave exactly like Django's.
+
+``fill_pools()`` opens the pooled connections before the first request
+arrives; backbone.asgi calls it at lifespan startup, in each worker.
+``warm_up()`` also opens the calling thread's connection to the databases
+that are not pooled. Call it in each worker process, after the fork: a
+connection opened before forking would be shared between workers.
+"""
+
+import logging
+import os
+import threading
+import time
+from functools import partial
+
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """A stack of idle DB-API connections, each with its creation time."""
+
+    def __init__(self, size, max_age=None):
+        self.size = size
+        self.max_age = max_age
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _expired(self, created, now):
+        return self.max_age is not None and now - created >= self.max_age
+
+    def acquire(self, connect, check=None):
+        """
+        Return ``(connection, created)``: the most recently used idle
+        connection that is still fresh and passes ``check``, or a new one.
+        """
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, created = self._idle.pop()
+            if self._expired(created, now) or (check is not None and not check(connection)):
+                _close_quietly(connection)
+                continue
+            return connection, created
+        return connect(), now
+
+    def release(self, connection, created):
+        with self._lock:
+            if len(self._idle) < self.size and not self._expired(created, time.monotonic()):
+                self._idle.append((connection, created))
+                return
+        _close_quietly(connection)
+
+    def fill(self, connect):
+        """Open connections until the pool is full."""
+        while len(self._idle) < self.size:
+            self.release(connect(), time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _created in idle:
+            _close_quietly(connection)
+
+    def __len__(self):
+        return len(self._idle)
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, size, max_age):
+    """The process's pool for ``alias``, created on first use."""
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            # A forked worker starts with a pool of its own; the parent's
+            # connections must not be shared.
+            pool = _pools.setdefault(key, ConnectionPool(size, max_age))
+    return pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Mixed into a backend's DatabaseWrapper. Backends override
+    ``check_pooled()`` to test a connection before it is handed out again.
+    """
+
+    _pool_created = None
+
+    @property
+    def pool(self):
+        size = self.settings_dict.get("POOL_SIZE")
+        if not size:
+            return None
+        return get_pool(self.alias, size, self.settings_dict["CONN_MAX_AGE"])
+
+    def check_pooled(self, connection):
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        check = self.check_pooled if self.settings_dict["CONN_HEALTH_CHECKS"] else None
+        connection, self._pool_created = pool.acquire(
+            partial(super().get_new_connection, conn_params), check
+        )
+        return connection
+
+    def fill_pool(self):
+        with self.wrap_database_errors:
+            self.pool.fill(partial(super().get_new_connection, self.get_connection_params()))
+
+    def _close(self):
+        pool = self.pool
+        if (
+            pool is None
+            or self._pool_created is None
+            or self.in_atomic_block
+            or not self.autocommit
+            or self.errors_occurred
+        ):
+            return super()._close()
+        pool.release(self.connection, self._pool_created)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Hand the connection back at the end of every request: under ASGI
+        # the next request comes with another wrapper.
+        if self.pool is not None and self.connection is not None and not self.in_atomic_block:
+            self.close()
+
+
+def fill_pools():
+    """Open the pooled connections of every database ahead of the first request."""
+    for alias in connections:
+        connection = connections[alias]
+        if getattr(connection, "pool", None) is None:
+            continue
+        try:
+            connection.fill_pool()
+        except DatabaseError as e:
+            logger.warning("Could not warm up database %r: %s", alias, e)
+
+
+def warm_up():
+    """Open database connections ahead of the first request."""
+    fill_pools()
+    for alias in connections:
+        connection = connections[alias]
+        if getattr(connection, "pool", None) is not None:
+            continue
+        try:
+            connection.ensure_connection()
+        except DatabaseError as e:
+            logger.warning("Could not warm up database %r: %s", alias, e)
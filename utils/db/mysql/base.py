@@ -0,0 +1,12 @@
+from django.db.backends.mysql import base
+
+from utils.db import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def check_pooled(self, connection):
+        try:
+            connection.ping()
+        except base.Database.Error:
+            return False
+        return True
@@ -0,0 +1,315 @@
+"""
+Prometheus metrics for the API, without prometheus_client or any other
+service.
+
+MetricsMiddleware records, for every request under METRICS["PATH_PREFIX"]:
+
+- a latency histogram per view and method,
+- a response counter per view, method and status code,
+- a counter of the database queries each view runs.
+
+Views are labelled with their URL route, such as
+``api/todo/items/<int:item_id>/``, so the label set stays bounded. The
+mail queue depth is counted when the endpoint is scraped.
+
+Each thread adds to its own dict of samples, so recording takes no lock;
+a scrape sums the dicts. Under a server running several worker processes,
+set METRICS["MULTIPROCESS_DIR"]. Every process then writes its totals to
+a file there at most FLUSH_INTERVAL seconds after they change, and a
+scrape adds up the files of all processes. Empty the directory when the
+server starts, or the totals of an earlier run are carried over.
+
+The endpoint serves the text exposition format. With BEARER_TOKEN set, it
+only answers requests carrying ``Authorization: Bearer <token>``. Without
+it, only requests from ALLOWED_IPS are answered. That check is useless
+behind a reverse proxy on the same host, where every request comes from
+127.0.0.1, so set BEARER_TOKEN there.
+"""
+
+import bisect
+import hmac
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models import Count
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "PATH_PREFIX": "/api/",
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    "MULTIPROCESS_DIR": None,
+    "FLUSH_INTERVAL": 1,
+    "ALLOWED_IPS": ("127.0.0.1", "::1"),
+    "BEARER_TOKEN": None,
+}
+
+REQUEST_DURATION = "backbone_http_request_duration_seconds"
+RESPONSES = "backbone_http_responses_total"
+DB_QUERIES = "backbone_db_queries_total"
+MAIL_QUEUE_DEPTH = "backbone_mail_queue_depth"
+
+METRICS = {
+    REQUEST_DURATION: ("histogram", "Time spent serving API requests, by view."),
+    RESPONSES: ("counter", "API responses, by view and status code."),
+    DB_QUERIES: ("counter", "Database queries run while serving API requests, by view."),
+    MAIL_QUEUE_DEPTH: ("gauge", "Emails in the mail queue that are not sent yet, by status."),
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def metrics_setting(name):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+class Registry:
+    """
+    Samples keyed by ``(name, labels)``, where ``labels`` is a tuple of
+    ``(label, value)`` pairs. Histogram buckets are stored per bucket and
+    only made cumulative when rendered.
+    """
+
+    def __init__(self, buckets, directory=None, flush_interval=1):
+        self.buckets = tuple(buckets)
+        self._bounds = [_format(bound) for bound in self.buckets] + ["+Inf"]
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._path = None
+        self._pid = None
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = defaultdict(float)
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels, amount=1):
+        self._shard()[(name, labels)] += amount
+        if self.directory is not None:
+            self._schedule_flush()
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        bound = self._bounds[bisect.bisect_left(self.buckets, value)]
+        shard[(name + "_bucket", labels + (("le", bound),))] += 1
+        shard[(name + "_sum", labels)] += value
+        shard[(name + "_count", labels)] += 1
+        if self.directory is not None:
+            self._schedule_flush()
+
+    def local_samples(self):
+        totals = defaultdict(float)
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Copying a dict is atomic, so the owning thread can keep writing.
+            for key, value in shard.copy().items():
+                totals[key] += value
+        return totals
+
+    def collect(self):
+        """Samples of this process plus, in multiprocess mode, all the others."""
+        totals = self.local_samples()
+        if self.directory is None:
+            return totals
+
+        own = self.flush(totals)
+        for entry in os.listdir(self.directory):
+            if not entry.endswith(".json") or entry == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, entry)) as f:
+                    samples = json.load(f)
+            except (OSError, ValueError):
+                continue  # Removed or being replaced right now.
+            for name, labels, value in samples:
+                totals[(name, tuple(map(tuple, labels)))] += value
+        return totals
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to write metrics to %s.", self.directory)
+
+    def flush(self, samples=None):
+        """Write this process's totals to its file and return the file name."""
+        if samples is None:
+            samples = self.local_samples()
+        if self._pid != os.getpid():
+            # A forked worker must not overwrite its parent's file.
+            self._pid = os.getpid()
+            self._path = f"{self._pid}-{uuid.uuid4().hex[:8]}.json"
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump([[name, labels, value] for (name, labels), value in samples.items()], f)
+        os.replace(tmp, os.path.join(self.directory, self._path))
+        return self._path
+
+    def render(self, gauges=None):
+        """The collected samples, plus ``gauges``, in the text exposition format."""
+        samples = self.collect()
+        samples.update(gauges or {})
+
+        families = defaultdict(list)
+        for (name, labels), value in samples.items():
+            family = name
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[: -len(suffix)] in METRICS:
+                    family = name[: -len(suffix)]
+            families[family].append((name, labels, value))
+
+        lines = []
+        for family in sorted(families):
+            kind, help_text = METRICS.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            if kind == "histogram":
+                lines.extend(self._render_histogram(family, families[family]))
+                continue
+            for name, labels, value in sorted(families[family]):
+                lines.append(f"{name}{_labels(labels)} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, family, samples):
+        series = defaultdict(dict)
+        for name, labels, value in samples:
+            if name.endswith("_bucket"):
+                *labels, (_le, bound) = labels
+                series[tuple(labels)][bound] = value
+            else:
+                series[labels][name] = value
+
+        for labels in sorted(series):
+            values = series[labels]
+            cumulative = 0
+            for bound in self._bounds:
+                cumulative += values.get(bound, 0)
+                yield f"{family}_bucket{_labels(labels + (('le', bound),))} {_format(cumulative)}"
+            yield f"{family}_sum{_labels(labels)} {_format(values.get(family + '_sum', 0))}"
+            yield f"{family}_count{_labels(labels)} {_format(values.get(family + '_count', 0))}"
+
+
+def _format(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+@lru_cache(maxsize=None)
+def get_registry():
+    return Registry(
+        metrics_setting("BUCKETS"),
+        directory=metrics_setting("MULTIPROCESS_DIR"),
+        flush_interval=metrics_setting("FLUSH_INTERVAL"),
+    )
+
+
+class QueryCounter:
+    """A ``connection.execute_wrapper`` that only counts."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not metrics_setting("ENABLED"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = metrics_setting("PATH_PREFIX")
+        self.registry = get_registry()
+
+    def __call__(self, request):
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.route if match is not None else "unmatched"
+        labels = (("view", view), ("method", request.method))
+        self.registry.observe(REQUEST_DURATION, labels, elapsed)
+        self.registry.inc(RESPONSES, labels + (("status", str(response.status_code)),))
+        if queries.count:
+            self.registry.inc(DB_QUERIES, (("view", view),), queries.count)
+        return response
+
+
+def mail_queue_depth():
+    from mailer.models import QueuedEmail
+
+    depth = dict.fromkeys([QueuedEmail.Status.PENDING, QueuedEmail.Status.FAILED], 0)
+    rows = (
+        QueuedEmail.objects.exclude(status=QueuedEmail.Status.SENT)
+        .values_list("status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    depth.update(rows)
+    return {(MAIL_QUEUE_DEPTH, (("status", str(status)),)): count for status, count in depth.items()}
+
+
+def _authorized(request):
+    token = metrics_setting("BEARER_TOKEN")
+    if token:
+        given = request.META.get("HTTP_AUTHORIZATION", "")
+        return hmac.compare_digest(given.encode(), f"Bearer {token}".encode())
+    return request.META.get("REMOTE_ADDR") in metrics_setting("ALLOWED_IPS")
+
+
+def metrics_view(request):
+    if not metrics_setting("ENABLED") or not _authorized(request):
+        raise Http404
+    body = get_registry().render(mail_queue_depth())
+    return HttpResponse(body, content_type=CONTENT_TYPE)
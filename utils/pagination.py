@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def get_page_size(request, default=20, maximum=100):
+    try:
+        size = int(request.query_params.get("limit", default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(values):
+    # DjangoJSONEncoder cuts datetimes to milliseconds, which would skip
+    # rows sharing the millisecond of the last row on a page.
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, model, fields):
+    """
+    Turn a cursor back into typed values for ``fields``.
+    Raises ValueError for anything that was not produced by encode_cursor.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError("Invalid cursor.")
+
+    decoded = []
+    for name, value in zip(fields, values):
+        try:
+            value = model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            pass
+        except ValidationError:
+            raise ValueError("Invalid cursor.")
+        decoded.append(value)
+    return decoded
+
+
+def keyset_page(qs, fields, cursor=None, limit=20, descending=True):
+    """
+    Return ``(rows, next_cursor)`` for the page after ``cursor``, ordered by
+    ``fields``, which must end in a unique column. Each page is a single
+    index range scan, however deep into the result set it is.
+    """
+    if cursor:
+        values = decode_cursor(cursor, qs.model, fields)
+        lookup = "lt" if descending else "gt"
+
+        condition = Q()
+        for i, name in enumerate(fields):
+            equal = {field: value for field, value in zip(fields[:i], values[:i])}
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[i]})
+        qs = qs.filter(condition)
+
+    ordering = [f"-{name}" if descending else name for name in fields]
+    rows = list(qs.order_by(*ordering)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name in fields])
+
+    return rows, next_cursor
+
+
+def keyset_chunks(qs, fields, cursor=None, chunk_size=500, descending=True):
+    """
+    Iterate over everything after ``cursor`` as lists of up to
+    ``chunk_size`` rows, one keyset page query per list. Unlike
+    QuerySet.iterator(), memory stays bounded on drivers that buffer whole
+    result sets. A bad cursor raises ValueError here, before iteration.
+    """
+    rows, next_cursor = keyset_page(qs, fields, cursor, chunk_size, descending)
+
+    def iterate(rows, next_cursor):
+        while rows:
+            yield rows
+            if next_cursor is None:
+                return
+            rows, next_cursor = keyset_page(qs, fields, next_cursor, chunk_size, descending)
+
+    return iterate(rows, next_cursor)
@@ -0,0 +1,227 @@
+"""
+Opt-in request profiling.
+
+With PROFILING["ENABLED"] on, ProfilingMiddleware records for every request
+the number of SQL queries and the time spent in them, in password hashing,
+in template rendering and in PIL. The breakdown goes out in a Server-Timing
+header, which browser dev tools show next to the request, and requests
+slower than SLOW_MS are logged with it. A SAMPLE_RATE fraction of requests
+is also run under cProfile and dumped to DIRECTORY, which keeps the newest
+MAX_FILES dumps; open them with ``python -m pstats`` or snakeviz.
+
+Hashing, template and PIL calls are timed by wrapping the hasher classes,
+Django's template backend and a few PIL entry points when the middleware
+is first loaded. The wrappers check a context variable that is only set
+inside a profiled request, so they cost next to nothing anywhere else.
+Sections may overlap: queries run from a template count towards both.
+
+With ENABLED off the middleware removes itself from the stack at startup
+and nothing is wrapped.
+"""
+
+import cProfile
+import functools
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template
+
+try:
+    from PIL import Image, ImageFile
+except ImportError:
+    Image = ImageFile = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 0.0,
+    "DIRECTORY": "profiles",
+    "MAX_FILES": 200,
+    "SERVER_TIMING": True,
+    "SLOW_MS": 500,
+}
+
+SECTIONS = ("sql", "hashing", "template", "pil")
+
+_current = ContextVar("request_profile", default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+def profiling_setting(name):
+    return getattr(settings, "PROFILING", {}).get(name, DEFAULTS[name])
+
+
+class RequestProfile:
+    """Counters for one request. Doubles as a ``connection.execute_wrapper``."""
+
+    def __init__(self):
+        self.queries = 0
+        self.timings = dict.fromkeys(SECTIONS, 0.0)
+        self.total = 0.0
+        self._open = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timings["sql"] += time.perf_counter() - started
+
+    def server_timing(self):
+        metrics = [f'sql;dur={self.timings["sql"] * 1e3:.1f};desc="{self.queries} queries"']
+        metrics += [
+            f"{name};dur={self.timings[name] * 1e3:.1f}"
+            for name in SECTIONS[1:]
+            if self.timings[name]
+        ]
+        metrics.append(f"total;dur={self.total * 1e3:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self):
+        parts = [f"{self.queries} queries in {self.timings['sql'] * 1e3:.1f} ms"]
+        parts += [
+            f"{name} {self.timings[name] * 1e3:.1f} ms"
+            for name in SECTIONS[1:]
+            if self.timings[name]
+        ]
+        return ", ".join(parts)
+
+
+def timed(section, func):
+    """Wrap ``func`` so calls inside a profiled request count towards ``section``."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        # Nested calls, such as thumbnail() loading the image, count once.
+        if profile is None or section in profile._open:
+            return func(*args, **kwargs)
+        profile._open.add(section)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.timings[section] += time.perf_counter() - started
+            profile._open.discard(section)
+
+    wrapper.profiling_section = section
+    return wrapper
+
+
+def _wrap(owner, name, section):
+    func = getattr(owner, name, None)
+    if func is None or hasattr(func, "profiling_section"):
+        return
+    setattr(owner, name, timed(section, func))
+
+
+def install():
+    """Wrap the hashing, template and PIL entry points, once per process."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for hasher in get_hashers():
+            for name in ("encode", "verify", "harden_runtime"):
+                _wrap(type(hasher), name, "hashing")
+        _wrap(Template, "render", "template")
+        if Image is not None:
+            _wrap(Image, "open", "pil")
+            for name in ("convert", "copy", "resize", "save", "thumbnail", "transpose"):
+                _wrap(Image.Image, name, "pil")
+            for name in ("load", "verify"):
+                _wrap(ImageFile.ImageFile, name, "pil")
+        _installed = True
+
+
+def _slug(path):
+    return re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:80] or "root"
+
+
+def save_sample(profiler, request, elapsed, directory=None, max_files=None):
+    """Dump ``profiler`` into the sample directory and drop the oldest dumps."""
+    directory = directory or profiling_setting("DIRECTORY")
+    max_files = max_files or profiling_setting("MAX_FILES")
+    os.makedirs(directory, exist_ok=True)
+
+    # Names start with the time, so they sort oldest first.
+    stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 10**9:09d}"
+    name = f"{stamp}-{request.method}-{_slug(request.path)}-{elapsed * 1e3:.0f}ms.prof"
+    profiler.dump_stats(os.path.join(directory, name))
+
+    samples = sorted(entry for entry in os.listdir(directory) if entry.endswith(".prof"))
+    for entry in samples[:-max_files]:
+        try:
+            os.remove(os.path.join(directory, entry))
+        except FileNotFoundError:
+            pass  # Another worker got there first.
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Put this first in MIDDLEWARE so the session and authentication queries
+    are counted too. Streaming responses are measured up to the point the
+    response is returned, before their content is produced.
+    """
+
+    def __init__(self, get_response):
+        if not profiling_setting("ENABLED"):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.sample_rate = profiling_setting("SAMPLE_RATE")
+        self.server_timing = profiling_setting("SERVER_TIMING")
+        self.slow = profiling_setting("SLOW_MS") / 1e3
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        profiler = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                if profiler is None:
+                    response = self.get_response(request)
+                else:
+                    profiler.enable()
+                    try:
+                        response = self.get_response(request)
+                    finally:
+                        profiler.disable()
+        finally:
+            profile.total = time.perf_counter() - started
+            _current.reset(token)
+
+        if self.server_timing:
+            response["Server-Timing"] = profile.server_timing()
+        if profile.total >= self.slow:
+            logger.info(
+                "%s %s %s in %.1f ms: %s",
+                request.method,
+                request.path,
+                response.status_code,
+                profile.total * 1e3,
+                profile.summary(),
+            )
+        if profiler is not None:
+            try:
+                save_sample(profiler, request, profile.total)
+            except OSError as e:
+                logger.warning("Could not save profile of %s: %s", request.path, e)
+        return response
@@ -0,0 +1,75 @@
+"""
+JSON rendering through orjson when it is installed, stdlib json otherwise.
+
+orjson encodes UUIDs, datetimes and dates itself, so the usual payloads
+never reach a Python ``default`` callback. The envelope's lazy message is
+resolved up front for the same reason; ``default`` only sees the odd type
+orjson lacks, such as a lazy string nested in ``data``.
+
+Output matches DRF's JSONRenderer with its default settings: compact,
+UTF-8, UTC datetimes ending in "Z", and U+2028/U+2029 escaped. The one
+difference is that orjson writes NaN and infinities as null, where DRF
+refuses them.
+"""
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+
+
+def _default(obj):
+    return _encoder.default(obj)
+
+
+def _escape_separators(content):
+    # Valid JSON but not valid JavaScript, see DRF's JSONRenderer.
+    if b"\xe2\x80" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+def _resolve_message(data):
+    if isinstance(data, dict) and isinstance(data.get("message"), Promise):
+        data = {**data, "message": force_str(data["message"])}
+    return data
+
+
+def dumps(data):
+    """Encode ``data`` to compact UTF-8 JSON bytes."""
+    data = _resolve_message(data)
+    if orjson is not None:
+        content = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    else:
+        content = _encoder.encode(data).encode()
+    return _escape_separators(content)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    DRF's JSONRenderer with the orjson fast path. Indented output, as asked
+    for by the browsable API, and non-default JSON settings go through DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,68 @@
+"""
+Streaming responses in the ``{"status", "message", "data"}`` envelope.
+
+List endpoints can stream their whole result instead of a page. The envelope
+is written up front, then the ``results`` list one row at a time, then the
+keys that depend on the last row, such as the next cursor. Memory stays flat
+however long the list is.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework import status
+
+from utils.renderers import dumps
+
+# Rows are joined into writes of about this many bytes.
+WRITE_SIZE = 64 * 1024
+
+
+def wants_stream(request):
+    return request.query_params.get("stream", "").lower() in ("1", "true")
+
+
+def _write(head, results, tail):
+    parts, size = [head, b"["], 0
+    separator = b""
+    for row in results:
+        part = separator + dumps(row)
+        parts.append(part)
+        size += len(part)
+        separator = b","
+        if size >= WRITE_SIZE:
+            yield b"".join(parts)
+            parts, size = [], 0
+
+    parts.append(b"]")
+    for key, value in tail().items():
+        parts.append(b"," + dumps(key) + b":" + dumps(value))
+    parts.append(b"}}")
+    yield b"".join(parts)
+
+
+async def _write_async(chunks):
+    # Pull each write from the request's sync thread, where the database
+    # connection lives, instead of letting Django buffer the whole
+    # iterator as it does for sync iterators under ASGI.
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def streaming_response(request, message, results, data=None, tail=None,
+                       results_key="results", status_code=status.HTTP_200_OK):
+    """
+    Stream ``{"status": true, "message": ..., "data": {...}}`` where data
+    holds ``data``, then the ``results`` rows under ``results_key``, then
+    whatever ``tail()`` returns once the last row has been written.
+    """
+    # The message is translated now, while the request's language is active.
+    head = b'{"status":true,"message":' + dumps(message) + b',"data":{'
+    head += b"".join(dumps(key) + b":" + dumps(value) + b"," for key, value in (data or {}).items())
+    head += dumps(results_key) + b":"
+
+    chunks = _write(head, results, tail or dict)
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = _write_async(chunks)
+    return StreamingHttpResponse(chunks, status=status_code, content_type="application/json")
@@ -0,0 +1,258 @@
+import os
+import pstats
+import tempfile
+import time
+import uuid
+from io import BytesIO
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+
+from mailer.models import QueuedEmail
+from utils.db import ConnectionPool, fill_pools, get_pool
+from utils.db.sqlite3.base import DatabaseWrapper as PooledSQLiteWrapper
+from utils import renderers as fast_renderers
+from utils.metrics import Registry, get_registry
+from utils.parsers import JSONParser
+from utils.renderers import JSONRenderer
+
+PAYLOAD = {
+    "status": True,
+    "message": _("Friends retrieved successfully."),
+    "data": {
+        "id": uuid.UUID("e0fdaa58-d9ff-4b48-97da-d9305bbcca34"),
+        "created": datetime(2026, 10, 18, 4, 35, 57, 10149, tzinfo=dt_timezone.utc),
+        "local": timezone.localtime(datetime(2026, 10, 18, 4, 35, tzinfo=dt_timezone.utc)),
+        "day": date(2026, 10, 18),
+        "nested": [{"label": _("Invalid cursor."), "amount": Decimal("1.5")}],
+        "text": "你好\u2028",
+        "count": 3,
+        "next": None,
+    },
+}
+
+
+class JSONRendererTests(SimpleTestCase):
+    def test_matches_drf(self):
+        expected = renderers.JSONRenderer().render(PAYLOAD)
+        self.assertEqual(JSONRenderer().render(PAYLOAD), expected)
+
+        with mock.patch.object(fast_renderers, "orjson", None):
+            self.assertEqual(JSONRenderer().render(PAYLOAD), expected)
+
+    def test_indented_output_goes_through_drf(self):
+        rendered = JSONRenderer().render(PAYLOAD, "application/json; indent=2")
+        self.assertIn(b'\n  "status": true', rendered)
+
+
+class JSONParserTests(SimpleTestCase):
+    def parse(self, content):
+        return JSONParser().parse(BytesIO(content), "application/json", {"encoding": "utf-8"})
+
+    def test_parse(self):
+        self.assertEqual(self.parse('{"title": "你好"}'.encode()), {"title": "你好"})
+
+    def test_invalid_json(self):
+        for content in (b"{", b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(content)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def test_off_by_default(self):
+        response = self.client.get("/login/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PROFILING={"ENABLED": True})
+    def test_breakdown(self):
+        response = self.client.get("/login/")
+        self.assertRegex(response["Server-Timing"], r'^sql;dur=[0-9.]+;desc="0 queries", template;dur=')
+
+        get_user_model().objects.create_user("user@example.com", "Passw0rd1", username="user")
+        response = self.client.post("/login/", {"email": "user@example.com", "password": "Passw0rd1"})
+        self.assertEqual(response.status_code, 302)
+        timing = response["Server-Timing"]
+        self.assertNotIn('desc="0 queries"', timing)
+        self.assertIn("hashing;dur=", timing)
+
+    def test_samples_rotate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            setting = {"ENABLED": True, "SAMPLE_RATE": 1, "DIRECTORY": directory, "MAX_FILES": 2}
+            with override_settings(PROFILING=setting):
+                for i in range(3):
+                    self.client.get("/login/")
+
+            samples = sorted(os.listdir(directory))
+            self.assertEqual(len(samples), 2)
+            self.assertRegex(samples[0], r"-GET-login-\d+ms\.prof$")
+            pstats.Stats(os.path.join(directory, samples[0]))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        get_registry.cache_clear()
+        self.addCleanup(get_registry.cache_clear)
+
+    def test_endpoint(self):
+        user = get_user_model().objects.create_user("user@example.com", "Passw0rd1", username="user")
+        self.client.force_login(user)
+        self.client.get("/api/todo/lists/")
+        self.client.get("/api/todo/lists/")
+        self.client.get("/login/")
+        QueuedEmail.objects.create(subject="s", body="b", from_email="f@example.com", to=["t@example.com"])
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        body = response.content.decode()
+        labels = 'view="api/todo/lists/",method="GET"'
+        self.assertIn("# TYPE backbone_http_request_duration_seconds histogram", body)
+        self.assertIn(f'backbone_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2\n', body)
+        self.assertIn(f"backbone_http_request_duration_seconds_count{{{labels}}} 2\n", body)
+        self.assertIn(f'backbone_http_responses_total{{{labels},status="200"}} 2\n', body)
+        self.assertRegex(body, r'backbone_db_queries_total\{view="api/todo/lists/"\} [1-9]')
+        self.assertIn('backbone_mail_queue_depth{status="pending"} 1\n', body)
+        self.assertIn('backbone_mail_queue_depth{status="failed"} 0\n', body)
+        self.assertNotIn("login", body)
+
+    def test_only_served_locally(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.1").status_code, 404)
+
+    def test_bearer_token(self):
+        with override_settings(METRICS={**settings.METRICS, "BEARER_TOKEN": "s3cret"}):
+            # Requests through a local reverse proxy come from 127.0.0.1.
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong")
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(
+                "/metrics", REMOTE_ADDR="10.0.0.1", HTTP_AUTHORIZATION="Bearer s3cret"
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_histogram_buckets(self):
+        registry = Registry((0.1, 1))
+        labels = (("view", "v"),)
+        for value in (0.05, 0.5, 0.5, 5):
+            registry.observe("backbone_http_request_duration_seconds", labels, value)
+
+        self.assertIn(
+            'backbone_http_request_duration_seconds_bucket{view="v",le="0.1"} 1\n'
+            'backbone_http_request_duration_seconds_bucket{view="v",le="1"} 3\n'
+            'backbone_http_request_duration_seconds_bucket{view="v",le="+Inf"} 4\n'
+            'backbone_http_request_duration_seconds_sum{view="v"} 6.05\n'
+            'backbone_http_request_duration_seconds_count{view="v"} 4\n',
+            registry.render(),
+        )
+
+    def test_multiprocess(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Each registry stands in for a worker process with its own file.
+            workers = [Registry((1,), directory=directory, flush_interval=60) for _ in range(2)]
+            labels = (("view", "v"), ("method", "GET"), ("status", "200"))
+            for worker in workers:
+                worker.inc("backbone_http_responses_total", labels)
+            workers[1].flush()
+
+            self.assertIn(
+                'backbone_http_responses_total{view="v",method="GET",status="200"} 2\n',
+                workers[0].render(),
+            )
+            for worker in workers:
+                worker._timer.cancel()
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "utils.db.sqlite3",
+            "NAME": os.path.join(directory.name, "pool.sqlite3"),
+            "CONN_MAX_AGE": 60,
+            "POOL_SIZE": 2,
+        }
+        self.addCleanup(lambda: get_pool("pool", 2, 60).clear())
+
+    def wrapper(self, **settings):
+        return PooledSQLiteWrapper({**self.settings_dict, **settings}, alias="pool")
+
+    def test_connection_is_reused_across_wrappers(self):
+        first = self.wrapper()
+        first.ensure_connection()
+        raw = first.connection
+        first.close_if_unusable_or_obsolete()
+        self.assertIsNone(first.connection)
+        self.assertEqual(len(first.pool), 1)
+
+        second = self.wrapper()
+        second.ensure_connection()
+        self.assertIs(second.connection, raw)
+        self.assertEqual(len(second.pool), 0)
+        second.close()
+
+    def test_connection_in_transaction_is_not_pooled(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        wrapper.close()
+        self.assertEqual(len(wrapper.pool), 0)
+
+    def test_without_pool_size(self):
+        wrapper = self.wrapper(POOL_SIZE=0)
+        self.assertIsNone(wrapper.pool)
+        wrapper.ensure_connection()
+        wrapper.close()
+        self.assertEqual(len(get_pool("pool", 2, 60)), 0)
+
+    def test_stale_and_broken_connections_are_replaced(self):
+        class Raw:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        pool = ConnectionPool(2, max_age=60)
+        now = time.monotonic()
+        stale, healthy, broken = Raw(), Raw(), Raw()
+        pool.release(stale, now - 100)
+        self.assertTrue(stale.closed)
+
+        pool.release(healthy, now)
+        pool.release(broken, now)
+        connection, _created = pool.acquire(Raw, check=lambda c: c is not broken)
+        self.assertTrue(broken.closed)
+        self.assertIs(connection, healthy)
+
+    def test_fill_pools(self):
+        wrapper = self.wrapper()
+        with mock.patch("utils.db.connections", {"pool": wrapper}):
+            fill_pools()
+        self.assertEqual(len(wrapper.pool), 2)
+        self.assertIsNone(wrapper.connection)
+
+    def test_asgi_lifespan_fills_pools(self):
+        from backbone import asgi
+
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        with mock.patch.object(asgi, "fill_pools") as fill:
+            async_to_sync(asgi.application)({"type": "lifespan"}, receive, send)
+        fill.assert_called_once_with()
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])